@@ -1,8 +1,22 @@
+import sys
 import time
-import struct
+import argparse
 import threading
 from pymodbus.client import ModbusSerialClient as ModbusClient
 
+from rs485.alarms import ALARM_HIGH, AlarmEngine, AlarmRule
+from rs485.codec import ORDER_ABCD, TYPE_FLOAT, TYPE_LONG, get_codec
+from rs485.low_latency import LowLatencyProfile, rtu_timing
+from rs485.modbus_rtu import RESULT_OK, build_read_request, classify_response, read_response_length
+from rs485.ring_buffer import RingBuffer, RateMonitor
+from rs485.samples import SampleBatch
+from rs485.stream_export import StreamExporter
+from rs485.timing import TimingStats, TransactionTiming
+from rs485.tracing import tracer
+from rs485.transport import transact
+
+EXPORT_BATCH_SIZE = 1000  # 高速采集时每批提交给导出线程的样本数
+
 # 检查是否安装了 pyserial
 try:
     import serial
@@ -11,30 +25,47 @@ except ImportError:
 
 
 class ForceMeterReader:
-    def __init__(self, port, slave_address=0x01):
+    def __init__(self, port, slave_address=0x01, low_latency=False, byte_order=ORDER_ABCD, baudrate=115200,
+                 parity='N', stopbits=1):
         """
         初始化称重仪表连接
         :param port: 串口号 (如 'COM3' 或 '/dev/ttyUSB0')
         :param slave_address: 仪表地址 (默认0x01)
+        :param low_latency: 是否启用Linux低延迟串口配置 (高速采集时建议开启)
+        :param byte_order: 32位数值的字节序 (rs485.codec 中的 ORDER_*)，D505 为 ABCD 高字在前
+        :param baudrate: 波特率，参数未知时可用 rs485.autodetect 检测
+        :param parity: 校验位 ('N' / 'E' / 'O')
+        :param stopbits: 停止位
         """
         self.slave_address = slave_address  # 保存从站地址
+        self.byte_order = byte_order
+        # 读32位值的一次事务 (请求8字节 + 响应9字节 + 帧间隔)，读取失败后按此退避
+        char_time, _, t35 = rtu_timing(baudrate, 8, parity, stopbits)
+        self.frame_time = 17 * char_time + t35
         self.client = ModbusClient(
             port=port,
-            baudrate=115200,
+            baudrate=baudrate,
             bytesize=8,
-            parity='N',
-            stopbits=1,
+            parity=parity,
+            stopbits=stopbits,
             timeout=1
         )
         if not self.client.connect():
             raise ConnectionError(f"无法连接到端口 {port}")
+        self.low_latency_profile = None
+        if low_latency:
+            self.low_latency_profile = LowLatencyProfile()
+            for name, text in self.low_latency_profile.apply(self.client.socket).items():
+                print(f"低延迟模式 {name}: {text}")
 
-    def read_32bit_value(self, register_address):
+    def read_32bit_value(self, register_address, data_type=TYPE_FLOAT):
         """
-        读取32位寄存器值 (自动处理高低位转换)
+        读取32位寄存器值，按指定的数据类型和字节序解码，不做猜测
         :param register_address: 寄存器起始地址 (如 0x0010)
-        :return: 解析后的浮点数或长整型
+        :param data_type: TYPE_FLOAT / TYPE_LONG / TYPE_ULONG
+        :return: 浮点数 (保留4位小数) 或整数
         """
+        codec = get_codec(data_type, self.byte_order)
         response = self.client.read_holding_registers(
             address=register_address,
             count=2,
@@ -42,19 +73,8 @@ class ForceMeterReader:
         )
 
         if not response.isError():
-            # 组合高低位寄存器值 (高位在前，低位在后)
-            combined_value = (response.registers[0] << 16) | response.registers[1]
-
-            # 尝试解析为浮点数 (IEEE 754格式)
-            try:
-                # 使用struct模块将32位整数转换为浮点数
-                byte_data = combined_value.to_bytes(4, 'big')  # 高位在前模式
-                float_value = struct.unpack('>f', byte_data)[0]
-                return round(float_value, 4)  # 保留4位小数
-            except Exception as e:
-                print(f"解析为浮点数失败: {e}")
-                # 浮点解析失败则返回长整型
-                return combined_value
+            value = codec.from_registers(response.registers)
+            return round(value, 4) if data_type == TYPE_FLOAT else value
         else:
             raise Exception(f"读取错误: {response}")
 
@@ -64,20 +84,12 @@ class ForceMeterReader:
         :param register_address: 寄存器起始地址
         :param value: 要写入的数值 (支持浮点/长整型)
         """
-        # 转换浮点数到字节数据
-        if isinstance(value, float):
-            byte_data = struct.pack('>f', value)
-            int_value = struct.unpack('>I', byte_data)[0]
-        else:  # 长整型
-            int_value = value
-
-        # 拆分32位值为高低位寄存器值
-        high_byte = (int_value >> 16) & 0xFFFF
-        low_byte = int_value & 0xFFFF
+        # 按字节序拆分为两个寄存器值
+        codec = get_codec(TYPE_FLOAT if isinstance(value, float) else TYPE_LONG, self.byte_order)
 
         response = self.client.write_registers(
             address=register_address,
-            values=[high_byte, low_byte],
+            values=codec.to_registers(value),
             slave=self.slave_address
         )
 
@@ -86,49 +98,185 @@ class ForceMeterReader:
         else:
             raise Exception(f"写入失败: {response}")
 
+    def read_high_rate(self, register_address, buffer, duration=None, stop_event=None,
+                       data_type=TYPE_FLOAT, monitor=None, timing_stats=None, alarm_engine=None, max_errors=100,
+                       exporter=None):
+        """
+        高速采集模式：背靠背连续读取32位寄存器，不做任何等待
+        直接在 pymodbus 打开的串口上收发 (rs485.transport.transact)，每个样本都有发送、首字节和整帧完成时间
+        :param register_address: 寄存器起始地址 (如 0x0010)
+        :param buffer: 预分配的 RingBuffer，样本以发送时间 (纳秒) 写入
+        :param duration: 采集时长 (秒)，为 None 时一直采集到 stop_event 被置位
+        :param stop_event: threading.Event，用于从其他线程停止采集
+        :param data_type: rs485.codec 中的 TYPE_*，字节序使用构造时的 byte_order
+        :param monitor: RateMonitor，为 None 时自动创建
+        :param timing_stats: TimingStats，记录每次读取的发送/首字节/完成时间 (可选)
+        :param alarm_engine: AlarmEngine，在每个样本上本地判定报警 (可选)
+        :param max_errors: 连续失败达到此次数时停止采集 (如串口被拔出)
+        :param exporter: StreamExporter，每个样本连同三个时间戳按批写入 (可选)
+        :return: 采集报告 (实际采样率、错误数、间断记录)，因连续失败停止时 'aborted' 为 True
+        """
+        if monitor is None:
+            monitor = RateMonitor()
+        decode = get_codec(data_type, self.byte_order).unpack_from
+        port = self.client.socket
+        slave = self.slave_address
+        request = build_read_request(slave, register_address, 2)
+        expected_length = read_response_length(2)
+        batch = SampleBatch()
+        clock = time.monotonic_ns
+        deadline = None if duration is None else clock() + int(duration * 1e9)
+        backoff = self.frame_time
+        failures = 0
+        aborted = False
+
+        # 热循环内只做读取、解析和写缓冲区，不打印、不取整
+        while not (stop_event is not None and stop_event.is_set()):
+            timestamp = clock()
+            if deadline is not None and timestamp >= deadline:
+                break
+            try:
+                response, timing = transact(port, request, expected_length)
+                result, _ = classify_response(response, slave, 0x03, expected_length)
+            except Exception:
+                timing = TransactionTiming(send_ns=timestamp)
+                result = None
+            if timing_stats is not None:
+                timing_stats.record(slave, timing)
+            if result != RESULT_OK:
+                monitor.error()
+                # 串口断开时读取会立即失败，退避一个事务时间，避免空转占满CPU
+                failures += 1
+                if failures >= max_errors:
+                    aborted = True
+                    break
+                time.sleep(backoff)
+                continue
+            failures = 0
+            timestamp = timing.send_ns
+            with tracer.span("decode"):
+                value = decode(response, 3)
+            with tracer.span("store"):
+                buffer.append(timestamp, value)
+                monitor.update(timestamp)
+                if exporter is not None:
+                    batch.append(slave, register_address, timestamp, value, first_byte_ns=timing.first_byte_ns,
+                                 complete_ns=timing.complete_ns)
+                    if len(batch) >= EXPORT_BATCH_SIZE:
+                        exporter.submit(batch)
+                        batch = SampleBatch()
+            if alarm_engine is not None:
+                alarm_engine.evaluate(slave, register_address, timestamp, value)
+
+        if exporter is not None:
+            exporter.submit(batch)
+        report = monitor.report()
+        report['aborted'] = aborted
+        return report
+
     def close(self):
         """关闭连接"""
+        if self.low_latency_profile is not None:
+            self.low_latency_profile.restore(self.client.socket)
         self.client.close()
 
 
 # 使用示例
 if __name__ == "__main__":
-    # 1. 初始化仪表连接 (修改为实际串口)
+    parser = argparse.ArgumentParser(description="D505 力传感器仪表读取")
+    parser.add_argument("--port", default="COM3", help="串口号 (如 COM3 或 /dev/ttyUSB0)")
+    parser.add_argument("--autodetect", action="store_true",
+                        help="先检测波特率、校验位和从站地址 (结果按适配器序列号缓存，下次直接命中)")
+    parser.add_argument("--high-rate", nargs="?", type=float, const=10.0, metavar="秒数",
+                        help="高速采集模式，背靠背读取指定秒数 (默认10秒)")
+    parser.add_argument("--trace", action="store_true", help="高速采集时把各阶段耗时导出为 trace.json")
+    parser.add_argument("--export", metavar="文件", help="高速采集时把每个样本及其发送/首字节/完成时间写入 CSV 或 Parquet")
+    args = parser.parse_args()
+
+    # 1. 初始化仪表连接
     meter = None
+    port_name = args.port
     try:
         print("正在连接到力传感器仪表...")
-        meter = ForceMeterReader(port='COM3')  # 示例端口
+        line = {}
+        if args.autodetect:
+            from rs485.autodetect import detect_line
+            with serial.Serial(port_name) as detect_port:
+                settings = detect_line(detect_port)
+            if settings is None:
+                raise ConnectionError(f"{port_name} 上没有仪表响应")
+            print(f"检测到: {settings.text()}")
+            line = {'slave_address': settings.slave, 'baudrate': settings.baudrate,
+                    'parity': settings.parity, 'stopbits': settings.stopbits}
+        meter = ForceMeterReader(port=port_name, low_latency=args.high_rate is not None, **line)
         print("连接成功!")
-        
+
+        # 高速采集模式: python 485_D505-CH4_250715.py --high-rate [秒数] [--trace] [--export 文件]
+        # 加 --trace 时把各阶段耗时导出为 trace.json (Chrome trace-event 格式)
+        if args.high_rate is not None:
+            tracer.enabled = args.trace
+            seconds = args.high_rate
+            buffer = RingBuffer(capacity=100 * 3600)  # 100Hz下可保存1小时数据
+            print(f"高速采集 {seconds} 秒...")
+            timing_stats = TimingStats()
+            exporter = StreamExporter(args.export) if args.export else None
+            try:
+                report = meter.read_high_rate(0x0010, buffer, duration=seconds, timing_stats=timing_stats,
+                                              exporter=exporter)
+            finally:
+                if exporter is not None:
+                    exporter.close()
+            if exporter is not None:
+                print(f"样本已导出到 {exporter.path}: {exporter.written} 条, 丢弃 {exporter.dropped} 条")
+            print(f"样本数: {report['samples']}, 读取错误: {report['errors']}")
+            print(f"实际采样率: {report['rate_hz']:.1f} Hz, 采集时长: {report['duration_s']:.2f} 秒")
+            print(f"采样间断: {report['gap_count']} 次")
+            if report['aborted']:
+                print("连续读取失败，采集已停止 (请检查串口连接)")
+            for start_ns, length_ns in report['gaps'][:20]:
+                print(f"  间断开始于 {start_ns} ns, 时长 {length_ns / 1e6:.1f} ms")
+            print(timing_stats.summary_text(meter.slave_address))
+            if tracer.enabled:
+                tracer.dump_chrome('trace.json')
+                print("追踪数据已保存到 trace.json")
+            sys.exit(0)
+
         # 只在首次连接时设置报警值
         print("设置报警值...")
         meter.write_32bit_value(0x0014, 500.0)  # AL1第一报警值地址
         print("报警值设置成功")
+
+        # 报警在本地按读数判定；仪表内的报警值每60秒核对一次，不再每5次读取都读一遍
+        alarm_engine = AlarmEngine()
+        alarm_engine.add_rule(meter.slave_address, 0x0010, AlarmRule("AL1", ALARM_HIGH, 500.0, hysteresis=5.0))
+        alarm_engine.add_device_check(meter.slave_address, 0x0014, 500.0, "AL1设定值", interval=60.0, tolerance=1e-3)
+        alarm_engine.add_listener(lambda event: print(event.text()))
         
         # 2. 循环读取重量值
         print("开始读取重量数据 (按 Ctrl+C 退出):")
         try:
-            count = 0
             while True:
                 weight = meter.read_32bit_value(0x0010)  # ALV给定值地址
                 print(f"当前重量读数: {weight}")
-                
-                # 每5次读取显示一次报警值（可选）
-                count += 1
-                if count % 5 == 0:
-                    alarm = meter.read_32bit_value(0x0014)
-                    print(f"当前报警值: {alarm}")
+                alarm_engine.evaluate(meter.slave_address, 0x0010, time.monotonic_ns(), weight)
+
+                for slave, register, _, _ in alarm_engine.due_device_checks():
+                    try:
+                        alarm_engine.verify_device(slave, register, meter.read_32bit_value(register))
+                    except Exception as e:
+                        print(f"核对报警值失败: {e}")
+                        alarm_engine.verify_device(slave, register, None)
                 
                 # 等待1秒
                 time.sleep(1)
         except KeyboardInterrupt:
             print("\n检测到 Ctrl+C，正在退出...")
 
-    except ConnectionError as ce:
+    except (ConnectionError, serial.SerialException) as ce:
         print(f"连接错误: {ce}")
         print("请检查以下几点:")
         print("1. 确保串口连接正确")
-        print("2. 确认串口号是否正确 (当前使用的是 COM3)")
+        print(f"2. 确认串口号是否正确 (当前使用的是 {port_name}，可用 --port 指定)")
         print("3. 检查设备是否已连接并开启")
         print("4. 确保没有其他程序占用该串口")
     except KeyboardInterrupt:
@@ -1,13 +1,60 @@
 import sys
+import csv
+import time
 import struct
 import serial
+from functools import partial
 import serial.tools.list_ports
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGroupBox,
                              QLabel, QComboBox, QLineEdit, QPushButton, QTextEdit, QTabWidget,
-                             QGridLayout, QMessageBox, QCheckBox, QScrollBar)
+                             QGridLayout, QMessageBox, QCheckBox, QScrollBar, QTableWidget,
+                             QTableWidgetItem, QHeaderView, QFileDialog)
 from PyQt5.QtCore import QTimer
 from PyQt5.QtGui import QFont
 
+from rs485.alarms import ALARM_HIGH, ALARM_LOW, ALARM_RATE, AlarmEngine, AlarmLog, AlarmRule
+from rs485.autodetect import detect_line
+from rs485.bus_metrics import BusMetrics, MetricsServer
+from rs485.calibration import Calibration, CalibrationStore, CalibrationTable, parse_points
+from rs485.channels import ChannelBlock, ChannelConfig
+from rs485.codec import BYTE_ORDERS, TYPE_FLOAT, TYPE_LONG, TYPE_ULONG, get_codec
+from rs485.deadband import DEADBAND_ABSOLUTE, DEADBAND_PERCENT, DEADBAND_TIME, ChangeFilter, DeadbandRule
+from rs485.force_plot import ForcePlotWidget
+from rs485.json_store import config_path
+from rs485.low_latency import LowLatencyProfile
+from rs485.modbus_rtu import (RESULT_CRC, RESULT_EXCEPTION, RESULT_FUNCTION_ERROR, RESULT_OK, RESULT_SHORT,
+                              RESULT_SLAVE_MISMATCH, RESULT_TIMEOUT, build_read_request, classify_response,
+                              read_response_length)
+from rs485.port_watch import PORT_REMOVED, PORT_RESTORED, PortWatcher, resolve_port, stable_port_id
+from rs485.ring_buffer import RingBuffer
+from rs485.rolling_stats import ChannelStats
+from rs485.samples import STATUS_ALARM, STATUS_OK, STATUS_SUPPRESSED, Sample, SampleBatch
+from rs485.scheduler import PRIORITY_ALARM, PRIORITY_CONTROL, PRIORITY_POLL, TransactionScheduler
+from rs485.session import DEFAULT_PROFILE, SessionStore
+from rs485.stream_export import StreamExporter
+from rs485.timing import TimingStats
+from rs485.tracing import tracer
+from rs485.transport import transact
+
+
+PLOT_CHANNEL_COUNT = 4
+PORT_WATCH_INTERVAL = 500  # 检查适配器拔插的间隔 (毫秒)
+SESSION_PATH = config_path("d505_sessions.json")
+PLOT_BUFFER_CAPACITY = 50 * 3600 * 4  # 50Hz下每通道保存4小时
+STATS_COLUMNS = ["从站", "地址", "窗口(秒)", "样本数", "最小值", "最大值", "平均值", "标准差", "峰峰值"]
+BUS_COLUMNS = ["串口", "从站", "事务数", "成功", "超时", "长度不足", "CRC错误", "地址不匹配", "功能码错误",
+               "异常响应", "重新同步", "平均延迟(ms)", "总线占用率"]
+ALARM_COLUMNS = ["名称", "从站", "地址", "类型", "阈值", "回差", "状态"]
+ALARM_KIND_NAMES = {ALARM_HIGH: "上限", ALARM_LOW: "下限", ALARM_RATE: "变化率(/秒)"}
+CALIBRATION_COLUMNS = ["从站", "地址", "标定"]
+TYPE_NAMES = {TYPE_FLOAT: "浮点型 （Float）", TYPE_LONG: "长整型 （Long）", TYPE_ULONG: "无符号长整型 （ULong）"}
+BYTE_ORDER_NAMES = {"ABCD": "ABCD 高字在前", "CDAB": "CDAB 低字在前", "BADC": "BADC 字内交换", "DCBA": "DCBA 小端"}
+PARITY_NAMES = {"N": "无", "O": "奇校验", "E": "偶校验"}
+CALIBRATION_MODES = ["分段线性", "线性拟合", "增益偏移"]
+RESULT_TEXTS = {RESULT_TIMEOUT: "读取超时，未收到响应", RESULT_SHORT: "响应长度不足", RESULT_CRC: "CRC校验失败",
+                RESULT_SLAVE_MISMATCH: "从站地址不匹配", RESULT_FUNCTION_ERROR: "功能码错误",
+                RESULT_EXCEPTION: "异常响应"}
+
 
 class ModbusRTUTool(QMainWindow):
     def __init__(self):
@@ -19,18 +66,180 @@ class ModbusRTUTool(QMainWindow):
         font = QFont("微软雅黑", 12)
         self.setFont(font)
 
+        self.channel_buffers = [RingBuffer(PLOT_BUFFER_CAPACITY) for _ in range(PLOT_CHANNEL_COUNT)]
+        self.channel_stats = ChannelStats()
+        self.exporter = None
+        self.low_latency_profile = LowLatencyProfile()
+        self.bus_metrics = BusMetrics()
+        self.metrics_server = None
+        self.poll_timer = QTimer()
+        self.poll_timer.timeout.connect(self.read_data)
+        self.scheduler = TransactionScheduler()
+        self.scheduler_running = False
+        self.poll_pending = False
+        self.alarm_engine = AlarmEngine()
+        self.alarm_engine.add_listener(self.on_alarm_event)
+        self.alarm_log = None
+        self.change_filter = None
+        # 有标定的寄存器按标定换算，其余寄存器乘以数据缩放 (通道模式为各通道缩放)
+        self.calibration_table = CalibrationTable()
+        self.calibration_store = CalibrationStore()
+        # 适配器拔出后按原参数重新打开，连续读取随之恢复
+        self.port_watcher = None
+        self.serial_settings = None
+        self.bits_per_char = 10
+        # 总线指标按适配器的稳定标识统计，拔插后设备名变化 (ttyUSB0 -> ttyUSB1) 仍记在同一行
+        self.metrics_port = None
+        self.port_watch_timer = QTimer()
+        self.port_watch_timer.timeout.connect(self.check_port)
+        self.session_store = SessionStore(SESSION_PATH)
+
         self.init_ui()
         self.serial_connected = False
         self.read_count = 0
         self.write_count = 0
+        self.timing_stats = TimingStats()
+        self.latest_samples = {}
+        self.cycle_batch = SampleBatch()  # 本轮读取的样本，一轮结束后整批交给统计和记录
 
+        # 套用最近使用的会话配置，事件循环一启动就打开串口并按配置开始连续读取
+        self.startup_session = self.load_startup_session()
         self.auto_connect_timer = QTimer()
         self.auto_connect_timer.timeout.connect(self.auto_open_serial)
         self.auto_connect_timer.setSingleShot(True)
-        self.auto_connect_timer.start(1000)
+        self.auto_connect_timer.start(0)
 
     def auto_open_serial(self):
         self.open_serial()
+        if self.serial_connected and self.startup_session and self.startup_session.get('continuous'):
+            self.continuous_read_check.setChecked(True)
+
+    def load_startup_session(self):
+        try:
+            name = self.session_store.last_name()
+            profile = self.session_store.load(name) if name else None
+        except (OSError, ValueError) as e:
+            self.status_bar.showMessage(f"读取会话配置失败: {str(e)}")
+            return None
+        if profile is None:
+            return None
+        self.session_combo.setCurrentText(name)
+        self.apply_session(profile)
+        self.status_bar.showMessage(f"已套用会话配置: {name}")
+        return profile
+
+    def session_widgets(self):
+        """:return: {配置项: 控件}，会话配置按这些控件保存和恢复"""
+        widgets = {
+            'baudrate': self.baud_combo, 'bytesize': self.data_bits_combo, 'stopbits': self.stop_bits_combo,
+            'parity': self.parity_combo, 'slave': self.slave_address_edit, 'low_latency': self.low_latency_check,
+            'scale': self.scale_factor_edit, 'data_type': self.data_type_combo, 'byte_order': self.byte_order_combo,
+            'channel_mode': self.channel_mode_check, 'channel_start': self.channel_start_edit,
+            'status_address': self.status_address_edit, 'status_count': self.status_count_edit,
+            'poll_interval': self.poll_interval_edit, 'device_serial': self.device_serial_edit,
+        }
+        for i, address_edit in enumerate(self.read_address_edits):
+            widgets[f'address{i + 1}'] = address_edit
+        for i in range(PLOT_CHANNEL_COUNT):
+            widgets[f'channel{i + 1}_type'] = self.channel_type_combos[i]
+            widgets[f'channel{i + 1}_byte_order'] = self.channel_order_combos[i]
+            widgets[f'channel{i + 1}_scale'] = self.channel_scale_edits[i]
+            widgets[f'channel{i + 1}_unit'] = self.channel_unit_edits[i]
+        return widgets
+
+    def current_session(self):
+        profile = {}
+        for key, widget in self.session_widgets().items():
+            if isinstance(widget, QCheckBox):
+                profile[key] = widget.isChecked()
+            elif isinstance(widget, QComboBox):
+                data = widget.currentData()
+                profile[key] = widget.currentText() if data is None else data
+            else:
+                profile[key] = widget.text()
+        port = self.port_combo.currentText()
+        if port and port != "无可用串口":
+            # 按稳定标识保存，适配器换了USB口或编号变化也能找到
+            profile['port'] = port
+            profile['port_id'] = stable_port_id(port)
+        profile['continuous'] = self.continuous_read_check.isChecked()
+        return profile
+
+    def apply_session(self, profile):
+        for key, widget in self.session_widgets().items():
+            if key not in profile:
+                continue
+            value = profile[key]
+            if isinstance(widget, QCheckBox):
+                widget.setChecked(bool(value))
+            elif isinstance(widget, QComboBox):
+                index = widget.findData(value)
+                if index < 0:
+                    index = widget.findText(str(value))
+                if index < 0 and widget.count() and widget.itemData(0) is None:
+                    widget.addItem(str(value))
+                    index = widget.count() - 1
+                if index >= 0:
+                    widget.setCurrentIndex(index)
+            else:
+                widget.setText(str(value))
+
+        port = resolve_port(profile['port_id']) if profile.get('port_id') else None
+        port = port or profile.get('port')
+        if port:
+            if self.port_combo.findText(port) < 0:
+                self.port_combo.addItem(port)
+            self.port_combo.setCurrentText(port)
+
+        serial_number = profile.get('device_serial', "").strip()
+        if serial_number:
+            try:
+                self.calibration_store.load(serial_number, self.calibration_table)
+            except (OSError, ValueError) as e:
+                self.status_bar.showMessage(f"加载标定失败: {str(e)}")
+            self.refresh_calibration_table()
+
+    def save_session(self):
+        name = self.session_combo.currentText().strip() or DEFAULT_PROFILE
+        try:
+            self.session_store.save(name, self.current_session())
+        except OSError as e:
+            QMessageBox.critical(self, "错误", f"保存会话配置失败: {str(e)}")
+            return
+        if self.session_combo.findText(name) < 0:
+            self.session_combo.addItem(name)
+        self.session_combo.setCurrentText(name)
+        self.status_bar.showMessage(f"会话配置已保存: {name}")
+
+    def load_session(self):
+        name = self.session_combo.currentText().strip()
+        try:
+            profile = self.session_store.load(name)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "错误", f"读取会话配置失败: {str(e)}")
+            return
+        if profile is None:
+            QMessageBox.warning(self, "错误", f"没有名为 {name} 的会话配置")
+            return
+        if self.serial_connected or self.port_watcher is not None:
+            self.close_serial()
+        self.apply_session(profile)
+        self.open_serial()
+        if self.serial_connected and profile.get('continuous'):
+            self.continuous_read_check.setChecked(True)
+        self.status_bar.showMessage(f"已套用会话配置: {name}")
+
+    def remove_session(self):
+        name = self.session_combo.currentText().strip()
+        try:
+            self.session_store.remove(name)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "错误", f"删除会话配置失败: {str(e)}")
+            return
+        index = self.session_combo.findText(name)
+        if index >= 0:
+            self.session_combo.removeItem(index)
+        self.status_bar.showMessage(f"会话配置已删除: {name}")
 
     def init_ui(self):
         main_widget = QWidget()
@@ -95,13 +304,91 @@ class ModbusRTUTool(QMainWindow):
         self.slave_address_edit.setValidator(self.create_int_validator(1, 247))
         port_layout.addWidget(self.slave_address_edit, 5, 1)
 
+        self.low_latency_check = QCheckBox("低延迟模式（Linux：ASYNC_LOW_LATENCY、FTDI latency_timer、帧间隔超时）")
+        port_layout.addWidget(self.low_latency_check, 6, 0, 1, 3)
+
         self.connect_button = QPushButton("打开串口")
         self.connect_button.clicked.connect(self.toggle_connection)
-        port_layout.addWidget(self.connect_button, 6, 0, 1, 3)
+        port_layout.addWidget(self.connect_button, 7, 0, 1, 2)
+
+        # 依次切换波特率、校验方式探测常用从站地址，结果按适配器序列号缓存
+        self.autodetect_button = QPushButton("自动检测")
+        self.autodetect_button.clicked.connect(self.auto_detect_settings)
+        port_layout.addWidget(self.autodetect_button, 7, 2)
 
         port_group.setLayout(port_layout)
         settings_layout.addWidget(port_group)
 
+        # 会话配置：串口、从站、寄存器、缩放和轮询周期按名称保存，启动时套用最近使用的配置，关闭时自动保存
+        session_group = QGroupBox("会话配置")
+        session_layout = QHBoxLayout()
+        session_layout.addWidget(QLabel("配置名称:"))
+        self.session_combo = QComboBox()
+        self.session_combo.setEditable(True)
+        self.session_combo.setMinimumWidth(120)
+        try:
+            self.session_combo.addItems(self.session_store.names())
+        except (OSError, ValueError):
+            pass
+        if self.session_combo.findText(DEFAULT_PROFILE) < 0:
+            self.session_combo.addItem(DEFAULT_PROFILE)
+        session_layout.addWidget(self.session_combo, 1)
+        self.save_session_button = QPushButton("保存配置")
+        self.save_session_button.clicked.connect(self.save_session)
+        session_layout.addWidget(self.save_session_button)
+        self.load_session_button = QPushButton("加载配置")
+        self.load_session_button.clicked.connect(self.load_session)
+        session_layout.addWidget(self.load_session_button)
+        self.remove_session_button = QPushButton("删除配置")
+        self.remove_session_button.clicked.connect(self.remove_session)
+        session_layout.addWidget(self.remove_session_button)
+        session_group.setLayout(session_layout)
+        settings_layout.addWidget(session_group)
+
+        # 通道模式：4个通道的数值和状态字在一个03事务中读取，同一时刻采样
+        channel_group = QGroupBox("通道模式")
+        channel_layout = QGridLayout()
+        self.channel_mode_check = QCheckBox("一次读取全部通道")
+        channel_layout.addWidget(self.channel_mode_check, 0, 0, 1, 2)
+        channel_layout.addWidget(QLabel("起始地址:"), 0, 2)
+        self.channel_start_edit = QLineEdit("2000")
+        self.channel_start_edit.setValidator(self.create_int_validator(0, 65535))
+        channel_layout.addWidget(self.channel_start_edit, 0, 3)
+        channel_layout.addWidget(QLabel("状态字地址:"), 1, 0)
+        self.status_address_edit = QLineEdit("0")
+        self.status_address_edit.setValidator(self.create_int_validator(0, 65535))
+        self.status_address_edit.setToolTip("0 表示不读状态字，状态字须在通道数值之后")
+        channel_layout.addWidget(self.status_address_edit, 1, 1)
+        channel_layout.addWidget(QLabel("状态字个数:"), 1, 2)
+        self.status_count_edit = QLineEdit("2")
+        self.status_count_edit.setValidator(self.create_int_validator(0, 16))
+        channel_layout.addWidget(self.status_count_edit, 1, 3)
+
+        self.channel_type_combos = []
+        self.channel_order_combos = []
+        self.channel_scale_edits = []
+        self.channel_unit_edits = []
+        for i in range(PLOT_CHANNEL_COUNT):
+            row = 2 + i
+            channel_layout.addWidget(QLabel(f"通道{i + 1}:"), row, 0)
+            type_combo = self.create_type_combo(TYPE_LONG)
+            channel_layout.addWidget(type_combo, row, 1)
+            order_combo = self.create_byte_order_combo()
+            channel_layout.addWidget(order_combo, row, 4)
+            scale_edit = QLineEdit("0.1")
+            scale_edit.setValidator(self.create_float_validator())
+            channel_layout.addWidget(scale_edit, row, 2)
+            unit_edit = QLineEdit("")
+            unit_edit.setPlaceholderText("单位")
+            channel_layout.addWidget(unit_edit, row, 3)
+            self.channel_type_combos.append(type_combo)
+            self.channel_order_combos.append(order_combo)
+            self.channel_scale_edits.append(scale_edit)
+            self.channel_unit_edits.append(unit_edit)
+
+        channel_group.setLayout(channel_layout)
+        settings_layout.addWidget(channel_group)
+
         info_group = QGroupBox("操作说明")
         info_layout = QVBoxLayout()
         info_text = QTextEdit()
@@ -112,7 +399,9 @@ class ModbusRTUTool(QMainWindow):
             "3. 寄存器地址：0-65535 （32位数据占用2个连续寄存器）\n"
             "4. 读取数据：选择起始地址和读取寄存器数量（必须为2的倍数）\n"
             "5. 写入数据：输入32位数据（长整型或浮点型）\n"
-            "6. 修改通讯参数后需重新上电生效"
+            "6. 修改通讯参数后需重新上电生效\n"
+            "7. 通道模式：4个通道的数值和状态字一次读取，各通道可单独设置数据类型、缩放和单位\n"
+            "8. 会话配置：关闭时自动保存当前设置，下次启动立即套用并打开串口，之前在连续读取则直接开始读取"
         )
         info_layout.addWidget(info_text)
         info_group.setLayout(info_layout)
@@ -150,14 +439,17 @@ class ModbusRTUTool(QMainWindow):
         read_layout.addWidget(self.scale_factor_edit, 4, 1)
 
         read_layout.addWidget(QLabel("数据类型:"), 4, 2)
-        self.data_type_combo = QComboBox()
-        self.data_type_combo.addItems(["浮点型 （Float）", "长整型 （Long）"])
-        self.data_type_combo.setCurrentIndex(1)
+        self.data_type_combo = self.create_type_combo(TYPE_LONG)
         read_layout.addWidget(self.data_type_combo, 4, 3)
 
+        # 字节序同时用于读取和写入，不同厂家的仪表按说明书选择
+        read_layout.addWidget(QLabel("字节序:"), 5, 0)
+        self.byte_order_combo = self.create_byte_order_combo()
+        read_layout.addWidget(self.byte_order_combo, 5, 1)
+
         self.read_button = QPushButton("读取数据")
         self.read_button.clicked.connect(self.read_data)
-        read_layout.addWidget(self.read_button, 5, 0, 1, 4)
+        read_layout.addWidget(self.read_button, 6, 0, 1, 4)
 
         read_group.setLayout(read_layout)
         read_write_layout.addWidget(read_group, 3)
@@ -175,9 +467,7 @@ class ModbusRTUTool(QMainWindow):
         write_layout.addWidget(self.write_value_edit, 1, 1)
 
         write_layout.addWidget(QLabel("数据类型:"), 2, 0)
-        self.write_type_combo = QComboBox()
-        self.write_type_combo.addItems(["浮点型 （Float）", "长整型 （Long）"])
-        self.write_type_combo.setCurrentIndex(0)
+        self.write_type_combo = self.create_type_combo(TYPE_FLOAT)
         write_layout.addWidget(self.write_type_combo, 2, 1)
 
         write_layout.addWidget(QLabel(""), 3, 0)
@@ -214,14 +504,256 @@ class ModbusRTUTool(QMainWindow):
         data_layout.addWidget(result_group, 1)
 
         clear_layout = QHBoxLayout()
+        self.change_filter_check = QCheckBox("仅输出变化")
+        self.change_filter_check.toggled.connect(self.update_change_filter)
+        clear_layout.addWidget(self.change_filter_check)
+        self.deadband_mode_combo = QComboBox()
+        self.deadband_mode_combo.addItem("死区(数值)", DEADBAND_ABSOLUTE)
+        self.deadband_mode_combo.addItem("死区(%)", DEADBAND_PERCENT)
+        self.deadband_mode_combo.addItem("最小间隔(秒)", DEADBAND_TIME)
+        self.deadband_mode_combo.currentIndexChanged.connect(self.update_change_filter)
+        clear_layout.addWidget(self.deadband_mode_combo)
+        self.deadband_edit = QLineEdit("0")
+        self.deadband_edit.setValidator(self.create_float_validator())
+        self.deadband_edit.setMaximumWidth(70)
+        self.deadband_edit.editingFinished.connect(self.update_change_filter)
+        clear_layout.addWidget(self.deadband_edit)
+        clear_layout.addWidget(QLabel("心跳(秒):"))
+        self.heartbeat_edit = QLineEdit("60")
+        self.heartbeat_edit.setValidator(self.create_float_validator())
+        self.heartbeat_edit.setMaximumWidth(60)
+        self.heartbeat_edit.editingFinished.connect(self.update_change_filter)
+        clear_layout.addWidget(self.heartbeat_edit)
         self.clear_button = QPushButton("清空结果")
         self.clear_button.clicked.connect(self.clear_results)
+        self.export_button = QPushButton("开始记录")
+        self.export_button.clicked.connect(self.toggle_export)
         clear_layout.addStretch(1)
+        clear_layout.addWidget(self.export_button)
         clear_layout.addWidget(self.clear_button)
         clear_layout.addStretch(1)
         data_layout.addLayout(clear_layout)
 
+        plot_tab = QWidget()
+        plot_layout = QVBoxLayout(plot_tab)
+
+        plot_control_layout = QHBoxLayout()
+        self.continuous_read_check = QCheckBox("连续读取")
+        self.continuous_read_check.toggled.connect(self.toggle_continuous_read)
+        plot_control_layout.addWidget(self.continuous_read_check)
+        plot_control_layout.addWidget(QLabel("读取周期(ms):"))
+        self.poll_interval_edit = QLineEdit("20")
+        self.poll_interval_edit.setValidator(self.create_int_validator(1, 60000))
+        self.poll_interval_edit.setMaximumWidth(80)
+        plot_control_layout.addWidget(self.poll_interval_edit)
+        plot_control_layout.addWidget(QLabel("显示范围:"))
+        self.plot_window_combo = QComboBox()
+        self.plot_window_combo.addItems(["全部", "1分钟", "10分钟", "1小时"])
+        self.plot_window_combo.currentIndexChanged.connect(self.change_plot_window)
+        plot_control_layout.addWidget(self.plot_window_combo)
+        plot_control_layout.addStretch(1)
+        self.clear_plot_button = QPushButton("清空曲线")
+        self.clear_plot_button.clicked.connect(self.clear_plot)
+        plot_control_layout.addWidget(self.clear_plot_button)
+        plot_layout.addLayout(plot_control_layout)
+
+        self.force_plot = ForcePlotWidget()
+        self.force_plot.set_channels([(f"通道{i + 1}", buffer) for i, buffer in enumerate(self.channel_buffers)])
+        plot_layout.addWidget(self.force_plot, 1)
+
+        stats_tab = QWidget()
+        stats_layout = QVBoxLayout(stats_tab)
+
+        stats_control_layout = QHBoxLayout()
+        stats_control_layout.addWidget(QLabel("统计窗口(秒):"))
+        self.stats_windows_edit = QLineEdit(",".join(str(w) for w in self.channel_stats.windows))
+        stats_control_layout.addWidget(self.stats_windows_edit)
+        self.apply_windows_button = QPushButton("应用并重置")
+        self.apply_windows_button.clicked.connect(self.apply_stats_windows)
+        stats_control_layout.addWidget(self.apply_windows_button)
+        self.export_stats_button = QPushButton("导出统计")
+        self.export_stats_button.clicked.connect(self.export_stats)
+        stats_control_layout.addWidget(self.export_stats_button)
+        stats_layout.addLayout(stats_control_layout)
+
+        self.stats_table = QTableWidget()
+        self.stats_table.setColumnCount(len(STATS_COLUMNS))
+        self.stats_table.setHorizontalHeaderLabels(STATS_COLUMNS)
+        self.stats_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.stats_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        stats_layout.addWidget(self.stats_table)
+
+        bus_tab = QWidget()
+        bus_layout = QVBoxLayout(bus_tab)
+
+        bus_control_layout = QHBoxLayout()
+        self.metrics_server_check = QCheckBox("启用HTTP指标接口（Prometheus）")
+        self.metrics_server_check.toggled.connect(self.toggle_metrics_server)
+        bus_control_layout.addWidget(self.metrics_server_check)
+        bus_control_layout.addWidget(QLabel("端口:"))
+        self.metrics_port_edit = QLineEdit("9105")
+        self.metrics_port_edit.setValidator(self.create_int_validator(1, 65535))
+        self.metrics_port_edit.setMaximumWidth(80)
+        bus_control_layout.addWidget(self.metrics_port_edit)
+        self.metrics_url_label = QLabel("")
+        bus_control_layout.addWidget(self.metrics_url_label)
+        bus_control_layout.addStretch(1)
+        self.trace_check = QCheckBox("性能追踪")
+        self.trace_check.toggled.connect(self.toggle_tracing)
+        bus_control_layout.addWidget(self.trace_check)
+        self.dump_trace_button = QPushButton("导出追踪")
+        self.dump_trace_button.clicked.connect(self.dump_trace)
+        bus_control_layout.addWidget(self.dump_trace_button)
+        self.reset_metrics_button = QPushButton("重置计数")
+        self.reset_metrics_button.clicked.connect(self.reset_bus_metrics)
+        bus_control_layout.addWidget(self.reset_metrics_button)
+        bus_layout.addLayout(bus_control_layout)
+
+        self.bus_table = QTableWidget()
+        self.bus_table.setColumnCount(len(BUS_COLUMNS))
+        self.bus_table.setHorizontalHeaderLabels(BUS_COLUMNS)
+        self.bus_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.bus_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        bus_layout.addWidget(self.bus_table)
+
+        alarm_tab = QWidget()
+        alarm_layout = QVBoxLayout(alarm_tab)
+
+        rule_layout = QHBoxLayout()
+        rule_layout.addWidget(QLabel("名称:"))
+        self.alarm_name_edit = QLineEdit("AL1")
+        self.alarm_name_edit.setMaximumWidth(60)
+        rule_layout.addWidget(self.alarm_name_edit)
+        rule_layout.addWidget(QLabel("地址:"))
+        self.alarm_address_edit = QLineEdit("16")
+        self.alarm_address_edit.setValidator(self.create_int_validator(0, 65535))
+        self.alarm_address_edit.setMaximumWidth(60)
+        rule_layout.addWidget(self.alarm_address_edit)
+        self.alarm_kind_combo = QComboBox()
+        for kind, name in ALARM_KIND_NAMES.items():
+            self.alarm_kind_combo.addItem(name, kind)
+        rule_layout.addWidget(self.alarm_kind_combo)
+        rule_layout.addWidget(QLabel("阈值:"))
+        self.alarm_threshold_edit = QLineEdit("500")
+        self.alarm_threshold_edit.setValidator(self.create_float_validator())
+        self.alarm_threshold_edit.setMaximumWidth(80)
+        rule_layout.addWidget(self.alarm_threshold_edit)
+        rule_layout.addWidget(QLabel("回差:"))
+        self.alarm_hysteresis_edit = QLineEdit("0")
+        self.alarm_hysteresis_edit.setValidator(self.create_float_validator())
+        self.alarm_hysteresis_edit.setMaximumWidth(80)
+        rule_layout.addWidget(self.alarm_hysteresis_edit)
+        self.add_alarm_button = QPushButton("添加规则")
+        self.add_alarm_button.clicked.connect(self.add_alarm_rule)
+        rule_layout.addWidget(self.add_alarm_button)
+        self.remove_alarm_button = QPushButton("删除选中")
+        self.remove_alarm_button.clicked.connect(self.remove_alarm_rule)
+        rule_layout.addWidget(self.remove_alarm_button)
+        rule_layout.addStretch(1)
+        alarm_layout.addLayout(rule_layout)
+
+        device_check_layout = QHBoxLayout()
+        device_check_layout.addWidget(QLabel("核对仪表报警值 地址:"))
+        self.device_alarm_address_edit = QLineEdit("20")
+        self.device_alarm_address_edit.setValidator(self.create_int_validator(0, 65535))
+        self.device_alarm_address_edit.setMaximumWidth(60)
+        device_check_layout.addWidget(self.device_alarm_address_edit)
+        device_check_layout.addWidget(QLabel("期望值:"))
+        self.device_alarm_value_edit = QLineEdit("500")
+        self.device_alarm_value_edit.setValidator(self.create_float_validator())
+        self.device_alarm_value_edit.setMaximumWidth(80)
+        device_check_layout.addWidget(self.device_alarm_value_edit)
+        device_check_layout.addWidget(QLabel("周期(秒):"))
+        self.device_alarm_interval_edit = QLineEdit("60")
+        self.device_alarm_interval_edit.setValidator(self.create_int_validator(1, 86400))
+        self.device_alarm_interval_edit.setMaximumWidth(60)
+        device_check_layout.addWidget(self.device_alarm_interval_edit)
+        self.add_device_check_button = QPushButton("添加核对")
+        self.add_device_check_button.clicked.connect(self.add_device_alarm_check)
+        device_check_layout.addWidget(self.add_device_check_button)
+        device_check_layout.addStretch(1)
+        self.alarm_log_button = QPushButton("开始报警日志")
+        self.alarm_log_button.clicked.connect(self.toggle_alarm_log)
+        device_check_layout.addWidget(self.alarm_log_button)
+        alarm_layout.addLayout(device_check_layout)
+
+        self.alarm_table = QTableWidget()
+        self.alarm_table.setColumnCount(len(ALARM_COLUMNS))
+        self.alarm_table.setHorizontalHeaderLabels(ALARM_COLUMNS)
+        self.alarm_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.alarm_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.alarm_table.setSelectionBehavior(QTableWidget.SelectRows)
+        alarm_layout.addWidget(self.alarm_table, 1)
+
+        self.alarm_text = QTextEdit()
+        self.alarm_text.setReadOnly(True)
+        alarm_layout.addWidget(self.alarm_text, 1)
+
+        calibration_tab = QWidget()
+        calibration_layout = QVBoxLayout(calibration_tab)
+
+        calibration_edit_layout = QHBoxLayout()
+        calibration_edit_layout.addWidget(QLabel("地址:"))
+        self.calibration_address_edit = QLineEdit("2000")
+        self.calibration_address_edit.setValidator(self.create_int_validator(0, 65535))
+        self.calibration_address_edit.setMaximumWidth(60)
+        calibration_edit_layout.addWidget(self.calibration_address_edit)
+        self.calibration_mode_combo = QComboBox()
+        self.calibration_mode_combo.addItems(CALIBRATION_MODES)
+        calibration_edit_layout.addWidget(self.calibration_mode_combo)
+        calibration_edit_layout.addWidget(QLabel("标定点:"))
+        self.calibration_points_edit = QLineEdit()
+        self.calibration_points_edit.setPlaceholderText("原始值=工程值，如 0=0, 10000=100")
+        calibration_edit_layout.addWidget(self.calibration_points_edit, 1)
+        calibration_edit_layout.addWidget(QLabel("增益:"))
+        self.calibration_gain_edit = QLineEdit("1")
+        self.calibration_gain_edit.setMaximumWidth(70)
+        calibration_edit_layout.addWidget(self.calibration_gain_edit)
+        calibration_edit_layout.addWidget(QLabel("偏移:"))
+        self.calibration_offset_edit = QLineEdit("0")
+        self.calibration_offset_edit.setMaximumWidth(70)
+        calibration_edit_layout.addWidget(self.calibration_offset_edit)
+        self.add_calibration_button = QPushButton("设置标定")
+        self.add_calibration_button.clicked.connect(self.add_calibration)
+        calibration_edit_layout.addWidget(self.add_calibration_button)
+        self.remove_calibration_button = QPushButton("删除选中")
+        self.remove_calibration_button.clicked.connect(self.remove_calibration)
+        calibration_edit_layout.addWidget(self.remove_calibration_button)
+        calibration_layout.addLayout(calibration_edit_layout)
+
+        calibration_store_layout = QHBoxLayout()
+        calibration_store_layout.addWidget(QLabel("设备序列号:"))
+        self.device_serial_edit = QLineEdit()
+        self.device_serial_edit.setMaximumWidth(160)
+        calibration_store_layout.addWidget(self.device_serial_edit)
+        self.save_calibration_button = QPushButton("保存标定")
+        self.save_calibration_button.clicked.connect(self.save_calibrations)
+        calibration_store_layout.addWidget(self.save_calibration_button)
+        self.load_calibration_button = QPushButton("加载标定")
+        self.load_calibration_button.clicked.connect(self.load_calibrations)
+        calibration_store_layout.addWidget(self.load_calibration_button)
+        calibration_store_layout.addStretch(1)
+        calibration_layout.addLayout(calibration_store_layout)
+
+        self.calibration_table_widget = QTableWidget()
+        self.calibration_table_widget.setColumnCount(len(CALIBRATION_COLUMNS))
+        self.calibration_table_widget.setHorizontalHeaderLabels(CALIBRATION_COLUMNS)
+        self.calibration_table_widget.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.calibration_table_widget.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.calibration_table_widget.setSelectionBehavior(QTableWidget.SelectRows)
+        calibration_layout.addWidget(self.calibration_table_widget)
+
+        self.stats_refresh_timer = QTimer()
+        self.stats_refresh_timer.timeout.connect(self.refresh_stats_table)
+        self.stats_refresh_timer.timeout.connect(self.refresh_bus_table)
+        self.stats_refresh_timer.start(1000)
+
         tabs.addTab(data_tab, "数据操作")
+        tabs.addTab(plot_tab, "实时曲线")
+        tabs.addTab(stats_tab, "统计数据")
+        tabs.addTab(bus_tab, "总线状态")
+        tabs.addTab(alarm_tab, "报警")
+        tabs.addTab(calibration_tab, "标定")
         tabs.addTab(settings_tab, "串口设置")
         
         tabs.setCurrentIndex(0)
@@ -236,6 +768,310 @@ class ModbusRTUTool(QMainWindow):
 
         self.scrolling = False
 
+    def toggle_continuous_read(self, checked):
+        if checked:
+            if not self.serial_connected:
+                QMessageBox.warning(self, "错误", "请先打开串口")
+                self.continuous_read_check.setChecked(False)
+                return
+            interval = int(self.poll_interval_edit.text() or "20")
+            self.poll_timer.start(interval)
+        else:
+            self.poll_timer.stop()
+
+    def change_plot_window(self, index):
+        self.force_plot.set_window([None, 60, 600, 3600][index])
+
+    def clear_plot(self):
+        for buffer in self.channel_buffers:
+            buffer.clear()
+        self.force_plot.update()
+
+    def stats_table_rows(self):
+        rows = []
+        for slave, register, window, summary in self.channel_stats.rows():
+            values = [summary['min'], summary['max'], summary['mean'], summary['std'], summary['peak_to_peak']]
+            rows.append([str(slave), str(register), f"{window:g}", str(summary['count'])] +
+                        ["" if v is None else f"{v:.5g}" for v in values])
+        return rows
+
+    def refresh_stats_table(self):
+        rows = self.stats_table_rows()
+        self.stats_table.setRowCount(len(rows))
+        for row, texts in enumerate(rows):
+            for col, text in enumerate(texts):
+                item = self.stats_table.item(row, col)
+                if item is None:
+                    self.stats_table.setItem(row, col, QTableWidgetItem(text))
+                else:
+                    item.setText(text)
+
+    def apply_stats_windows(self):
+        try:
+            windows = [float(w) for w in self.stats_windows_edit.text().replace("，", ",").split(",") if w.strip()]
+            if not windows or min(windows) <= 0:
+                raise ValueError
+        except ValueError:
+            QMessageBox.warning(self, "错误", "统计窗口格式错误，例如：10,60,600")
+            return
+        self.channel_stats.reset(windows)
+        self.refresh_stats_table()
+
+    def export_stats(self):
+        path, _ = QFileDialog.getSaveFileName(self, "导出统计", "统计数据.csv", "CSV文件 (*.csv)")
+        if not path:
+            return
+        try:
+            with open(path, "w", newline="", encoding="utf-8-sig") as f:
+                writer = csv.writer(f)
+                writer.writerow(STATS_COLUMNS)
+                writer.writerows(self.stats_table_rows())
+            self.status_bar.showMessage(f"统计数据已导出到 {path}")
+        except OSError as e:
+            QMessageBox.critical(self, "导出错误", f"无法写入文件: {str(e)}")
+
+    def refresh_bus_table(self):
+        rows = self.bus_metrics.summary_rows()
+        self.bus_table.setRowCount(len(rows))
+        for row, (port, slave, metrics, utilization) in enumerate(rows):
+            results = metrics.results
+            latency = metrics.latency
+            mean_latency = f"{latency.sum / latency.count * 1000:.2f}" if latency.count else ""
+            texts = [port, str(slave), str(metrics.transactions), str(results['ok']), str(results['timeout']),
+                     str(results['short']), str(results['crc_error']), str(results['slave_mismatch']),
+                     str(results['function_error']), str(results['exception']), str(metrics.resyncs),
+                     mean_latency, f"{utilization * 100:.1f}%"]
+            for col, text in enumerate(texts):
+                item = self.bus_table.item(row, col)
+                if item is None:
+                    self.bus_table.setItem(row, col, QTableWidgetItem(text))
+                else:
+                    item.setText(text)
+
+    def reset_bus_metrics(self):
+        self.bus_metrics.reset()
+        self.refresh_bus_table()
+
+    def toggle_metrics_server(self, checked):
+        if not checked:
+            if self.metrics_server is not None:
+                self.metrics_server.close()
+                self.metrics_server = None
+            self.metrics_url_label.setText("")
+            return
+        try:
+            self.metrics_server = MetricsServer(self.bus_metrics, int(self.metrics_port_edit.text() or "9105"))
+        except OSError as e:
+            QMessageBox.critical(self, "错误", f"无法启动指标接口: {str(e)}")
+            self.metrics_server_check.setChecked(False)
+            return
+        self.metrics_url_label.setText(self.metrics_server.address)
+
+    def toggle_tracing(self, checked):
+        if checked:
+            tracer.clear()
+        tracer.enabled = checked
+
+    def dump_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, "导出追踪", "trace.json", "Chrome Trace (*.json)")
+        if not path:
+            return
+        try:
+            tracer.dump_chrome(path)
+            self.status_bar.showMessage(f"追踪数据已导出到 {path}，可在 chrome://tracing 或 Perfetto 中打开")
+        except OSError as e:
+            QMessageBox.critical(self, "导出错误", f"无法写入文件: {str(e)}")
+
+    def toggle_export(self):
+        if self.exporter is not None:
+            self.stop_export()
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "记录数据", "采集数据.csv",
+                                              "CSV文件 (*.csv);;Parquet文件 (*.parquet)")
+        if not path:
+            return
+        try:
+            self.exporter = StreamExporter(path)
+        except (OSError, RuntimeError) as e:
+            QMessageBox.critical(self, "记录错误", f"无法创建记录文件: {str(e)}")
+            return
+        self.export_button.setText("停止记录")
+        self.status_bar.showMessage(f"正在记录到 {path}")
+
+    def stop_export(self):
+        if self.exporter is None:
+            return
+        exporter = self.exporter
+        self.exporter = None
+        exporter.close()
+        self.export_button.setText("开始记录")
+        message = f"记录已停止：{exporter.path}，写入 {exporter.written} 条"
+        if exporter.dropped:
+            message += f"，丢弃 {exporter.dropped} 条"
+        if exporter.error:
+            message += f"，错误: {exporter.error}"
+        self.status_bar.showMessage(message)
+
+    def update_change_filter(self, *args):
+        if not self.change_filter_check.isChecked():
+            self.change_filter = None
+            return
+        try:
+            deadband = float(self.deadband_edit.text() or 0)
+            heartbeat = float(self.heartbeat_edit.text()) if self.heartbeat_edit.text() else None
+        except ValueError:
+            QMessageBox.warning(self, "错误", "无效的死区或心跳设置")
+            return
+        rule = DeadbandRule(self.deadband_mode_combo.currentData(), deadband, heartbeat or None)
+        if self.change_filter is None:
+            self.change_filter = ChangeFilter(rule)
+        else:
+            self.change_filter.default = rule
+
+    def add_alarm_rule(self):
+        try:
+            slave_address = int(self.slave_address_edit.text())
+            register_address = int(self.alarm_address_edit.text())
+            rule = AlarmRule(self.alarm_name_edit.text() or "报警", self.alarm_kind_combo.currentData(),
+                             float(self.alarm_threshold_edit.text()), float(self.alarm_hysteresis_edit.text() or 0))
+        except ValueError as e:
+            QMessageBox.warning(self, "错误", f"无效的报警规则: {str(e)}")
+            return
+        self.alarm_engine.add_rule(slave_address, register_address, rule)
+        self.refresh_alarm_table()
+
+    def remove_alarm_rule(self):
+        rows = self.alarm_engine.rules()
+        for index in sorted({item.row() for item in self.alarm_table.selectedItems()}):
+            if index < len(rows):
+                slave_address, register_address, rule, _ = rows[index]
+                self.alarm_engine.remove_rules(slave_address, register_address, rule.name)
+        self.refresh_alarm_table()
+
+    def add_device_alarm_check(self):
+        try:
+            slave_address = int(self.slave_address_edit.text())
+            register_address = int(self.device_alarm_address_edit.text())
+            expected = float(self.device_alarm_value_edit.text())
+            interval = float(self.device_alarm_interval_edit.text())
+            scale_factor = float(self.scale_factor_edit.text())
+        except ValueError:
+            QMessageBox.warning(self, "错误", "无效的核对参数")
+            return
+        # 报警值按添加时的数据类型、字节序和缩放系数解码，之后修改轮询设置不影响核对
+        data_type = self.data_type_combo.currentData()
+        byte_order = self.byte_order_combo.currentData()
+        self.alarm_engine.add_device_check(slave_address, register_address, expected, interval=interval,
+                                           tolerance=1e-3, data_type=data_type, byte_order=byte_order,
+                                           scale=scale_factor)
+        self.alarm_text.append(f"已添加仪表报警值核对：从站{slave_address} 地址{register_address}，"
+                               f"期望值{expected:g} ({data_type} {byte_order} ×{scale_factor:g})，"
+                               f"每{interval:g}秒随读取核对一次")
+
+    def verify_device_alarm(self, slave_address, register_address, codec, scale_factor):
+        command = build_read_request(slave_address, register_address, codec.registers)
+        expected_length = read_response_length(codec.registers)
+        value = None
+        try:
+            response, timing = transact(self.serial_port, command, expected_length)
+            self.record_bus_metrics(slave_address, command, response, 0x03, expected_length, timing)
+            result, _ = classify_response(response, slave_address, 0x03, expected_length)
+            if result == RESULT_OK:
+                value = codec.unpack_from(response, 3) * scale_factor
+        except Exception as e:
+            self.alarm_text.append(f"核对仪表报警值失败：{str(e)}")
+        self.alarm_engine.verify_device(slave_address, register_address, value)
+
+    def on_alarm_event(self, event):
+        color = "red" if event.active else "green"
+        self.alarm_text.append(f'<span style="color:{color}">{event.text()}</span>')
+        self.status_bar.showMessage(event.text())
+        if self.alarm_log is not None:
+            self.alarm_log(event)
+        self.refresh_alarm_table()
+
+    def refresh_alarm_table(self):
+        rows = self.alarm_engine.rules()
+        self.alarm_table.setRowCount(len(rows))
+        for row, (slave_address, register_address, rule, active) in enumerate(rows):
+            texts = [rule.name, str(slave_address), str(register_address), ALARM_KIND_NAMES[rule.kind],
+                     f"{rule.threshold:g}", f"{rule.hysteresis:g}", "报警" if active else "正常"]
+            for col, text in enumerate(texts):
+                self.alarm_table.setItem(row, col, QTableWidgetItem(text))
+
+    def toggle_alarm_log(self):
+        if self.alarm_log is not None:
+            self.alarm_log.close()
+            self.alarm_log = None
+            self.alarm_log_button.setText("开始报警日志")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "报警日志", "报警记录.csv", "CSV文件 (*.csv)")
+        if not path:
+            return
+        try:
+            self.alarm_log = AlarmLog(path)
+        except OSError as e:
+            QMessageBox.critical(self, "记录错误", f"无法创建报警日志: {str(e)}")
+            return
+        self.alarm_log_button.setText("停止报警日志")
+
+    def add_calibration(self):
+        try:
+            slave_address = int(self.slave_address_edit.text())
+            register_address = int(self.calibration_address_edit.text())
+            mode = self.calibration_mode_combo.currentText()
+            if mode == "增益偏移":
+                calibration = Calibration(float(self.calibration_gain_edit.text()),
+                                          float(self.calibration_offset_edit.text()))
+            else:
+                points = parse_points(self.calibration_points_edit.text())
+                calibration = Calibration.fit(points) if mode == "线性拟合" else Calibration(points=points)
+        except ValueError as e:
+            QMessageBox.warning(self, "错误", f"无效的标定: {str(e)}")
+            return
+        self.calibration_table.set(slave_address, register_address, calibration)
+        self.refresh_calibration_table()
+
+    def remove_calibration(self):
+        rows = self.calibration_table.items()
+        for index in sorted({item.row() for item in self.calibration_table_widget.selectedItems()}):
+            if index < len(rows):
+                slave_address, register_address, _ = rows[index]
+                self.calibration_table.remove(slave_address, register_address)
+        self.refresh_calibration_table()
+
+    def refresh_calibration_table(self):
+        rows = self.calibration_table.items()
+        self.calibration_table_widget.setRowCount(len(rows))
+        for row, (slave_address, register_address, calibration) in enumerate(rows):
+            for col, text in enumerate([str(slave_address), str(register_address), calibration.text()]):
+                self.calibration_table_widget.setItem(row, col, QTableWidgetItem(text))
+
+    def save_calibrations(self):
+        serial = self.device_serial_edit.text().strip()
+        if not serial:
+            QMessageBox.warning(self, "错误", "请输入设备序列号")
+            return
+        try:
+            self.calibration_store.save(serial, self.calibration_table)
+        except OSError as e:
+            QMessageBox.critical(self, "错误", f"保存标定失败: {str(e)}")
+            return
+        self.status_bar.showMessage(f"已保存设备 {serial} 的标定到 {self.calibration_store.path}")
+
+    def load_calibrations(self):
+        serial = self.device_serial_edit.text().strip()
+        if not serial:
+            QMessageBox.warning(self, "错误", "请输入设备序列号")
+            return
+        try:
+            self.calibration_store.load(serial, self.calibration_table)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "错误", f"加载标定失败: {str(e)}")
+            return
+        self.refresh_calibration_table()
+        self.status_bar.showMessage(f"已加载设备 {serial} 的标定，共 {len(self.calibration_table.items())} 个寄存器")
+
     def on_comm_scroll(self, value):
         if not self.scrolling:
             self.scrolling = True
@@ -248,6 +1084,19 @@ class ModbusRTUTool(QMainWindow):
             self.comm_text.verticalScrollBar().setValue(value)
             self.scrolling = False
 
+    def create_type_combo(self, default):
+        combo = QComboBox()
+        for data_type, name in TYPE_NAMES.items():
+            combo.addItem(name, data_type)
+        combo.setCurrentIndex(combo.findData(default))
+        return combo
+
+    def create_byte_order_combo(self):
+        combo = QComboBox()
+        for byte_order in BYTE_ORDERS:
+            combo.addItem(BYTE_ORDER_NAMES[byte_order], byte_order)
+        return combo
+
     def create_int_validator(self, min_val, max_val):
         from PyQt5.QtGui import QIntValidator
         validator = QIntValidator()
@@ -269,7 +1118,7 @@ class ModbusRTUTool(QMainWindow):
             self.port_combo.addItem("无可用串口")
 
     def toggle_connection(self):
-        if self.serial_connected:
+        if self.serial_connected or self.port_watcher is not None:
             self.close_serial()
         else:
             self.open_serial()
@@ -299,14 +1148,15 @@ class ModbusRTUTool(QMainWindow):
             elif parity_text == "偶校验":
                 parity = serial.PARITY_EVEN
 
-            self.serial_port = serial.Serial(
-                port=port,
-                baudrate=baudrate,
-                bytesize=bytesize,
-                parity=parity,
-                stopbits=stopbits,
-                timeout=1.0
-            )
+            self.serial_settings = {'baudrate': baudrate, 'bytesize': bytesize, 'parity': parity,
+                                    'stopbits': stopbits}
+            self.serial_port = serial.Serial(port=port, timeout=1.0, **self.serial_settings)
+
+            self.bits_per_char = 1 + bytesize + (0 if parity == serial.PARITY_NONE else 1) + int(stopbits)
+            self.port_watcher = PortWatcher(port)
+            self.metrics_port = self.port_watcher.port_id
+            self.bus_metrics.register_port(self.metrics_port, baudrate, self.bits_per_char)
+            self.port_watch_timer.start(PORT_WATCH_INTERVAL)
 
             self.serial_connected = True
             self.connect_button.setText("关闭串口")
@@ -314,12 +1164,113 @@ class ModbusRTUTool(QMainWindow):
             connection_info = f"串口已打开: {port}, {baudrate}波特率"
             self.comm_text.append(f'<span style="color:black">{connection_info}</span>')
             self.result_text.append(connection_info)
+            if self.low_latency_check.isChecked():
+                for name, text in self.low_latency_profile.apply(self.serial_port).items():
+                    self.comm_text.append(f'<span style="color:black">低延迟模式 {name}：{text}</span>')
         except Exception as e:
             QMessageBox.critical(self, "连接错误", f"无法打开串口: {str(e)}")
             self.status_bar.showMessage(f"连接失败: {str(e)}")
 
+    def auto_detect_settings(self):
+        if self.serial_connected:
+            QMessageBox.warning(self, "警告", "请先关闭串口再自动检测")
+            return
+        port = self.port_combo.currentText()
+        if port == "无可用串口" or not port:
+            QMessageBox.warning(self, "错误", "没有可用的串口")
+            return
+
+        slave = int(self.slave_address_edit.text() or "1")
+        slaves = [slave] + [address for address in (1, 2, 3, 4, 5, 247) if address != slave]
+
+        def show_progress(baudrate, parity, stopbits, address):
+            self.status_bar.showMessage(f"正在检测 {port}: {baudrate} 8{parity}{stopbits} 从站{address}")
+            QApplication.processEvents()
+
+        self.autodetect_button.setEnabled(False)
+        try:
+            with serial.Serial(port) as detect_port:
+                settings = detect_line(detect_port, slaves=slaves, progress=show_progress)
+        except Exception as e:
+            QMessageBox.critical(self, "检测错误", f"自动检测失败: {str(e)}")
+            self.status_bar.showMessage(f"自动检测失败: {str(e)}")
+            return
+        finally:
+            self.autodetect_button.setEnabled(True)
+
+        if settings is None:
+            self.status_bar.showMessage(f"{port} 未检测到仪表")
+            QMessageBox.warning(self, "自动检测", f"{port} 上没有仪表响应，请检查接线")
+            return
+        if self.baud_combo.findText(str(settings.baudrate)) < 0:
+            self.baud_combo.addItem(str(settings.baudrate))
+        self.baud_combo.setCurrentText(str(settings.baudrate))
+        self.data_bits_combo.setCurrentText("8")
+        self.parity_combo.setCurrentText(PARITY_NAMES[settings.parity])
+        self.stop_bits_combo.setCurrentText(str(settings.stopbits))
+        self.slave_address_edit.setText(str(settings.slave))
+        self.status_bar.showMessage(f"检测到: {settings.text()}")
+        self.result_text.append(f"自动检测 {port}: {settings.text()}")
+
+    def check_port(self):
+        event = self.port_watcher.check() if self.port_watcher is not None else None
+        if event == PORT_REMOVED and self.serial_connected:
+            self.port_lost("设备已拔出")
+        elif event == PORT_RESTORED and not self.serial_connected:
+            self.reopen_serial()
+
+    def port_lost(self, message):
+        """串口读写失败或设备消失：关闭串口，保留连续读取的设置，等待适配器重新插入"""
+        if not self.serial_connected:
+            return
+        self.port_watcher.mark_removed()
+        self.poll_timer.stop()
+        self.scheduler.clear()
+        self.poll_pending = False
+        self.flush_cycle_batch()
+        port = self.serial_port.port
+        try:
+            self.serial_port.close()
+        except Exception:
+            pass
+        self.serial_connected = False
+        self.status_bar.showMessage(f"串口 {port} 已断开，等待重新插入: {message}")
+        self.comm_text.append(f'<span style="color:red">串口 {port} 已断开: {message}</span>')
+        self.result_text.append(f"串口 {port} 已断开，等待重新插入")
+
+    def reopen_serial(self):
+        """适配器重新插入后按原参数打开 (设备名可能已变化)，恢复连续读取并记录间断时长"""
+        device = self.port_watcher.device
+        try:
+            self.serial_port = serial.Serial(port=device, timeout=1.0, **self.serial_settings)
+        except Exception as e:
+            # udev 可能还没设置好权限，下一次检查时重试
+            self.status_bar.showMessage(f"串口 {device} 重新打开失败，稍后重试: {str(e)}")
+            return
+        gap_ns = self.port_watcher.mark_restored()
+        self.bus_metrics.record_disconnect(self.metrics_port, gap_ns / 1e9)
+        if self.low_latency_check.isChecked():
+            self.low_latency_profile.apply(self.serial_port)
+        self.serial_connected = True
+        if self.port_combo.findText(device) < 0:
+            self.port_combo.addItem(device)
+        self.port_combo.setCurrentText(device)
+        message = f"串口 {device} 已重新连接，中断 {gap_ns / 1e9:.1f} 秒"
+        self.status_bar.showMessage(message)
+        self.comm_text.append(f'<span style="color:black">{message}</span>')
+        self.result_text.append(message)
+        if self.continuous_read_check.isChecked():
+            self.toggle_continuous_read(True)
+
     def close_serial(self):
+        self.port_watch_timer.stop()
+        self.port_watcher = None
+        self.continuous_read_check.setChecked(False)
+        self.scheduler.clear()
+        self.poll_pending = False
+        self.flush_cycle_batch()
         if self.serial_port and self.serial_port.is_open:
+            self.low_latency_profile.restore(self.serial_port)
             self.serial_port.close()
         self.serial_connected = False
         self.connect_button.setText("打开串口")
@@ -345,18 +1296,28 @@ class ModbusRTUTool(QMainWindow):
         if not self.serial_connected:
             QMessageBox.warning(self, "错误", "请先打开串口")
             return
+        if self.poll_pending:
+            # 上一轮轮询还没执行完 (被写入等操作插队)，不重复排队
+            return
 
+        cycle_start_ns = time.monotonic_ns()
         try:
             slave_address = int(self.slave_address_edit.text())
             scale_factor = float(self.scale_factor_edit.text())
-            data_type = self.data_type_combo.currentText()
+            codec = get_codec(self.data_type_combo.currentData(), self.byte_order_combo.currentData())
 
             self.read_count += 1
+            channel_block = self.build_channel_block() if self.channel_mode_check.isChecked() else None
+            if channel_block is not None:
+                valid_addresses = [channel_block.address(channel) for channel in channel_block.channels]
+            else:
+                valid_addresses = [int(addr.text()) for addr in self.read_address_edits if int(addr.text()) != 0]
+            # 仅输出变化时不打印每轮的分隔和标题，只显示有变化的地址
+            quiet = self.change_filter is not None and valid_addresses
 
-            self.comm_text.append("-----------------")
-            self.result_text.append("-----------------")
-
-            valid_addresses = [int(addr.text()) for addr in self.read_address_edits if int(addr.text()) != 0]
+            if not quiet:
+                self.comm_text.append("-----------------")
+                self.result_text.append("-----------------")
 
             if not valid_addresses:
                 self.comm_text.append(f"读取结果：第{self.read_count}次")
@@ -366,17 +1327,64 @@ class ModbusRTUTool(QMainWindow):
                 self.scroll_to_bottom()
                 return
 
-            self.comm_text.append(f"读取结果：第{self.read_count}次")
-            self.comm_text.append("")
-            self.result_text.append(f"读取结果：第{self.read_count}次")
-            self.result_text.append("")
-
-            for i, address_edit in enumerate(self.read_address_edits):
-                start_address = int(address_edit.text())
+            if not quiet:
+                self.comm_text.append(f"读取结果：第{self.read_count}次")
+                self.comm_text.append("")
+                self.result_text.append(f"读取结果：第{self.read_count}次")
+                self.result_text.append("")
 
-                if start_address == 0:
-                    continue
+            if channel_block is not None:
+                self.scheduler.put(partial(self.read_channel_block, slave_address, channel_block), PRIORITY_POLL)
+            else:
+                # 每个地址作为一个轮询事务排队，写入等控制操作可以插到两个地址之间
+                for i, address_edit in enumerate(self.read_address_edits):
+                    start_address = int(address_edit.text())
+
+                    if start_address == 0:
+                        continue
+
+                    self.scheduler.put(partial(self.read_address, i, slave_address, start_address, scale_factor,
+                                               codec), PRIORITY_POLL)
+            self.scheduler.put(partial(self.finish_read_cycle, slave_address, cycle_start_ns), PRIORITY_POLL)
+            self.poll_pending = True
+            # 仪表报警值只按核对周期读取，优先于轮询
+            for check_slave, register, check_codec, check_scale in self.alarm_engine.due_device_checks():
+                self.scheduler.put(partial(self.verify_device_alarm, check_slave, register, check_codec, check_scale),
+                                   PRIORITY_ALARM)
 
+        except Exception as e:
+            self.continuous_read_check.setChecked(False)
+            QMessageBox.critical(self, "错误", f"读取数据时发生错误: {str(e)}")
+            self.result_text.append(f"错误: {str(e)}")
+            self.scroll_to_bottom()
+            return
+        self.run_scheduled()
+
+    def run_scheduled(self):
+        """
+        依次执行排队的总线事务，每个事务之间处理界面事件，
+        让期间点击的写入等操作按优先级插队，最多等待一个事务的时间
+        """
+        if self.scheduler_running:
+            return
+        self.scheduler_running = True
+        try:
+            while self.serial_connected:
+                job = self.scheduler.get_nowait()
+                if job is None:
+                    break
+                job()
+                QApplication.processEvents()
+        finally:
+            self.scheduler_running = False
+
+    def read_address(self, i, slave_address, start_address, scale_factor, codec):
+        # 输出先暂存，数值未超出死区时整条不显示
+        comm_lines = []
+        result_lines = []
+        reported = True
+        try:
+            with tracer.span("frame_build"):
                 command = bytearray()
                 command.append(slave_address)
                 command.append(0x03)
@@ -385,89 +1393,225 @@ class ModbusRTUTool(QMainWindow):
                 command.append(0x00)
                 command.append(0x02)
 
-                crc = self.calculate_crc(command)
+                with tracer.span("crc"):
+                    crc = self.calculate_crc(command)
                 command.extend(crc)
 
-                self.serial_port.write(command)
-                self.comm_text.append(f'<span style="color:red">发送读取命令（地址{start_address}）：{command.hex(" ").upper()}</span>')
-
-                expected_length = 9
-                response = self.serial_port.read(expected_length)
+            expected_length = 9
+            response, timing = transact(self.serial_port, command, expected_length)
+            self.timing_stats.record(slave_address, timing)
+            self.record_bus_metrics(slave_address, command, response, 0x03, expected_length, timing)
+            comm_lines.append(f'<span style="color:red">发送读取命令（地址{start_address}）：{command.hex(" ").upper()}</span>')
 
-                if not response:
-                    self.comm_text.append(f'<span style="color:blue">收到响应数据（地址{start_address}）：读取超时，未收到响应</span>')
-                    self.result_text.append(f'<span style="color:red">地址{start_address}：</span>')
-                    self.result_text.append(f'<span style="color:blue">\t读取超时，未收到响应</span>')
-                    continue
+            if not response:
+                comm_lines.append(f'<span style="color:blue">收到响应数据（地址{start_address}）：读取超时，未收到响应</span>')
+                result_lines.append(f'<span style="color:red">地址{start_address}：</span>')
+                result_lines.append(f'<span style="color:blue">\t读取超时，未收到响应</span>')
+                return
 
-                self.comm_text.append(f'<span style="color:blue">收到响应数据（地址{start_address}）：{response.hex(" ").upper()}</span>')
+            latency_text = "" if timing.latency_ns is None else f"（{timing.latency_ns / 1e6:.2f} ms）"
+            comm_lines.append(f'<span style="color:blue">收到响应数据（地址{start_address}）：{response.hex(" ").upper()}{latency_text}</span>')
 
-                if len(response) < 5:
-                    self.result_text.append(f'<span style="color:red">地址{start_address}：</span>')
-                    self.result_text.append(f'<span style="color:blue">\t响应长度不足</span>')
-                    continue
+            if len(response) < 5:
+                result_lines.append(f'<span style="color:red">地址{start_address}：</span>')
+                result_lines.append(f'<span style="color:blue">\t响应长度不足</span>')
+                return
 
-                received_crc = response[-2:]
+            received_crc = response[-2:]
+            with tracer.span("crc"):
                 calculated_crc = self.calculate_crc(response[:-2])
-                if received_crc != calculated_crc:
-                    self.result_text.append(f'<span style="color:red">地址{start_address}：</span>')
-                    self.result_text.append(f'<span style="color:blue">\tCRC校验失败</span>')
-                    continue
-
-                if response[0] != slave_address:
-                    self.result_text.append(f'<span style="color:red">地址{start_address}：</span>')
-                    self.result_text.append(f'<span style="color:blue">\t从站地址不匹配</span>')
-                    continue
+            if received_crc != calculated_crc:
+                result_lines.append(f'<span style="color:red">地址{start_address}：</span>')
+                result_lines.append(f'<span style="color:blue">\tCRC校验失败</span>')
+                return
 
-                if response[1] != 0x03:
-                    self.result_text.append(f'<span style="color:red">地址{start_address}：</span>')
-                    self.result_text.append(f'<span style="color:blue">\t功能码错误</span>')
-                    continue
+            if response[0] != slave_address:
+                result_lines.append(f'<span style="color:red">地址{start_address}：</span>')
+                result_lines.append(f'<span style="color:blue">\t从站地址不匹配</span>')
+                return
 
-                byte_count = response[2]
-                data_bytes = response[3:3 + byte_count]
-
-                if "浮点型" in data_type:
-                    try:
-                        value = struct.unpack('>f', data_bytes)[0]
-                        scaled_value = value * scale_factor
-                        formatted_value = f"{scaled_value:.5f}".rstrip('0').rstrip('.')
-                        self.result_text.append(f'<span style="color:red">地址{start_address}：</span>')
-                        self.result_text.append(f'<span style="color:blue">&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;数值：{formatted_value}</span>')
-                    except:
-                        self.result_text.append(f'<span style="color:red">地址{start_address}：</span>')
-                        self.result_text.append(f'<span style="color:blue">&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;数值：解析浮点数错误</span>')
-                else:
-                    try:
-                        value = (data_bytes[0] << 24) | (data_bytes[1] << 16) | (data_bytes[2] << 8) | data_bytes[3]
-                        scaled_value = value * scale_factor
-                        if scale_factor == 1:
-                            self.result_text.append(f'<span style="color:red">地址{start_address}：</span>')
-                            self.result_text.append(f'<span style="color:blue">&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;数值：{int(scaled_value)}</span>')
-                        else:
-                            formatted_value = f"{scaled_value:.5f}".rstrip('0').rstrip('.')
-                            self.result_text.append(f'<span style="color:red">地址{start_address}：</span>')
-                            self.result_text.append(f'<span style="color:blue">&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;数值：{formatted_value}</span>')
-                    except:
-                        self.result_text.append(f'<span style="color:red">地址{start_address}：</span>')
-                        self.result_text.append(f'<span style="color:blue">&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;数值：解析长整型错误</span>')
+            if response[1] != 0x03:
+                result_lines.append(f'<span style="color:red">地址{start_address}：</span>')
+                result_lines.append(f'<span style="color:blue">\t功能码错误</span>')
+                return
 
-            self.scroll_to_bottom()
+            byte_count = response[2]
+            data_bytes = response[3:3 + byte_count]
+
+            try:
+                with tracer.span("decode"):
+                    value = codec.unpack_from(data_bytes)
+                    scaled_value = self.calibration_table.apply_value(slave_address, start_address, value,
+                                                                      scale_factor)
+                reported = self.deliver_sample(i, slave_address, start_address, scaled_value, timing)
+                integer = (codec.data_type != TYPE_FLOAT and scale_factor == 1
+                           and self.calibration_table.get(slave_address, start_address) is None)
+                formatted_value = str(int(scaled_value)) if integer else f"{scaled_value:.5f}".rstrip('0').rstrip('.')
+                result_lines.append(f'<span style="color:red">地址{start_address}：</span>')
+                result_lines.append(f'<span style="color:blue">&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;数值：{formatted_value}</span>')
+            except struct.error:
+                result_lines.append(f'<span style="color:red">地址{start_address}：</span>')
+                result_lines.append(f'<span style="color:blue">&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;数值：解析{TYPE_NAMES[codec.data_type]}错误</span>')
+        except Exception as e:
+            if isinstance(e, (serial.SerialException, OSError)) and self.port_watcher is not None:
+                # 适配器拔出：不弹窗，等待重新插入后自动恢复
+                self.port_lost(str(e))
+                return
+            self.scheduler.discard(PRIORITY_POLL)
+            self.poll_pending = False
+            self.continuous_read_check.setChecked(False)
+            self.flush_cycle_batch()
+            QMessageBox.critical(self, "错误", f"读取数据时发生错误: {str(e)}")
+            result_lines.append(f"错误: {str(e)}")
+            reported = True
+        finally:
+            if reported:
+                for line in comm_lines:
+                    self.comm_text.append(line)
+                for line in result_lines:
+                    self.result_text.append(line)
+
+    def build_channel_block(self):
+        """按通道模式的设置构建读取块，各通道数值从起始地址开始连续排列"""
+        start = int(self.channel_start_edit.text())
+        channels = [ChannelConfig(f"通道{i + 1}", 2 * i, type_combo.currentData(), float(scale_edit.text()),
+                                  unit_edit.text().strip(), order_combo.currentData())
+                    for i, (type_combo, order_combo, scale_edit, unit_edit) in enumerate(
+                        zip(self.channel_type_combos, self.channel_order_combos, self.channel_scale_edits,
+                            self.channel_unit_edits))]
+        status_address = int(self.status_address_edit.text() or 0)
+        status_count = int(self.status_count_edit.text() or 0)
+        if status_address and status_count:
+            if status_address < start:
+                raise ValueError("状态字地址必须在通道数值之后")
+            return ChannelBlock(start, channels, status_address - start, status_count)
+        return ChannelBlock(start, channels)
+
+    def read_channel_block(self, slave_address, block):
+        """一个事务读取全部通道和状态字，各通道样本使用同一个采样时间"""
+        comm_lines = []
+        result_lines = []
+        reported = False
+        end_address = block.start + block.count - 1
+        try:
+            command = block.request(slave_address)
+            expected_length = block.expected_length
+            response, timing = transact(self.serial_port, command, expected_length)
+            self.timing_stats.record(slave_address, timing)
+            result = self.record_bus_metrics(slave_address, command, response, 0x03, expected_length, timing)
+            comm_lines.append(f'<span style="color:red">发送读取命令（地址{block.start}-{end_address}）：{command.hex(" ").upper()}</span>')
+
+            if result != RESULT_OK:
+                reported = True
+                response_text = response.hex(" ").upper() if response else RESULT_TEXTS[result]
+                comm_lines.append(f'<span style="color:blue">收到响应数据（地址{block.start}-{end_address}）：{response_text}</span>')
+                result_lines.append(f'<span style="color:red">地址{block.start}-{end_address}：</span>')
+                result_lines.append(f'<span style="color:blue">\t{RESULT_TEXTS[result]}</span>')
+                return
 
+            latency_text = "" if timing.latency_ns is None else f"（{timing.latency_ns / 1e6:.2f} ms）"
+            comm_lines.append(f'<span style="color:blue">收到响应数据（地址{block.start}-{end_address}）：{response.hex(" ").upper()}{latency_text}</span>')
+
+            with tracer.span("decode"):
+                raw, status = block.decode(response, scaled=False)
+                addresses = [block.address(channel) for channel in block.channels]
+                # 全部通道一次向量换算，各通道可以是不同的传感器
+                values = self.calibration_table.apply(slave_address, addresses, raw,
+                                                      [channel.scale for channel in block.channels]).tolist()
+            for i, (channel, address, value) in enumerate(zip(block.channels, addresses, values)):
+                if not self.deliver_sample(i, slave_address, address, value, timing):
+                    continue
+                reported = True
+                formatted_value = f"{value:.5f}".rstrip('0').rstrip('.')
+                unit = f" {channel.unit}" if channel.unit else ""
+                result_lines.append(f'<span style="color:red">{channel.name}（地址{address}）：</span>')
+                result_lines.append(f'<span style="color:blue">&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;数值：{formatted_value}{unit}</span>')
+            if status and reported:
+                words = " ".join(f"{word:04X}" for word in status)
+                result_lines.append(f'<span style="color:blue">&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;状态字：{words}</span>')
         except Exception as e:
+            if isinstance(e, (serial.SerialException, OSError)) and self.port_watcher is not None:
+                # 适配器拔出：不弹窗，等待重新插入后自动恢复
+                self.port_lost(str(e))
+                return
+            self.scheduler.discard(PRIORITY_POLL)
+            self.poll_pending = False
+            self.continuous_read_check.setChecked(False)
+            self.flush_cycle_batch()
             QMessageBox.critical(self, "错误", f"读取数据时发生错误: {str(e)}")
-            self.result_text.append(f"错误: {str(e)}")
+            result_lines.append(f"错误: {str(e)}")
+            reported = True
+        finally:
+            if reported:
+                for line in comm_lines:
+                    self.comm_text.append(line)
+                for line in result_lines:
+                    self.result_text.append(line)
+
+    def finish_read_cycle(self, slave_address, cycle_start_ns):
+        self.poll_pending = False
+        self.flush_cycle_batch()
+        with tracer.span("render"):
+            message = self.timing_stats.summary_text(slave_address)
+            if self.change_filter is not None:
+                message += f"  已过滤 {self.change_filter.reduction:.1%}"
+            self.status_bar.showMessage(message)
             self.scroll_to_bottom()
+        tracer.record("read_data", cycle_start_ns, time.monotonic_ns())
+
+    def record_bus_metrics(self, slave_address, command, response, function, expected_length, timing):
+        result, exception_code = classify_response(response, slave_address, function, expected_length)
+        latency_ns = timing.latency_ns if result == RESULT_OK else None
+        self.bus_metrics.record_transaction(self.metrics_port, slave_address, len(command), len(response),
+                                            result, latency_ns, exception_code)
+        if timing.resynced:
+            self.bus_metrics.record_resync(self.metrics_port, slave_address)
+        return result
+
+    def deliver_sample(self, channel, slave_address, register_address, value, timing):
+        """
+        统计、曲线和报警使用全部样本，界面和记录只输出超出死区的变化
+        :return: 是否需要输出
+        """
+        reported = self.change_filter is None or self.change_filter.accept(
+            slave_address, register_address, timing.send_ns, value)
+        status = STATUS_OK if reported else STATUS_SUPPRESSED
+        with tracer.span("deliver"):
+            if channel < len(self.channel_buffers):
+                self.channel_buffers[channel].append(timing.send_ns, value)
+        events = self.alarm_engine.evaluate(slave_address, register_address, timing.send_ns, value)
+        if any(event.active for event in events):
+            status |= STATUS_ALARM
+        sample = Sample(slave_address, register_address, timing.send_ns, value, status,
+                        timing.first_byte_ns, timing.complete_ns)
+        self.latest_samples[(slave_address, register_address)] = sample
+        self.cycle_batch.add(sample)
+        return reported
+
+    def flush_cycle_batch(self):
+        """把本轮样本整批交给统计和记录，记录中不含被死区过滤的样本"""
+        batch = self.cycle_batch
+        if not len(batch):
+            return
+        self.cycle_batch = SampleBatch()
+        with tracer.span("deliver"):
+            self.channel_stats.add_batch(batch)
+            if self.exporter is not None:
+                self.exporter.submit(batch if self.change_filter is None else batch.select(STATUS_SUPPRESSED))
 
     def write_data(self):
         if not self.serial_connected:
             QMessageBox.warning(self, "错误", "请先打开串口")
             return
+        # 写入优先于轮询，连续读取时在当前地址读完后立即执行
+        self.scheduler.put(self.execute_write, PRIORITY_CONTROL)
+        self.run_scheduled()
 
+    def execute_write(self):
         try:
             slave_address = int(self.slave_address_edit.text())
             start_address = int(self.write_address_edit.text())
-            data_type = self.write_type_combo.currentText()
+            codec = get_codec(self.write_type_combo.currentData(), self.byte_order_combo.currentData())
             value_str = self.write_value_edit.text()
 
             self.write_count += 1
@@ -475,27 +1619,13 @@ class ModbusRTUTool(QMainWindow):
             self.comm_text.append("-----------------")
             self.result_text.append("-----------------")
 
-            if "浮点型" in data_type:
-                try:
-                    value = float(value_str)
-                    value_bytes = struct.pack('>f', value)
-                except ValueError:
-                    QMessageBox.warning(self, "错误", "无效的浮点数值")
-                    self.scroll_to_bottom()
-                    return
-            else:
-                try:
-                    value = int(value_str)
-                    value_bytes = bytes([
-                        (value >> 24) & 0xFF,
-                        (value >> 16) & 0xFF,
-                        (value >> 8) & 0xFF,
-                        value & 0xFF
-                    ])
-                except ValueError:
-                    QMessageBox.warning(self, "错误", "无效的长整型值")
-                    self.scroll_to_bottom()
-                    return
+            try:
+                value = float(value_str) if codec.data_type == TYPE_FLOAT else int(value_str)
+                value_bytes = codec.pack(value)
+            except (ValueError, struct.error):
+                QMessageBox.warning(self, "错误", f"无效的{TYPE_NAMES[codec.data_type]}数值")
+                self.scroll_to_bottom()
+                return
 
             register_count = 2
             byte_count = 4
@@ -513,13 +1643,12 @@ class ModbusRTUTool(QMainWindow):
             crc = self.calculate_crc(command)
             command.extend(crc)
 
-            self.serial_port.write(command)
+            expected_length = 8
+            response, timing = transact(self.serial_port, command, expected_length)
+            self.record_bus_metrics(slave_address, command, response, 0x10, expected_length, timing)
             self.comm_text.append(f'发送结果：第{self.write_count}次')
             self.comm_text.append(f'<span style="color:red">发送写入命令：{command.hex(" ").upper()}</span>')
 
-            expected_length = 8
-            response = self.serial_port.read(expected_length)
-
             if not response:
                 self.comm_text.append('<span style="color:blue">收到响应数据：读取超时，未收到响应</span>')
                 self.result_text.append("写入超时，未收到响应")
@@ -592,7 +1721,17 @@ class ModbusRTUTool(QMainWindow):
         self.result_text.clear()
 
     def closeEvent(self, event):
+        # 关闭前自动保存当前配置 (含连续读取状态)，下次启动原样恢复
+        try:
+            self.session_store.save(self.session_combo.currentText().strip() or DEFAULT_PROFILE,
+                                    self.current_session())
+        except OSError:
+            pass
         self.close_serial()
+        self.stop_export()
+        if self.alarm_log is not None:
+            self.toggle_alarm_log()
+        self.metrics_server_check.setChecked(False)
         event.accept()
 
 
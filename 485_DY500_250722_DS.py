@@ -4,16 +4,57 @@ import serial.tools.list_ports
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QGroupBox, QLabel, QComboBox, QPushButton, QLineEdit,
                              QTextEdit, QTableWidget, QTableWidgetItem, QTabWidget,
-                             QHeaderView, QMessageBox, QFormLayout, QSpinBox)
-from PyQt5.QtCore import QTimer, Qt
+                             QHeaderView, QMessageBox, QFormLayout, QSpinBox, QFileDialog,
+                             QCheckBox)
+from PyQt5.QtCore import Qt, QTimer
 import struct
 import binascii
+import time
+
+from rs485.active_send import ActiveSendParser
+from rs485.autodetect import detect_line
+from rs485.codec import BYTE_ORDERS, TYPE_FLOAT, TYPE_LONG, get_codec
+from rs485.deadband import DEADBAND_ABSOLUTE, DEADBAND_PERCENT, ChangeFilter, DeadbandRule
+from rs485.low_latency import LowLatencyProfile
+from rs485.port_watch import PORT_REMOVED, PORT_RESTORED, PortWatcher
+from rs485.ring_buffer import RingBuffer
+from rs485.rolling_stats import ChannelStats
+from rs485.samples import STATUS_ACTIVE_SEND, STATUS_OK, STATUS_SUPPRESSED, SampleBatch
+from rs485.stream_export import StreamExporter
+from rs485.serial_receiver import SerialReceiver
+from rs485.timing import TimingStats, TransactionTiming
+from rs485.transport import find_frame
+from rs485.zeroing import DY500_ZERO_COMMANDS, ZeroCommandStore, parse_slaves, zero_meters
+
+# 主动发送模式的数据没有从站和寄存器地址，统一记在 (0, 0) 下
+ACTIVE_SEND_KEY = (0, 0)
+SAMPLE_BUFFER_CAPACITY = 100 * 3600  # 每个数据点保存的样本数
+PORT_WATCH_INTERVAL = 500  # 检查适配器拔插的间隔 (毫秒)
+# 文本显示区保留的行数，高速数据流下界面不会越来越慢
+TEXT_MAX_BLOCKS = 2000
 
 
 class ModbusRTUTool(QMainWindow):
     def __init__(self):
         super().__init__()
         self.serial_port = None
+        self.receiver = None
+        self.low_latency_profile = LowLatencyProfile()
+        self.rtu_buffer = bytearray()  # 拼接分多次到达的Modbus响应
+        self.timing_stats = TimingStats()
+        self.pending_timing = None  # 当前等待响应的请求: (设备地址, TransactionTiming)
+        self.last_read_address = None
+        self.active_parser = ActiveSendParser()
+        self.sample_buffers = {}
+        self.channel_stats = ChannelStats()
+        self.exporter = None
+        self.change_filter = None
+        # 适配器拔出后按原参数重新打开并恢复接收
+        self.port_watcher = None
+        self.serial_settings = None
+        self.port_watch_timer = QTimer(self)
+        self.port_watch_timer.timeout.connect(self.check_port)
+        self.zero_store = ZeroCommandStore()
         self.setWindowTitle("DY500智能数字变送器通讯工具")
         self.setGeometry(100, 100, 900, 700)
 
@@ -23,11 +64,6 @@ class ModbusRTUTool(QMainWindow):
         # 初始化寄存器表
         self.init_register_table()
 
-        # 定时器用于处理串口接收
-        self.receive_timer = QTimer(self)
-        self.receive_timer.timeout.connect(self.read_serial_data)
-        self.receive_timer.start(100)  # 每100ms检查一次串口数据
-
     def init_ui(self):
         main_widget = QWidget()
         main_layout = QVBoxLayout()
@@ -53,17 +89,23 @@ class ModbusRTUTool(QMainWindow):
         self.parity_combo.addItems(["无", "奇校验", "偶校验"])
         self.parity_combo.setCurrentText("无")
 
+        self.low_latency_check = QCheckBox("低延迟模式 (Linux)")
+
         self.connect_btn = QPushButton("连接")
         self.connect_btn.clicked.connect(self.toggle_connection)
         self.scan_btn = QPushButton("扫描端口")
         self.scan_btn.clicked.connect(self.scan_serial_ports)
+        self.autodetect_btn = QPushButton("自动检测参数")
+        self.autodetect_btn.clicked.connect(self.auto_detect_settings)
 
         config_layout.addRow("端口:", self.port_combo)
         config_layout.addRow("波特率:", self.baud_combo)
         config_layout.addRow("数据位:", self.data_bits_combo)
         config_layout.addRow("停止位:", self.stop_bits_combo)
         config_layout.addRow("校验位:", self.parity_combo)
+        config_layout.addRow("", self.low_latency_check)
         config_layout.addRow(self.scan_btn, self.connect_btn)
+        config_layout.addRow("", self.autodetect_btn)
 
         config_group.setLayout(config_layout)
         main_layout.addWidget(config_group)
@@ -100,6 +142,11 @@ class ModbusRTUTool(QMainWindow):
         self.read_type_combo = QComboBox()
         self.read_type_combo.addItems(["长整型 (LONG)", "浮点型 (FLOAT)"])
 
+        # 字节序同时用于读取和写入
+        self.byte_order_combo = QComboBox()
+        for byte_order in BYTE_ORDERS:
+            self.byte_order_combo.addItem(byte_order, byte_order)
+
         read_btn = QPushButton("读取数据")
         read_btn.clicked.connect(self.read_data)
 
@@ -109,6 +156,8 @@ class ModbusRTUTool(QMainWindow):
         read_layout.addWidget(self.read_count)
         read_layout.addWidget(QLabel("数据类型:"))
         read_layout.addWidget(self.read_type_combo)
+        read_layout.addWidget(QLabel("字节序:"))
+        read_layout.addWidget(self.byte_order_combo)
         read_layout.addWidget(read_btn)
         read_layout.addStretch()
         read_group.setLayout(read_layout)
@@ -130,6 +179,22 @@ class ModbusRTUTool(QMainWindow):
         write_btn = QPushButton("写入数据")
         write_btn.clicked.connect(self.write_data)
 
+        # 清零/去皮命令寄存器地址由用户按说明书设置并保存，核对后才允许广播
+        self.zero_command_combo = QComboBox()
+        for key, command in DY500_ZERO_COMMANDS.items():
+            self.zero_command_combo.addItem(command.name, key)
+        self.zero_command_combo.currentIndexChanged.connect(self.load_zero_command)
+        self.zero_register_spin = QSpinBox()
+        self.zero_register_spin.setRange(40000, 49999)
+        self.zero_verify_spin = QSpinBox()
+        self.zero_verify_spin.setRange(40000, 49999)
+        self.zero_verified_check = QCheckBox("命令地址已按说明书核对")
+        self.zero_verified_check.toggled.connect(self.update_zero_broadcast)
+        self.zero_slaves_edit = QLineEdit("1")
+        self.zero_slaves_edit.setPlaceholderText("核对的从站，如 1-30,32")
+        self.zero_broadcast_check = QCheckBox("广播 (线路上所有仪表)")
+        self.load_zero_command()
+
         zero_btn = QPushButton("清零操作")
         zero_btn.clicked.connect(self.zero_operation)
 
@@ -140,6 +205,15 @@ class ModbusRTUTool(QMainWindow):
         write_layout.addWidget(QLabel("数据类型:"))
         write_layout.addWidget(self.write_type_combo)
         write_layout.addWidget(write_btn)
+        write_layout.addWidget(QLabel("清零/去皮 从站:"))
+        write_layout.addWidget(self.zero_slaves_edit)
+        write_layout.addWidget(self.zero_command_combo)
+        write_layout.addWidget(QLabel("命令地址:"))
+        write_layout.addWidget(self.zero_register_spin)
+        write_layout.addWidget(QLabel("核对测量值地址 (按读取的数据类型和字节序解码):"))
+        write_layout.addWidget(self.zero_verify_spin)
+        write_layout.addWidget(self.zero_verified_check)
+        write_layout.addWidget(self.zero_broadcast_check)
         write_layout.addWidget(zero_btn)
         write_layout.addStretch()
         write_group.setLayout(write_layout)
@@ -161,13 +235,44 @@ class ModbusRTUTool(QMainWindow):
         self.active_text = QTextEdit()
         self.active_text.setReadOnly(True)
         self.active_text.setPlaceholderText("主动发送模式数据将显示在这里...")
+        self.active_text.document().setMaximumBlockCount(TEXT_MAX_BLOCKS)
+
+        self.active_stats_label = QLabel("样本数: 0")
 
         clear_btn = QPushButton("清空显示")
         clear_btn.clicked.connect(lambda: self.active_text.clear())
 
+        self.record_btn = QPushButton("开始记录")
+        self.record_btn.clicked.connect(self.toggle_export)
+
+        # 仪表静止时数值不变，只显示和记录超出死区的变化
+        self.change_filter_check = QCheckBox("仅输出变化")
+        self.change_filter_check.toggled.connect(self.update_change_filter)
+        self.deadband_mode_combo = QComboBox()
+        self.deadband_mode_combo.addItem("死区(数值)", DEADBAND_ABSOLUTE)
+        self.deadband_mode_combo.addItem("死区(%)", DEADBAND_PERCENT)
+        self.deadband_mode_combo.currentIndexChanged.connect(self.update_change_filter)
+        self.deadband_edit = QLineEdit("0")
+        self.deadband_edit.setMaximumWidth(70)
+        self.deadband_edit.editingFinished.connect(self.update_change_filter)
+        self.heartbeat_edit = QLineEdit("60")
+        self.heartbeat_edit.setMaximumWidth(60)
+        self.heartbeat_edit.editingFinished.connect(self.update_change_filter)
+
+        active_button_layout = QHBoxLayout()
+        active_button_layout.addWidget(self.change_filter_check)
+        active_button_layout.addWidget(self.deadband_mode_combo)
+        active_button_layout.addWidget(self.deadband_edit)
+        active_button_layout.addWidget(QLabel("心跳(秒):"))
+        active_button_layout.addWidget(self.heartbeat_edit)
+        active_button_layout.addStretch(1)
+        active_button_layout.addWidget(self.record_btn)
+        active_button_layout.addWidget(clear_btn)
+
         active_layout.addWidget(QLabel("仪表主动发送数据:"))
         active_layout.addWidget(self.active_text)
-        active_layout.addWidget(clear_btn)
+        active_layout.addWidget(self.active_stats_label)
+        active_layout.addLayout(active_button_layout)
         active_tab.setLayout(active_layout)
 
         # 数据监控选项卡
@@ -177,6 +282,8 @@ class ModbusRTUTool(QMainWindow):
         self.monitor_text = QTextEdit()
         self.monitor_text.setReadOnly(True)
         self.monitor_text.setPlaceholderText("串口通信数据将显示在这里...")
+        # 每次接收都追加一行十六进制，不限制时内存和重排开销随运行时间增长
+        self.monitor_text.document().setMaximumBlockCount(TEXT_MAX_BLOCKS)
 
         monitor_layout.addWidget(QLabel("串口通信监控:"))
         monitor_layout.addWidget(self.monitor_text)
@@ -225,10 +332,53 @@ class ModbusRTUTool(QMainWindow):
         else:
             self.status_label.setText("未找到可用串口")
 
+    def auto_detect_settings(self):
+        """探测设备ID 1 的波特率、校验位和停止位，结果按适配器序列号缓存"""
+        if self.serial_port and self.serial_port.is_open:
+            QMessageBox.warning(self, "错误", "请先断开串口再自动检测")
+            return
+        port = self.port_combo.currentText()
+        if not port:
+            QMessageBox.warning(self, "错误", "请选择串口")
+            return
+
+        def show_progress(baudrate, parity, stopbits, slave):
+            self.status_label.setText(f"正在检测 {port}: {baudrate} 8{parity}{stopbits}")
+            QApplication.processEvents()
+
+        self.autodetect_btn.setEnabled(False)
+        try:
+            with serial.Serial(port) as detect_port:
+                settings = detect_line(detect_port, slaves=(1,), progress=show_progress)
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"自动检测失败: {str(e)}")
+            self.status_label.setText("自动检测失败")
+            return
+        finally:
+            self.autodetect_btn.setEnabled(True)
+
+        if settings is None:
+            self.status_label.setText(f"{port} 未检测到仪表")
+            return
+        if self.baud_combo.findText(str(settings.baudrate)) < 0:
+            self.baud_combo.addItem(str(settings.baudrate))
+        self.baud_combo.setCurrentText(str(settings.baudrate))
+        self.data_bits_combo.setCurrentText("8")
+        self.parity_combo.setCurrentText({"N": "无", "O": "奇校验", "E": "偶校验"}[settings.parity])
+        self.stop_bits_combo.setCurrentText(str(settings.stopbits))
+        self.status_label.setText(f"检测到: {settings.text()}")
+        self.monitor_text.append(f"自动检测 {port}: {settings.text()}")
+
     def toggle_connection(self):
         """连接/断开串口"""
-        if self.serial_port and self.serial_port.is_open:
-            self.serial_port.close()
+        if (self.serial_port and self.serial_port.is_open) or self.port_watcher is not None:
+            # 等待重新插入时点击“断开”也停止监视
+            self.port_watch_timer.stop()
+            self.port_watcher = None
+            self.stop_receiver()
+            if self.serial_port:
+                self.low_latency_profile.restore(self.serial_port)
+                self.serial_port.close()
             self.serial_port = None
             self.connect_btn.setText("连接")
             self.status_label.setText("串口已断开")
@@ -258,14 +408,16 @@ class ModbusRTUTool(QMainWindow):
                 else:
                     parity = serial.PARITY_EVEN
 
-                self.serial_port = serial.Serial(
-                    port=port,
-                    baudrate=baud,
-                    bytesize=data_bits,
-                    parity=parity,
-                    stopbits=stop_bits,
-                    timeout=0.1
-                )
+                self.serial_settings = {'baudrate': baud, 'bytesize': data_bits, 'parity': parity,
+                                        'stopbits': stop_bits}
+                self.serial_port = serial.Serial(port=port, timeout=0.1, **self.serial_settings)
+                if self.low_latency_check.isChecked():
+                    for name, text in self.low_latency_profile.apply(self.serial_port).items():
+                        self.monitor_text.append(f"低延迟模式 {name}: {text}")
+
+                self.start_receiver()
+                self.port_watcher = PortWatcher(port)
+                self.port_watch_timer.start(PORT_WATCH_INTERVAL)
 
                 self.connect_btn.setText("断开")
                 self.status_label.setText(f"已连接 {port} @ {baud} bps")
@@ -273,33 +425,225 @@ class ModbusRTUTool(QMainWindow):
                 QMessageBox.critical(self, "连接错误", f"无法打开串口: {str(e)}")
                 self.status_label.setText("连接失败")
 
-    def read_serial_data(self):
-        """读取串口数据"""
-        if self.serial_port and self.serial_port.is_open:
+    def start_receiver(self):
+        # 串口数据到达即触发处理，不再定时轮询
+        self.receiver = SerialReceiver(self.serial_port, self)
+        self.receiver.data_received.connect(self.read_serial_data)
+        self.receiver.error.connect(self.on_receiver_error)
+        self.receiver.start()
+
+    def stop_receiver(self):
+        if self.receiver is not None:
+            self.receiver.stop()
+            self.receiver.deleteLater()
+            self.receiver = None
+
+    def on_receiver_error(self, message):
+        """接收出错 (如USB转485拔出)，关闭串口，等待适配器重新插入"""
+        self.stop_receiver()
+        port = None
+        if self.serial_port:
+            port = self.serial_port.port
             try:
-                data = self.serial_port.read_all()
-                if data:
-                    # 在通信监控中显示数据
-                    hex_data = binascii.hexlify(data).decode('utf-8')
-
-                    # 修复括号不匹配问题
-                    formatted_hex = ' '.join([hex_data[i:i + 2] for i in range(0, len(hex_data), 2)])
-
-                    self.monitor_text.append(f"接收: {formatted_hex}")
-
-                    # 根据当前模式处理数据
-                    if self.tabs.currentIndex() == 1:  # 主动发送模式
-                        try:
-                            ascii_data = data.decode('ascii')
-                            self.active_text.append(ascii_data)
-                        except:
-                            pass
-                    else:  # Modbus RTU模式
-                        self.process_modbus_response(data)
-            except Exception as e:
-                self.status_label.setText(f"读取错误: {str(e)}")
+                self.serial_port.close()
+            except Exception:
+                pass
+            self.serial_port = None
+        self.rtu_buffer.clear()
+        self.pending_timing = None
+        if self.port_watcher is None:
+            self.connect_btn.setText("连接")
+            self.status_label.setText(f"读取错误: {message}")
+            return
+        self.port_watcher.mark_removed()
+        self.status_label.setText(f"串口 {port} 已断开，等待重新插入: {message}")
+        self.monitor_text.append(f"串口 {port} 已断开: {message}")
+
+    def check_port(self):
+        event = self.port_watcher.check() if self.port_watcher is not None else None
+        if event == PORT_REMOVED and self.serial_port is not None:
+            self.on_receiver_error("设备已拔出")
+        elif event == PORT_RESTORED and self.serial_port is None:
+            self.reopen_serial()
+
+    def reopen_serial(self):
+        """适配器重新插入后按原参数打开 (设备名可能已变化)，恢复接收并记录间断时长"""
+        device = self.port_watcher.device
+        try:
+            self.serial_port = serial.Serial(port=device, timeout=0.1, **self.serial_settings)
+        except Exception as e:
+            # udev 可能还没设置好权限，下一次检查时重试
+            self.serial_port = None
+            self.status_label.setText(f"串口 {device} 重新打开失败，稍后重试: {str(e)}")
+            return
+        if self.low_latency_check.isChecked():
+            self.low_latency_profile.apply(self.serial_port)
+        self.start_receiver()
+        gap_ns = self.port_watcher.mark_restored()
+        if self.port_combo.findText(device) < 0:
+            self.port_combo.addItem(device)
+        self.port_combo.setCurrentText(device)
+        message = f"串口 {device} 已重新连接，中断 {gap_ns / 1e9:.1f} 秒"
+        self.status_label.setText(message)
+        self.monitor_text.append(message)
+
+    def read_serial_data(self, data, receive_ns):
+        """
+        处理收到的串口数据 (由 SerialReceiver 在数据到达时触发)
+        :param data: 收到的字节
+        :param receive_ns: 到达时间 (time.monotonic_ns)
+        """
+        try:
+            # 在通信监控中显示数据
+            hex_data = binascii.hexlify(data).decode('utf-8')
+
+            # 修复括号不匹配问题
+            formatted_hex = ' '.join([hex_data[i:i + 2] for i in range(0, len(hex_data), 2)])
+
+            self.monitor_text.append(f"接收: {formatted_hex}")
 
-    def process_modbus_response(self, data):
+            # 根据当前模式处理数据
+            if self.tabs.currentIndex() == 1:  # 主动发送模式
+                self.process_active_data(data, receive_ns)
+            else:  # Modbus RTU模式
+                self.process_rtu_data(data, receive_ns)
+        except Exception as e:
+            self.status_label.setText(f"读取错误: {str(e)}")
+
+    def process_rtu_data(self, data, receive_ns):
+        """拼接Modbus响应，按 (地址, 功能码, 长度, CRC) 定位帧边界，帧前面的噪声直接丢弃"""
+        if self.pending_timing is not None and self.pending_timing[1].first_byte_ns is None:
+            self.pending_timing[1].first_byte_ns = receive_ns
+        buffer = self.rtu_buffer
+        buffer.extend(data)
+        while buffer:
+            start, length = find_frame(buffer)
+            if length is None and len(buffer) - start > 256:
+                # 等待中的帧头超过最大帧长仍不完整，说明是噪声
+                start += 1
+            if start:
+                del buffer[:start]
+            if length is None:
+                if len(buffer) > 256:
+                    continue
+                return
+            frame = bytes(buffer[:length])
+            del buffer[:length]
+            timing = self.complete_pending_timing(receive_ns)
+            self.process_modbus_response(frame, timing)
+
+    def start_pending_timing(self, device_id, track=True):
+        """记录请求发送时间，上一个未收到响应的请求按超时统计"""
+        if self.pending_timing is not None:
+            self.timing_stats.record(*self.pending_timing)
+        self.pending_timing = (device_id, TransactionTiming(send_ns=time.monotonic_ns())) if track else None
+
+    def complete_pending_timing(self, receive_ns):
+        """记录当前请求的响应完成时间"""
+        if self.pending_timing is None:
+            return None
+        device_id, timing = self.pending_timing
+        self.pending_timing = None
+        if timing.first_byte_ns is None:
+            timing.first_byte_ns = receive_ns
+        timing.complete_ns = receive_ns
+        self.timing_stats.record(device_id, timing)
+        return timing
+
+    def process_active_data(self, data, receive_ns):
+        """解析主动发送的数据流，跨数据块的行会拼接后再解析"""
+        samples = self.active_parser.feed(data, receive_ns)
+        if not samples:
+            return
+        slave, register = ACTIVE_SEND_KEY
+        batch = SampleBatch()
+        lines = []
+        for timestamp, value, line in samples:
+            status = self.sample_status(slave, register, timestamp, value, STATUS_ACTIVE_SEND)
+            if not status & STATUS_SUPPRESSED:
+                lines.append(line)
+            batch.append(slave, register, timestamp, value, status, complete_ns=receive_ns)
+        self.deliver_batch(batch)
+        # 一次性追加整块数据，避免逐行刷新界面
+        if lines:
+            self.active_text.append("\n".join(lines))
+        self.update_active_stats()
+
+    def update_active_stats(self):
+        """刷新主动发送模式的统计信息"""
+        stats = self.channel_stats.channels.get(ACTIVE_SEND_KEY)
+        if not stats:
+            return
+        rolling = stats[0]
+        summary = rolling.summary()
+        parser = self.active_parser
+        text = (f"样本数: {parser.lines - parser.bad_lines}  无效行: {parser.bad_lines}  "
+                f"最近{rolling.window_seconds:g}秒 最小: {summary['min']:.4f}  最大: {summary['max']:.4f}  "
+                f"平均: {summary['mean']:.4f}  标准差: {summary['std']:.4f}")
+        if self.change_filter is not None:
+            text += f"  已过滤: {self.change_filter.reduction:.1%}"
+        self.active_stats_label.setText(text)
+
+    def sample_status(self, slave, register, timestamp_ns, value, status=STATUS_OK):
+        """
+        :return: 样本状态标志，未超出死区时加上 STATUS_SUPPRESSED
+        """
+        if self.change_filter is not None and not self.change_filter.accept(slave, register, timestamp_ns, value):
+            status |= STATUS_SUPPRESSED
+        return status
+
+    def deliver_batch(self, batch):
+        """将一批解析后的样本送入缓存、统计和记录 (缓存和统计使用全部样本，记录不含被死区过滤的样本)"""
+        buffers = self.sample_buffers
+        for slave, register, timestamp_ns, value in zip(batch.slaves, batch.registers, batch.timestamps,
+                                                        batch.values):
+            buffer = buffers.get((slave, register))
+            if buffer is None:
+                buffer = buffers[(slave, register)] = RingBuffer(SAMPLE_BUFFER_CAPACITY)
+            buffer.append(timestamp_ns, value)
+        self.channel_stats.add_batch(batch)
+        if self.exporter is not None:
+            self.exporter.submit(batch if self.change_filter is None else batch.select(STATUS_SUPPRESSED))
+
+    def update_change_filter(self, *args):
+        """根据界面设置更新变化过滤"""
+        if not self.change_filter_check.isChecked():
+            self.change_filter = None
+            return
+        try:
+            deadband = float(self.deadband_edit.text() or 0)
+            heartbeat = float(self.heartbeat_edit.text()) if self.heartbeat_edit.text() else None
+        except ValueError:
+            QMessageBox.warning(self, "错误", "无效的死区或心跳设置")
+            return
+        rule = DeadbandRule(self.deadband_mode_combo.currentData(), deadband, heartbeat or None)
+        if self.change_filter is None:
+            self.change_filter = ChangeFilter(rule)
+        else:
+            self.change_filter.default = rule
+
+    def toggle_export(self):
+        """开始/停止记录样本到文件"""
+        if self.exporter is not None:
+            exporter = self.exporter
+            self.exporter = None
+            exporter.close()
+            self.record_btn.setText("开始记录")
+            self.status_label.setText(f"记录已停止: 写入 {exporter.written} 条, 丢弃 {exporter.dropped} 条")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "记录数据", "采集数据.csv",
+                                              "CSV文件 (*.csv);;Parquet文件 (*.parquet)")
+        if not path:
+            return
+        try:
+            self.exporter = StreamExporter(path)
+        except (OSError, RuntimeError) as e:
+            QMessageBox.critical(self, "记录错误", f"无法创建记录文件: {str(e)}")
+            return
+        self.record_btn.setText("停止记录")
+        self.status_label.setText(f"正在记录到 {path}")
+
+    def process_modbus_response(self, data, timing=None):
         """处理Modbus响应"""
         if len(data) < 5:
             return
@@ -313,22 +657,26 @@ class ModbusRTUTool(QMainWindow):
             data_len = data[2]
             # 寄存器数据
             reg_data = data[3:3 + data_len]
+            batch = SampleBatch()
+            byte_order = self.byte_order_combo.currentData()
+            long_codec = get_codec(TYPE_LONG, byte_order)
+            float_codec = get_codec(TYPE_FLOAT, byte_order)
 
             # 每4个字节解析为一个32位值
             for i in range(0, len(reg_data), 4):
                 if i + 4 > len(reg_data):
                     break
 
-                # 高位在前，低位在后
+                # 按所选字节序解码
                 value_bytes = reg_data[i:i + 4]
 
                 # 解析为长整型和浮点型
                 try:
                     # 长整型
-                    long_value = struct.unpack('>i', value_bytes)[0]
+                    long_value = long_codec.unpack_from(value_bytes)
 
                     # 浮点型
-                    float_value = struct.unpack('>f', value_bytes)[0]
+                    float_value = float_codec.unpack_from(value_bytes)
 
                     # 更新表格 (简化处理，实际应用中需要根据地址更新)
                     row = i // 4
@@ -336,9 +684,20 @@ class ModbusRTUTool(QMainWindow):
                         self.register_table.setItem(row, 1, QTableWidgetItem(hex(struct.unpack('>I', value_bytes)[0])))
                         self.register_table.setItem(row, 2, QTableWidgetItem(str(long_value)))
                         self.register_table.setItem(row, 3, QTableWidgetItem(f"{float_value:.6f}"))
+
+                    # 与主动发送模式共用缓存和统计
+                    if self.last_read_address is not None:
+                        value = float_value if self.read_type_combo.currentIndex() == 1 else long_value
+                        timestamp = timing.send_ns if timing is not None else time.monotonic_ns()
+                        register = self.last_read_address - 40000 + row * 2
+                        status = self.sample_status(data[0], register, timestamp, value)
+                        batch.append(data[0], register, timestamp, value, status,
+                                     None if timing is None else timing.first_byte_ns,
+                                     None if timing is None else timing.complete_ns)
                 except:
                     pass
-            self.status_label.setText("数据读取成功")
+            self.deliver_batch(batch)
+            self.status_label.setText(f"数据读取成功  {self.timing_stats.summary_text(data[0])}")
 
         # 10功能码响应处理
         elif func_code == 0x10:
@@ -374,6 +733,9 @@ class ModbusRTUTool(QMainWindow):
 
         # 发送命令
         try:
+            self.start_pending_timing(device_id)
+            self.last_read_address = address
+            self.rtu_buffer.clear()
             self.serial_port.write(cmd)
 
             # 在通信监控中显示发送的数据
@@ -408,10 +770,11 @@ class ModbusRTUTool(QMainWindow):
         reg_address = address - 40000
 
         # 根据数据类型转换
+        byte_order = self.byte_order_combo.currentData()
         if self.write_type_combo.currentIndex() == 0:  # 长整型
-            value_bytes = struct.pack('>i', int(value))
+            value_bytes = get_codec(TYPE_LONG, byte_order).pack(int(value))
         else:  # 浮点型
-            value_bytes = struct.pack('>f', value)
+            value_bytes = get_codec(TYPE_FLOAT, byte_order).pack(value)
 
         # 构建命令
         cmd = bytearray()
@@ -431,6 +794,8 @@ class ModbusRTUTool(QMainWindow):
 
         # 发送命令
         try:
+            self.start_pending_timing(device_id, track=False)
+            self.rtu_buffer.clear()
             self.serial_port.write(cmd)
 
             # 在通信监控中显示发送的数据
@@ -445,16 +810,81 @@ class ModbusRTUTool(QMainWindow):
         except Exception as e:
             self.status_label.setText(f"发送错误: {str(e)}")
 
+    def load_zero_command(self):
+        """显示所选命令保存过的寄存器地址"""
+        command = self.zero_store.get(self.zero_command_combo.currentData())
+        self.zero_register_spin.setValue(40000 + command.register)
+        self.zero_verify_spin.setValue(40000 + command.verify_register)
+        self.zero_verified_check.setChecked(command.verified)
+        self.update_zero_broadcast()
+
+    def update_zero_broadcast(self):
+        verified = self.zero_verified_check.isChecked()
+        self.zero_broadcast_check.setEnabled(verified)
+        if not verified:
+            self.zero_broadcast_check.setChecked(False)
+
+    def current_zero_command(self):
+        """按界面设置生成命令并保存地址；测量值按读取区域的数据类型和字节序解码"""
+        key = self.zero_command_combo.currentData()
+        command = self.zero_store.get(key).replace(
+            register=self.zero_register_spin.value() - 40000,
+            verify_register=self.zero_verify_spin.value() - 40000,
+            verified=self.zero_verified_check.isChecked(),
+            data_type=TYPE_LONG if self.read_type_combo.currentIndex() == 0 else TYPE_FLOAT,
+            byte_order=self.byte_order_combo.currentData())
+        try:
+            self.zero_store.put(key, command)
+        except OSError as e:
+            self.monitor_text.append(f"保存{command.name}设置失败: {e}")
+        return command
+
     def zero_operation(self):
-        """清零操作"""
+        """清零/去皮：按命令寄存器表写入 (可广播)，再逐个读回测量值核对"""
         if not self.serial_port or not self.serial_port.is_open:
             QMessageBox.warning(self, "错误", "请先连接串口")
             return
-
-        # 在实际应用中，清零操作需要写入特定的值到特定的地址
-        # 这里只是一个示例
-        QMessageBox.information(self, "清零操作", "清零操作已执行")
-        self.status_label.setText("清零操作已执行")
+        try:
+            slaves = parse_slaves(self.zero_slaves_edit.text())
+        except ValueError as e:
+            QMessageBox.warning(self, "错误", f"从站列表无效: {e}")
+            return
+        if not slaves:
+            QMessageBox.warning(self, "错误", "请输入需要核对的从站")
+            return
+        command = self.current_zero_command()
+        broadcast = command.verified and self.zero_broadcast_check.isChecked()
+
+        # 核对读取是同步事务，期间暂停事件驱动接收
+        self.stop_receiver()
+        self.start_pending_timing(0, track=False)
+        self.rtu_buffer.clear()
+        port = self.serial_port
+        timeout = port.timeout
+        port.timeout = 0.1
+        try:
+            values, elapsed = zero_meters(port, command, slaves, broadcast)
+        except Exception as e:
+            self.status_label.setText(f"{command.name}错误: {str(e)}")
+            return
+        finally:
+            port.timeout = timeout
+            self.start_receiver()
+
+        failed = []
+        for slave, value in values.items():
+            ok = command.check(value)
+            if not ok:
+                failed.append(slave)
+            text = "读取失败" if value is None else f"{value:g}"
+            self.monitor_text.append(f"{command.name} 从站{slave}: {'成功' if ok else '失败'} 测量值 {text}")
+        mode = "广播" if broadcast else "逐个写入"
+        summary = f"{command.name}({mode}) {len(slaves)} 台，失败 {len(failed)} 台，耗时 {elapsed * 1000:.1f} ms"
+        self.status_label.setText(summary)
+        if failed:
+            QMessageBox.warning(self, command.name, f"{summary}\n未通过核对的从站: {', '.join(map(str, failed))}")
+        else:
+            QMessageBox.information(self, command.name, summary)
 
     def calculate_crc(self, data):
         """计算Modbus CRC16校验码"""
@@ -471,7 +901,11 @@ class ModbusRTUTool(QMainWindow):
 
     def closeEvent(self, event):
         """关闭窗口时关闭串口"""
+        if self.exporter is not None:
+            self.toggle_export()
+        self.stop_receiver()
         if self.serial_port and self.serial_port.is_open:
+            self.low_latency_profile.restore(self.serial_port)
             self.serial_port.close()
         event.accept()
 
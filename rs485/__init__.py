@@ -0,0 +1,4 @@
+"""
+RS-485 / Modbus-RTU 仪表通信公共模块
+供 D505-CH4、DY500 等各工具脚本共用
+"""
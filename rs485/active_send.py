@@ -0,0 +1,53 @@
+import re
+
+# 一行中的第一个数值，允许符号与数字之间有空格 (如 "ST,GS,+ 0012.34kg")
+NUMBER_PATTERN = re.compile(rb'([-+]?)\s*(\d+(?:\.\d*)?|\.\d+)')
+LINE_SPLIT = re.compile(rb'\r\n|\r|\n')
+
+
+class ActiveSendParser:
+    def __init__(self, max_line=256):
+        """
+        主动发送模式的增量解析器：按行分帧并提取数值
+        跨数据块被截断的行会保留到下一块数据到来时再解析
+        :param max_line: 单行最大字节数，超过则视为噪声丢弃
+        """
+        self.max_line = max_line
+        self._pending = b''
+        self.lines = 0
+        self.bad_lines = 0
+        self.overflows = 0
+
+    def feed(self, data, timestamp_ns):
+        """
+        输入一块串口数据
+        :param data: 收到的字节
+        :param timestamp_ns: 数据到达时间 (time.monotonic_ns)
+        :return: [(时间戳, 数值, 原始行文本)]
+        """
+        parts = LINE_SPLIT.split(self._pending + data)
+        # 最后一段没有行结束符，留待下次拼接
+        self._pending = parts.pop()
+        if len(self._pending) > self.max_line:
+            self._pending = b''
+            self.overflows += 1
+
+        samples = []
+        search = NUMBER_PATTERN.search
+        for line in parts:
+            if not line:
+                continue
+            self.lines += 1
+            match = search(line)
+            if match is None:
+                self.bad_lines += 1
+                continue
+            value = float(match.group(1) + match.group(2))
+            samples.append((timestamp_ns, value, line.decode('ascii', 'replace')))
+        return samples
+
+    def reset(self):
+        self._pending = b''
+        self.lines = 0
+        self.bad_lines = 0
+        self.overflows = 0
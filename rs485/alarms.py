@@ -0,0 +1,241 @@
+import csv
+import time
+import threading
+from collections import deque
+
+from rs485.codec import ORDER_ABCD, TYPE_FLOAT, get_codec
+
+# 报警规则类型
+ALARM_HIGH = 'high'  # 上限
+ALARM_LOW = 'low'  # 下限
+ALARM_RATE = 'rate'  # 变化率 (单位/秒，取绝对值)
+ALARM_DEVICE = 'device'  # 仪表报警寄存器与期望值不一致
+ALARM_KINDS = (ALARM_HIGH, ALARM_LOW, ALARM_RATE)
+
+ALARM_EVENT_FIELDS = ('timestamp_ns', 'slave', 'register', 'name', 'kind', 'active', 'value')
+
+
+class AlarmRule:
+    def __init__(self, name, kind, threshold, hysteresis=0.0, window=1.0):
+        """
+        :param name: 报警名称 (如 "AL1")
+        :param kind: ALARM_HIGH / ALARM_LOW / ALARM_RATE
+        :param threshold: 阈值，变化率规则为 单位/秒
+        :param hysteresis: 回差，数值回到 阈值∓回差 之内才解除报警，避免在阈值附近反复跳变
+        :param window: 变化率规则的计算窗口 (秒)
+        """
+        if kind not in ALARM_KINDS:
+            raise ValueError(f"不支持的报警类型: {kind}")
+        self.name = name
+        self.kind = kind
+        self.threshold = threshold
+        self.hysteresis = abs(hysteresis)
+        self.window_ns = int(window * 1e9)
+
+
+class _RuleState:
+    __slots__ = ('rule', 'active', 'history')
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.active = False
+        self.history = deque() if rule.kind == ALARM_RATE else None
+
+    def check(self, timestamp_ns, value):
+        """
+        :return: 本次判定后报警是否有效，以及参与判定的数值 (变化率规则为变化率)
+        """
+        rule = self.rule
+        if rule.kind == ALARM_RATE:
+            history = self.history
+            history.append((timestamp_ns, value))
+            limit = timestamp_ns - rule.window_ns
+            while len(history) > 2 and history[1][0] <= limit:
+                history.popleft()
+            first_ns, first_value = history[0]
+            if timestamp_ns <= first_ns:
+                return self.active, 0.0
+            value = abs(value - first_value) * 1e9 / (timestamp_ns - first_ns)
+        if rule.kind == ALARM_LOW:
+            if self.active:
+                return value <= rule.threshold + rule.hysteresis, value
+            return value <= rule.threshold, value
+        if self.active:
+            return value >= rule.threshold - rule.hysteresis, value
+        return value >= rule.threshold, value
+
+
+class AlarmEvent:
+    __slots__ = ALARM_EVENT_FIELDS
+
+    def __init__(self, timestamp_ns, slave, register, name, kind, active, value):
+        self.timestamp_ns = timestamp_ns
+        self.slave = slave
+        self.register = register
+        self.name = name
+        self.kind = kind
+        self.active = active
+        self.value = value
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in ALARM_EVENT_FIELDS}
+
+    def text(self):
+        state = "报警" if self.active else "解除"
+        return f"[{state}] {self.name} 从站{self.slave} 地址{self.register} {self.kind} 数值{self.value:g}"
+
+
+class _DeviceCheck:
+    __slots__ = ('name', 'expected', 'tolerance', 'codec', 'scale', 'interval_ns', 'next_ns', 'active')
+
+    def __init__(self, name, expected, tolerance, interval, codec, scale):
+        self.name = name
+        self.expected = expected
+        self.tolerance = tolerance
+        self.codec = codec
+        self.scale = scale
+        self.interval_ns = int(interval * 1e9)
+        self.next_ns = 0
+        self.active = False
+
+
+class AlarmEngine:
+    def __init__(self):
+        """
+        在采集到的数据上本地判定报警，不增加总线读取
+        仪表内的报警设定寄存器只按较慢的周期核对一次 (由调用方以报警优先级读取后交给 verify_device)
+        报警事件在判定的同一调用中同步通知所有监听者
+        """
+        self._rules = {}  # {(从站, 地址): [_RuleState]}
+        self._device_checks = {}  # {(从站, 地址): _DeviceCheck}
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_rule(self, slave, register, rule):
+        with self._lock:
+            self._rules.setdefault((slave, register), []).append(_RuleState(rule))
+
+    def remove_rules(self, slave, register, name=None):
+        with self._lock:
+            states = self._rules.get((slave, register), [])
+            states[:] = [state for state in states if name is not None and state.rule.name != name]
+            if not states:
+                self._rules.pop((slave, register), None)
+
+    def rules(self):
+        """:return: [(从站, 地址, AlarmRule, 是否报警中)]"""
+        with self._lock:
+            return [(slave, register, state.rule, state.active)
+                    for (slave, register), states in sorted(self._rules.items()) for state in states]
+
+    def add_listener(self, callback):
+        """callback(AlarmEvent)"""
+        self._listeners.append(callback)
+
+    def _emit(self, events):
+        for event in events:
+            for callback in self._listeners:
+                callback(event)
+
+    def evaluate(self, slave, register, timestamp_ns, value):
+        """
+        判定一个采样值，没有规则的寄存器直接返回
+        :return: 本次产生的报警事件列表 (报警或解除)
+        """
+        states = self._rules.get((slave, register))
+        if not states:
+            return []
+        events = []
+        with self._lock:
+            for state in states:
+                active, checked_value = state.check(timestamp_ns, value)
+                if active != state.active:
+                    state.active = active
+                    rule = state.rule
+                    events.append(AlarmEvent(timestamp_ns, slave, register, rule.name, rule.kind, active,
+                                             checked_value))
+        self._emit(events)
+        return events
+
+    def add_device_check(self, slave, register, expected, name=None, interval=60.0, tolerance=1e-6,
+                         data_type=TYPE_FLOAT, byte_order=ORDER_ABCD, scale=1.0):
+        """
+        定期核对仪表内的报警设定值
+        :param expected: 期望值 (如写入的AL1报警值，按 scale 缩放后的工程值)
+        :param interval: 核对周期 (秒)
+        :param data_type: 报警寄存器的数据类型，与轮询的数据类型无关
+        :param byte_order: 报警寄存器的字节序
+        :param scale: 读到的原始值乘以该系数后与 expected 比较
+        """
+        codec = get_codec(data_type, byte_order)
+        with self._lock:
+            self._device_checks[(slave, register)] = _DeviceCheck(name or f"设备报警值{register}", expected,
+                                                                   tolerance, interval, codec, scale)
+
+    def due_device_checks(self, now_ns=None):
+        """:return: 到期需要读取核对的 [(从站, 地址, Codec, 缩放系数)]"""
+        now_ns = time.monotonic_ns() if now_ns is None else now_ns
+        with self._lock:
+            return [(slave, register, check.codec, check.scale)
+                    for (slave, register), check in self._device_checks.items() if check.next_ns <= now_ns]
+
+    def verify_device(self, slave, register, value, timestamp_ns=None):
+        """
+        提交读到的仪表报警寄存器值，读取失败时 value 传 None (稍后重试)
+        :return: 报警事件列表
+        """
+        timestamp_ns = time.monotonic_ns() if timestamp_ns is None else timestamp_ns
+        check = self._device_checks.get((slave, register))
+        if check is None:
+            return []
+        events = []
+        with self._lock:
+            if value is None:
+                check.next_ns = timestamp_ns + min(check.interval_ns, 5 * 10 ** 9)
+                return []
+            check.next_ns = timestamp_ns + check.interval_ns
+            active = abs(value - check.expected) > check.tolerance
+            if active != check.active:
+                check.active = active
+                events.append(AlarmEvent(timestamp_ns, slave, register, check.name, ALARM_DEVICE, active, value))
+        self._emit(events)
+        return events
+
+    def active(self):
+        """:return: 报警中的 [(从站, 地址, 名称)]"""
+        with self._lock:
+            result = [(slave, register, state.rule.name)
+                      for (slave, register), states in self._rules.items() for state in states if state.active]
+            result += [(slave, register, check.name)
+                       for (slave, register), check in self._device_checks.items() if check.active]
+        return result
+
+    def reset(self):
+        with self._lock:
+            for states in self._rules.values():
+                for state in states:
+                    state.active = False
+                    if state.history is not None:
+                        state.history.clear()
+            for check in self._device_checks.values():
+                check.active = False
+                check.next_ns = 0
+
+
+class AlarmLog:
+    def __init__(self, path):
+        """报警事件日志 (CSV，每条事件立即写入)，可直接作为 AlarmEngine 的监听者"""
+        self._file = open(path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        if self._file.tell() == 0:
+            self._writer.writerow(ALARM_EVENT_FIELDS)
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            self._writer.writerow([getattr(event, field) for field in ALARM_EVENT_FIELDS])
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
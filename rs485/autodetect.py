@@ -0,0 +1,160 @@
+import sys
+import time
+
+from rs485.json_store import config_path, read_json, write_json
+from rs485.low_latency import rtu_timing
+from rs485.modbus_rtu import build_read_request
+from rs485.transport import find_frame
+
+# 按现场常见程度排列，先试的组合先命中
+DEFAULT_BAUDRATES = (9600, 19200, 115200, 38400, 57600, 4800)
+DEFAULT_FORMATS = (('N', 1), ('E', 1), ('O', 1), ('N', 2))  # (校验位, 停止位)
+DEFAULT_SLAVES = (1, 2, 3, 4, 5, 247)
+DEFAULT_CACHE_PATH = config_path("autodetect.json")
+
+
+class LineSettings:
+    __slots__ = ('baudrate', 'parity', 'stopbits', 'slave')
+
+    def __init__(self, baudrate, parity='N', stopbits=1, slave=1):
+        self.baudrate = baudrate
+        self.parity = parity
+        self.stopbits = stopbits
+        self.slave = slave
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in LineSettings.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['baudrate'], data.get('parity', 'N'), data.get('stopbits', 1), data.get('slave', 1))
+
+    def text(self):
+        return f"{self.baudrate} bps 8{self.parity}{self.stopbits} 从站{self.slave}"
+
+
+def probe_timeout(baudrate, parity='N', stopbits=1, turnaround=0.02):
+    """
+    单次探测的等待时间：请求8字节 + 读1个寄存器的响应7字节 + 两个帧间隔 + 仪表处理时间
+    按帧时间计算，不使用固定的1秒超时
+    """
+    char_time, _, t35 = rtu_timing(baudrate, 8, parity, stopbits)
+    return (8 + 7) * char_time + 2 * t35 + turnaround
+
+
+def probe(port, slave, address=0):
+    """
+    向一个从站发读1个寄存器的请求
+    :return: 是否收到该从站 CRC 正确的响应 (异常响应同样说明通讯参数和地址正确)
+    """
+    port.reset_input_buffer()
+    port.write(build_read_request(slave, address, 1))
+    data = port.read(7)
+    if not data:
+        return False
+    waiting = port.in_waiting
+    if waiting:
+        data += port.read(waiting)
+    return find_frame(data, slave, 0x03)[1] is not None
+
+
+def detect(port, slaves=DEFAULT_SLAVES, baudrates=DEFAULT_BAUDRATES, formats=DEFAULT_FORMATS, address=0,
+           turnaround=0.02, cached=None, progress=None):
+    """
+    依次切换波特率和校验方式探测候选从站，收到第一个 CRC 正确的响应即停止
+    :param port: 已打开的 serial.Serial，检测过程中会修改其波特率、校验位、停止位和超时
+    :param slaves: 候选从站地址
+    :param address: 探测读取的寄存器地址
+    :param turnaround: 仪表处理时间 (秒)
+    :param cached: 上次检测到的 LineSettings，最先尝试
+    :param progress: 回调 progress(波特率, 校验位, 停止位, 从站)，每次探测前调用
+    :return: LineSettings，全部组合都没有响应时返回 None
+    """
+    candidates = [(baudrate, parity, stopbits) for baudrate in baudrates for parity, stopbits in formats]
+    slaves = list(slaves)
+    if cached is not None:
+        first = (cached.baudrate, cached.parity, cached.stopbits)
+        candidates = [first] + [candidate for candidate in candidates if candidate != first]
+        slaves = [cached.slave] + [slave for slave in slaves if slave != cached.slave]
+    for baudrate, parity, stopbits in candidates:
+        port.baudrate = baudrate
+        port.parity = parity
+        port.stopbits = stopbits
+        port.timeout = probe_timeout(baudrate, parity, stopbits, turnaround)
+        for slave in slaves:
+            if progress is not None:
+                progress(baudrate, parity, stopbits, slave)
+            if probe(port, slave, address):
+                return LineSettings(baudrate, parity, stopbits, slave)
+    return None
+
+
+def adapter_serial(port_name):
+    """
+    :return: USB转485适配器的序列号，拿不到时用硬件ID或端口名代替
+    """
+    try:
+        from serial.tools import list_ports
+        for info in list_ports.comports():
+            if info.device == port_name:
+                return info.serial_number or info.hwid or port_name
+    except Exception:
+        pass
+    return port_name
+
+
+class DetectionCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        """按适配器序列号保存检测结果，同一根适配器换到其他端口号也能直接命中"""
+        self.path = path
+
+    def get(self, serial):
+        data = read_json(self.path).get(serial)
+        return None if data is None else LineSettings.from_dict(data)
+
+    def put(self, serial, settings):
+        data = read_json(self.path)
+        data[serial] = settings.as_dict()
+        write_json(self.path, data)
+
+
+def detect_line(port, cache=None, **kwargs):
+    """
+    先试缓存中的参数，再全面扫描，检测成功后更新缓存
+    :param port: 已打开的 serial.Serial
+    :param cache: DetectionCache，为 None 时使用默认缓存文件
+    :return: LineSettings 或 None
+    """
+    cache = DetectionCache() if cache is None else cache
+    serial_number = adapter_serial(port.port)
+    try:
+        cached = cache.get(serial_number)
+    except (OSError, ValueError, KeyError):
+        cached = None
+    result = detect(port, cached=cached, **kwargs)
+    if result is not None:
+        try:
+            cache.put(serial_number, result)
+        except OSError:
+            pass
+    return result
+
+
+# 自动检测通讯参数: python -m rs485.autodetect 端口 [从站列表，如1-10]
+if __name__ == "__main__":
+    import serial
+
+    from rs485.zeroing import parse_slaves
+
+    if len(sys.argv) < 2:
+        print("用法: python -m rs485.autodetect 端口 [从站列表]")
+        sys.exit(1)
+    candidate_slaves = parse_slaves(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_SLAVES
+    start = time.monotonic()
+    with serial.Serial(sys.argv[1]) as serial_port:
+        settings = detect_line(serial_port, slaves=candidate_slaves)
+    elapsed = time.monotonic() - start
+    if settings is None:
+        print(f"未检测到仪表 ({elapsed:.1f} 秒)")
+        sys.exit(1)
+    print(f"检测到: {settings.text()} ({elapsed:.1f} 秒)")
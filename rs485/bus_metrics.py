@@ -0,0 +1,263 @@
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from rs485.modbus_rtu import RESULTS
+
+# 响应延迟直方图分桶 (秒)
+LATENCY_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
+
+
+def _label_value(value):
+    """转义 Prometheus 标签值中的反斜杠、双引号和换行 (如 Windows 硬件ID USB\\VID_0403&...)"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # 最后一个为 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = 0
+        for bound in self.bounds:
+            if value <= bound:
+                break
+            index += 1
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        result = []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class SlaveMetrics:
+    def __init__(self):
+        self.results = dict.fromkeys(RESULTS, 0)
+        self.exceptions = {}  # {异常码: 次数}
+        self.resyncs = 0  # 响应需要重新定位帧边界的次数 (噪声、丢字节、残留旧帧)
+        self.latency = Histogram()
+
+    @property
+    def transactions(self):
+        return sum(self.results.values())
+
+
+class PortMetrics:
+    def __init__(self, baudrate, bits_per_char=10):
+        """
+        :param baudrate: 波特率，用于把收发字节数折算成总线占用时间
+        :param bits_per_char: 每字符位数 (起始位+数据位+校验位+停止位)
+        """
+        self.char_time = bits_per_char / baudrate
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        # 按记录时的波特率累加，串口重新打开时修改波特率不会改变已有的占用时间
+        self.busy_seconds = 0.0
+        self.started = time.monotonic()
+        self.slaves = {}
+        self.disconnects = 0  # 适配器拔出后重新连接的次数
+        self.disconnected_seconds = 0.0
+
+    @property
+    def utilization(self):
+        elapsed = time.monotonic() - self.started
+        return 0.0 if elapsed <= 0 else min(1.0, self.busy_seconds / elapsed)
+
+    def slave(self, slave):
+        metrics = self.slaves.get(slave)
+        if metrics is None:
+            metrics = self.slaves[slave] = SlaveMetrics()
+        return metrics
+
+
+class BusMetrics:
+    def __init__(self):
+        """按串口和从站统计总线健康指标，可被多个线程同时更新"""
+        self.ports = {}
+        self._lock = threading.Lock()
+
+    def register_port(self, port, baudrate, bits_per_char=10):
+        """
+        注册串口；已注册的串口 (如手动关闭后重新打开) 只更新通讯参数，计数在进程运行期间不清零
+        """
+        with self._lock:
+            metrics = self.ports.get(port)
+            if metrics is None:
+                self.ports[port] = PortMetrics(baudrate, bits_per_char)
+            else:
+                metrics.char_time = bits_per_char / baudrate
+
+    def _port(self, port):
+        metrics = self.ports.get(port)
+        if metrics is None:
+            # 按猜测的波特率统计会得到错误的总线占用率
+            raise ValueError(f"串口 {port} 未注册，请先调用 register_port")
+        return metrics
+
+    def record_transaction(self, port, slave, sent, received, result, latency_ns=None, exception_code=None):
+        """
+        记录一次事务
+        :param sent: 发送字节数
+        :param received: 接收字节数
+        :param result: 结果分类 (RESULT_*)
+        :param latency_ns: 响应延迟 (成功时)
+        :param exception_code: Modbus异常码 (result 为 RESULT_EXCEPTION 时)
+        """
+        with self._lock:
+            port_metrics = self._port(port)
+            port_metrics.bytes_sent += sent
+            port_metrics.bytes_received += received
+            port_metrics.busy_seconds += (sent + received) * port_metrics.char_time
+            metrics = port_metrics.slave(slave)
+            metrics.results[result] += 1
+            if exception_code is not None:
+                metrics.exceptions[exception_code] = metrics.exceptions.get(exception_code, 0) + 1
+            if latency_ns is not None:
+                metrics.latency.observe(latency_ns / 1e9)
+
+    def record_resync(self, port, slave):
+        """记录一次重新同步 (TransactionTiming.resynced)，事务结果仍由 record_transaction 记录"""
+        with self._lock:
+            self._port(port).slave(slave).resyncs += 1
+
+    def record_disconnect(self, port, seconds):
+        """记录一次串口断开 (重新连接后调用)，seconds 为断开时长"""
+        with self._lock:
+            port_metrics = self._port(port)
+            port_metrics.disconnects += 1
+            port_metrics.disconnected_seconds += seconds
+
+    def reset(self):
+        with self._lock:
+            for metrics in self.ports.values():
+                metrics.bytes_sent = 0
+                metrics.bytes_received = 0
+                metrics.busy_seconds = 0.0
+                metrics.started = time.monotonic()
+                metrics.slaves.clear()
+                metrics.disconnects = 0
+                metrics.disconnected_seconds = 0.0
+
+    def summary_rows(self):
+        """
+        界面显示用的汇总
+        :return: [(串口, 从站, SlaveMetrics, 总线占用率)]
+        """
+        with self._lock:
+            rows = []
+            for port, port_metrics in sorted(self.ports.items()):
+                utilization = port_metrics.utilization
+                for slave, metrics in sorted(port_metrics.slaves.items()):
+                    rows.append((port, slave, metrics, utilization))
+            return rows
+
+    def render_prometheus(self):
+        """生成 Prometheus 文本格式的指标"""
+        lines = [
+            "# HELP rs485_transactions_total Modbus transactions by result.",
+            "# TYPE rs485_transactions_total counter",
+        ]
+        with self._lock:
+            # 以下所有标签值都经过转义
+            ports = [(_label_value(port), metrics) for port, metrics in sorted(self.ports.items())]
+            for port, port_metrics in ports:
+                for slave, metrics in sorted(port_metrics.slaves.items()):
+                    for result, count in metrics.results.items():
+                        lines.append(f'rs485_transactions_total{{port="{port}",slave="{slave}",'
+                                     f'result="{_label_value(result)}"}} {count}')
+
+            lines += ["# HELP rs485_exceptions_total Modbus exception responses by exception code.",
+                      "# TYPE rs485_exceptions_total counter"]
+            for port, port_metrics in ports:
+                for slave, metrics in sorted(port_metrics.slaves.items()):
+                    for code, count in sorted(metrics.exceptions.items()):
+                        lines.append(f'rs485_exceptions_total{{port="{port}",slave="{slave}",code="{code}"}} {count}')
+
+            lines += ["# HELP rs485_resyncs_total Responses that needed frame resynchronisation.",
+                      "# TYPE rs485_resyncs_total counter"]
+            for port, port_metrics in ports:
+                for slave, metrics in sorted(port_metrics.slaves.items()):
+                    lines.append(f'rs485_resyncs_total{{port="{port}",slave="{slave}"}} {metrics.resyncs}')
+
+            lines += ["# HELP rs485_response_latency_seconds Request to complete response latency.",
+                      "# TYPE rs485_response_latency_seconds histogram"]
+            for port, port_metrics in ports:
+                for slave, metrics in sorted(port_metrics.slaves.items()):
+                    histogram = metrics.latency
+                    labels = f'port="{port}",slave="{slave}"'
+                    cumulative = histogram.cumulative()
+                    for bound, count in zip(histogram.bounds, cumulative):
+                        lines.append(f'rs485_response_latency_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f'rs485_response_latency_seconds_bucket{{{labels},le="+Inf"}} {cumulative[-1]}')
+                    lines.append(f'rs485_response_latency_seconds_sum{{{labels}}} {histogram.sum}')
+                    lines.append(f'rs485_response_latency_seconds_count{{{labels}}} {histogram.count}')
+
+            lines += ["# HELP rs485_bytes_sent_total Bytes written to the bus.",
+                      "# TYPE rs485_bytes_sent_total counter"]
+            lines += [f'rs485_bytes_sent_total{{port="{port}"}} {m.bytes_sent}' for port, m in ports]
+            lines += ["# HELP rs485_bytes_received_total Bytes read from the bus.",
+                      "# TYPE rs485_bytes_received_total counter"]
+            lines += [f'rs485_bytes_received_total{{port="{port}"}} {m.bytes_received}' for port, m in ports]
+            lines += ["# HELP rs485_bus_busy_seconds_total Time the bus carried frames.",
+                      "# TYPE rs485_bus_busy_seconds_total counter"]
+            lines += [f'rs485_bus_busy_seconds_total{{port="{port}"}} {m.busy_seconds}' for port, m in ports]
+            lines += ["# HELP rs485_bus_utilization_ratio Busy time divided by elapsed time since start.",
+                      "# TYPE rs485_bus_utilization_ratio gauge"]
+            lines += [f'rs485_bus_utilization_ratio{{port="{port}"}} {m.utilization:.6f}' for port, m in ports]
+            lines += ["# HELP rs485_port_disconnects_total Port removals followed by a reconnect.",
+                      "# TYPE rs485_port_disconnects_total counter"]
+            lines += [f'rs485_port_disconnects_total{{port="{port}"}} {m.disconnects}' for port, m in ports]
+            lines += ["# HELP rs485_port_disconnected_seconds_total Time the port was unavailable.",
+                      "# TYPE rs485_port_disconnected_seconds_total counter"]
+            lines += [f'rs485_port_disconnected_seconds_total{{port="{port}"}} {m.disconnected_seconds}'
+                      for port, m in ports]
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    def __init__(self, metrics, port=9105, host="127.0.0.1"):
+        """
+        本地 HTTP 指标接口，GET /metrics 返回 Prometheus 文本格式
+        :param metrics: BusMetrics
+        :param port: 监听端口
+        :param host: 监听地址 (默认只允许本机访问)
+        """
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, name="MetricsServer", daemon=True)
+        self._thread.start()
+
+    @property
+    def address(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,196 @@
+import bisect
+import threading
+
+from rs485.json_store import config_path, read_json, write_json
+
+# 检查是否安装了 numpy
+try:
+    import numpy as np
+except ImportError:
+    raise RuntimeError("请先安装 numpy 库，运行命令：pip install numpy")
+
+DEFAULT_CALIBRATION_PATH = config_path("calibration.json")
+
+
+def parse_points(text):
+    """
+    解析标定点，如 "0=0, 10000=100"
+    :return: [(原始值, 工程值)]
+    """
+    points = []
+    for part in text.replace('，', ',').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        raw, separator, value = part.partition('=')
+        if not separator:
+            raise ValueError(f"标定点格式应为 原始值=工程值: {part}")
+        points.append((float(raw), float(value)))
+    return points
+
+
+class Calibration:
+    def __init__(self, gain=1.0, offset=0.0, points=None):
+        """
+        单个寄存器的标定：工程值 = gain * 原始值 + offset，或按多点表分段线性换算
+        :param points: [(原始值, 工程值)] 多点标定表 (至少2点)，设置后不再使用 gain/offset，
+                       超出标定范围时按两端线段的斜率外推
+        """
+        self.gain = gain
+        self.offset = offset
+        self.raw = None
+        self.engineering = None
+        if points:
+            points = sorted(points)
+            if len(points) < 2 or len({raw for raw, _ in points}) != len(points):
+                raise ValueError("分段线性标定至少需要2个原始值不同的点")
+            self.raw = np.array([raw for raw, _ in points], dtype=np.float64)
+            self.engineering = np.array([value for _, value in points], dtype=np.float64)
+            # 单个数值换算用，避免每次都调用 numpy
+            self._raw_list = self.raw.tolist()
+            self._engineering_list = self.engineering.tolist()
+
+    @classmethod
+    def fit(cls, points):
+        """按最小二乘拟合 gain/offset (标定点较多、传感器线性时使用)"""
+        if len(points) < 2:
+            raise ValueError("拟合至少需要2个标定点")
+        raw = np.array([raw for raw, _ in points], dtype=np.float64)
+        engineering = np.array([value for _, value in points], dtype=np.float64)
+        gain, offset = np.polyfit(raw, engineering, 1)
+        return cls(float(gain), float(offset))
+
+    @property
+    def piecewise(self):
+        return self.raw is not None
+
+    def apply(self, raw):
+        """
+        换算一组原始值
+        :param raw: numpy 数组
+        :return: 工程值数组 (新数组)
+        """
+        if not self.piecewise:
+            return raw * self.gain + self.offset
+        xp, fp = self.raw, self.engineering
+        result = np.interp(raw, xp, fp)
+        low = raw < xp[0]
+        if low.any():
+            result[low] = fp[0] + (raw[low] - xp[0]) * (fp[1] - fp[0]) / (xp[1] - xp[0])
+        high = raw > xp[-1]
+        if high.any():
+            result[high] = fp[-1] + (raw[high] - xp[-1]) * (fp[-1] - fp[-2]) / (xp[-1] - xp[-2])
+        return result
+
+    def apply_value(self, raw):
+        """换算单个原始值"""
+        if not self.piecewise:
+            return raw * self.gain + self.offset
+        xp, fp = self._raw_list, self._engineering_list
+        index = min(max(bisect.bisect_right(xp, raw), 1), len(xp) - 1)
+        x0, x1 = xp[index - 1], xp[index]
+        y0, y1 = fp[index - 1], fp[index]
+        return y0 + (raw - x0) * (y1 - y0) / (x1 - x0)
+
+    def as_dict(self):
+        if self.piecewise:
+            return {'points': [[raw, value] for raw, value in zip(self._raw_list, self._engineering_list)]}
+        return {'gain': self.gain, 'offset': self.offset}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('gain', 1.0), data.get('offset', 0.0), data.get('points'))
+
+    def text(self):
+        if self.piecewise:
+            return " ".join(f"{raw:g}={value:g}" for raw, value in zip(self._raw_list, self._engineering_list))
+        return f"增益{self.gain:g} 偏移{self.offset:g}"
+
+
+class CalibrationTable:
+    def __init__(self):
+        """按 (从站, 地址) 保存的标定，没有标定的寄存器使用调用方给出的默认增益"""
+        self.calibrations = {}  # {(从站, 地址): Calibration}
+        self._lock = threading.Lock()
+
+    def set(self, slave, register, calibration):
+        with self._lock:
+            self.calibrations[(slave, register)] = calibration
+
+    def remove(self, slave, register):
+        with self._lock:
+            self.calibrations.pop((slave, register), None)
+
+    def get(self, slave, register):
+        return self.calibrations.get((slave, register))
+
+    def items(self):
+        """:return: [(从站, 地址, Calibration)]"""
+        with self._lock:
+            return [(slave, register, calibration)
+                    for (slave, register), calibration in sorted(self.calibrations.items())]
+
+    def apply_value(self, slave, register, raw, default_gain=1.0):
+        calibration = self.calibrations.get((slave, register))
+        if calibration is None:
+            return raw * default_gain
+        return calibration.apply_value(raw)
+
+    def apply(self, slaves, registers, raw, default_gain=1.0):
+        """
+        整批换算，每个有标定的寄存器只做一次向量运算
+        :param slaves: 从站地址数组 (或单个从站地址)
+        :param registers: 寄存器地址数组
+        :param raw: 原始值数组
+        :param default_gain: 没有标定的寄存器使用的增益 (标量或与 raw 等长的数组)
+        :return: 工程值数组 (float64，新数组)
+        """
+        raw = np.asarray(raw, dtype=np.float64)
+        result = raw * default_gain
+        if not self.calibrations or not len(raw):
+            return result
+        registers = np.asarray(registers, dtype=np.uint32)
+        keys = (np.asarray(slaves, dtype=np.uint32) << 16) | registers
+        with self._lock:
+            calibrations = list(self.calibrations.items())
+        for (slave, register), calibration in calibrations:
+            mask = keys == ((slave << 16) | register)
+            if mask.any():
+                result[mask] = calibration.apply(raw[mask])
+        return result
+
+    def as_dict(self):
+        return {f"{slave}:{register}": calibration.as_dict() for slave, register, calibration in self.items()}
+
+    def load_dict(self, data):
+        calibrations = {}
+        for key, value in data.items():
+            slave, register = key.split(':')
+            calibrations[(int(slave), int(register))] = Calibration.from_dict(value)
+        with self._lock:
+            self.calibrations = calibrations
+
+
+class CalibrationStore:
+    def __init__(self, path=DEFAULT_CALIBRATION_PATH):
+        """
+        按设备序列号保存标定表的 JSON 文件，更换仪表后按序列号找回各自的标定
+        :param path: 文件路径
+        """
+        self.path = path
+
+    def serials(self):
+        return sorted(read_json(self.path))
+
+    def load(self, serial, table=None):
+        """
+        :return: 该序列号的 CalibrationTable，没有保存过时返回空表
+        """
+        table = CalibrationTable() if table is None else table
+        table.load_dict(read_json(self.path).get(serial, {}))
+        return table
+
+    def save(self, serial, table):
+        data = read_json(self.path)
+        data[serial] = table.as_dict()
+        write_json(self.path, data)
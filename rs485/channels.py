@@ -0,0 +1,74 @@
+import struct
+
+from rs485.codec import ORDER_ABCD, TYPE_LONG, get_codec
+from rs485.modbus_rtu import build_read_request, read_response_length
+
+STATUS_WORD = struct.Struct('>H')
+MAX_READ_REGISTERS = 125
+
+
+class ChannelConfig:
+    def __init__(self, name, offset, data_type=TYPE_LONG, scale=1.0, unit="", byte_order=ORDER_ABCD):
+        """
+        :param name: 通道名称 (如 "通道1")
+        :param offset: 通道在读取块内的寄存器偏移
+        :param data_type: rs485.codec 中的 TYPE_*
+        :param scale: 缩放系数
+        :param unit: 工程单位 (如 "kN")
+        :param byte_order: rs485.codec 中的 ORDER_*
+        """
+        self.codec = get_codec(data_type, byte_order)
+        self.name = name
+        self.offset = offset
+        self.data_type = data_type
+        self.byte_order = byte_order
+        self.scale = scale
+        self.unit = unit
+
+
+class ChannelBlock:
+    def __init__(self, start, channels, status_offset=None, status_count=0):
+        """
+        一次03功能码读取多个通道的数值和状态字，所有通道为同一时刻的采样
+        :param start: 块起始寄存器地址
+        :param channels: ChannelConfig 列表
+        :param status_offset: 状态字在块内的寄存器偏移，None 表示不读状态字
+        :param status_count: 状态字个数 (每个1个寄存器)
+        """
+        self.start = start
+        self.channels = list(channels)
+        self.status_offset = status_offset if status_count else None
+        self.status_count = status_count if status_offset is not None else 0
+        end = max([channel.offset + channel.codec.registers for channel in self.channels] +
+                  [self.status_offset + self.status_count if self.status_count else 0])
+        if end > MAX_READ_REGISTERS:
+            raise ValueError(f"一次最多读取{MAX_READ_REGISTERS}个寄存器，当前需要{end}个")
+        self.count = end
+
+    def address(self, channel):
+        """:return: 通道数值的寄存器地址"""
+        return self.start + channel.offset
+
+    def request(self, slave):
+        return build_read_request(slave, self.start, self.count)
+
+    @property
+    def expected_length(self):
+        return read_response_length(self.count)
+
+    def decode(self, response, scaled=True):
+        """
+        解码完整的响应帧 (已校验)
+        :param scaled: False 时返回原始值，由调用方统一标定
+        :return: (各通道数值列表, 状态字元组)
+        """
+        values = []
+        for channel in self.channels:
+            raw = channel.codec.unpack_from(response, 3 + 2 * channel.offset)
+            values.append(raw * channel.scale if scaled else raw)
+        status = ()
+        if self.status_count:
+            base = 3 + 2 * self.status_offset
+            status = tuple(STATUS_WORD.unpack_from(response, base + 2 * i)[0] for i in range(self.status_count))
+        return values, status
+
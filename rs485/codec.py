@@ -0,0 +1,73 @@
+import struct
+
+# 数据类型
+TYPE_SHORT = 'short'  # 16位有符号
+TYPE_USHORT = 'ushort'  # 16位无符号
+TYPE_LONG = 'long'  # 32位有符号
+TYPE_ULONG = 'ulong'  # 32位无符号
+TYPE_FLOAT = 'float'  # IEEE 754 单精度
+TYPE_FORMATS = {TYPE_SHORT: 'h', TYPE_USHORT: 'H', TYPE_LONG: 'i', TYPE_ULONG: 'I', TYPE_FLOAT: 'f'}
+DATA_TYPES = tuple(TYPE_FORMATS)
+
+# 字节序：以数值的大端字节 A B C D 表示线路上的字节顺序 (16位数值只看 AB)
+ORDER_ABCD = 'ABCD'  # 高字在前，字内高字节在前 (Modbus 标准)
+ORDER_CDAB = 'CDAB'  # 低字在前 (字交换)
+ORDER_BADC = 'BADC'  # 字内字节交换
+ORDER_DCBA = 'DCBA'  # 低字节在前 (小端)
+BYTE_ORDERS = (ORDER_ABCD, ORDER_CDAB, ORDER_BADC, ORDER_DCBA)
+
+
+class Codec:
+    __slots__ = ('data_type', 'byte_order', 'size', 'registers', '_struct', '_swap_words', '_register_struct')
+
+    def __init__(self, data_type, byte_order=ORDER_ABCD):
+        """
+        一种 (数据类型, 字节序) 组合的编解码器，构造时预先生成 struct.Struct，解码时不做任何判断
+        字交换后 CDAB 与 ABCD、BADC 与 DCBA 相同，因此只需要大端/小端两种 Struct
+        """
+        if data_type not in TYPE_FORMATS:
+            raise ValueError(f"不支持的数据类型: {data_type}")
+        if byte_order not in BYTE_ORDERS:
+            raise ValueError(f"不支持的字节序: {byte_order}")
+        code = TYPE_FORMATS[data_type]
+        little = byte_order in (ORDER_BADC, ORDER_DCBA)
+        self.data_type = data_type
+        self.byte_order = byte_order
+        self._struct = struct.Struct(('<' if little else '>') + code)
+        self.size = self._struct.size
+        self.registers = self.size // 2
+        self._swap_words = self.registers == 2 and byte_order in (ORDER_CDAB, ORDER_BADC)
+        self._register_struct = struct.Struct(f'>{self.registers}H')
+
+    def unpack_from(self, buffer, offset=0):
+        """从响应数据中解码一个数值"""
+        if self._swap_words:
+            return self._struct.unpack(buffer[offset + 2:offset + 4] + buffer[offset:offset + 2])[0]
+        return self._struct.unpack_from(buffer, offset)[0]
+
+    def pack(self, value):
+        """编码为线路上的字节 (写寄存器用)"""
+        data = self._struct.pack(value)
+        if self._swap_words:
+            return data[2:] + data[:2]
+        return data
+
+    def from_registers(self, registers):
+        """从寄存器值列表 (如 pymodbus 的 response.registers) 解码"""
+        return self.unpack_from(self._register_struct.pack(*registers[:self.registers]))
+
+    def to_registers(self, value):
+        """编码为寄存器值列表"""
+        return list(self._register_struct.unpack(self.pack(value)))
+
+
+# 所有组合预先生成，解码时直接查表
+CODECS = {(data_type, byte_order): Codec(data_type, byte_order)
+          for data_type in DATA_TYPES for byte_order in BYTE_ORDERS}
+
+
+def get_codec(data_type, byte_order=ORDER_ABCD):
+    codec = CODECS.get((data_type, byte_order))
+    if codec is None:
+        raise ValueError(f"不支持的数据类型或字节序: {data_type} {byte_order}")
+    return codec
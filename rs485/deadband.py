@@ -0,0 +1,89 @@
+import math
+import threading
+
+# 死区模式
+DEADBAND_ABSOLUTE = 'absolute'  # 与上次输出值相差超过 deadband 才输出
+DEADBAND_PERCENT = 'percent'  # 与上次输出值相差超过上次值的 deadband% 才输出
+DEADBAND_TIME = 'time'  # 数值变化时输出，但两次输出至少间隔 deadband 秒
+DEADBAND_MODES = (DEADBAND_ABSOLUTE, DEADBAND_PERCENT, DEADBAND_TIME)
+
+
+class DeadbandRule:
+    def __init__(self, mode=DEADBAND_ABSOLUTE, deadband=0.0, heartbeat=None):
+        """
+        :param mode: DEADBAND_ABSOLUTE / DEADBAND_PERCENT / DEADBAND_TIME
+        :param deadband: 死区大小，单位随模式为 数值 / 百分比 / 秒；绝对值模式为0时只要变化就输出
+        :param heartbeat: 心跳周期 (秒)，超过这么久没有输出时即使数值不变也输出一次，None 表示不发心跳
+        """
+        if mode not in DEADBAND_MODES:
+            raise ValueError(f"不支持的死区模式: {mode}")
+        self.mode = mode
+        self.deadband = abs(deadband)
+        self.heartbeat_ns = None if heartbeat is None else int(heartbeat * 1e9)
+
+
+class ChangeFilter:
+    def __init__(self, default=None):
+        """
+        按寄存器过滤样本，只把有意义的变化交给界面、记录和网络输出
+        :param default: 未单独设置规则的寄存器使用的 DeadbandRule，默认为只要变化就输出
+        """
+        self.default = default or DeadbandRule()
+        self.rules = {}  # {(从站, 地址): DeadbandRule}
+        self._last = {}  # {(从站, 地址): [上次输出值, 上次输出时间ns]}
+        self._lock = threading.Lock()
+        self.passed = 0
+        self.suppressed = 0
+
+    def set_rule(self, slave, register, rule):
+        with self._lock:
+            self.rules[(slave, register)] = rule
+
+    def remove_rule(self, slave, register):
+        with self._lock:
+            self.rules.pop((slave, register), None)
+
+    def accept(self, slave, register, timestamp_ns, value):
+        """
+        :return: 该样本是否需要输出
+        """
+        key = (slave, register)
+        with self._lock:
+            last = self._last.get(key)
+            if last is None:
+                self._last[key] = [value, timestamp_ns]
+                self.passed += 1
+                return True
+            rule = self.rules.get(key, self.default)
+            last_value, last_ns = last
+            delta = abs(value - last_value)
+            if rule.mode == DEADBAND_ABSOLUTE:
+                changed = delta > rule.deadband
+            elif rule.mode == DEADBAND_PERCENT:
+                changed = delta > abs(last_value) * rule.deadband / 100.0 if last_value else delta > 0
+            else:
+                changed = delta > 0 and timestamp_ns - last_ns >= rule.deadband * 1e9
+            # NaN 与任何值比较都为 False，按变化处理
+            if not changed and math.isnan(delta):
+                changed = True
+            if not changed and rule.heartbeat_ns is not None and timestamp_ns - last_ns >= rule.heartbeat_ns:
+                changed = True
+            if changed:
+                last[0] = value
+                last[1] = timestamp_ns
+                self.passed += 1
+            else:
+                self.suppressed += 1
+            return changed
+
+    @property
+    def reduction(self):
+        """被过滤掉的样本比例"""
+        total = self.passed + self.suppressed
+        return 0.0 if total == 0 else self.suppressed / total
+
+    def reset(self):
+        with self._lock:
+            self._last.clear()
+            self.passed = 0
+            self.suppressed = 0
@@ -0,0 +1,126 @@
+import numpy as np
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import Qt, QTimer, QPointF, QRectF
+from PyQt5.QtGui import QPainter, QPen, QColor, QPolygonF
+
+from rs485.lttb import lttb_indices
+
+CHANNEL_COLORS = ["#d62728", "#1f77b4", "#2ca02c", "#ff7f0e"]
+
+
+class ForcePlotWidget(QWidget):
+    def __init__(self, parent=None, refresh_ms=200):
+        """
+        多通道实时曲线，数据来自 RingBuffer，绘制前按像素宽度做 LTTB 降采样
+        :param refresh_ms: 刷新周期 (毫秒)，只在有新数据时重绘
+        """
+        super().__init__(parent)
+        self.channels = []  # [(名称, RingBuffer)]
+        self.window_seconds = None  # 显示时间窗口，None 表示缓冲区内全部数据
+        self.margin_left = 70
+        self.margin_right = 10
+        self.margin_top = 25
+        self.margin_bottom = 25
+        self._drawn_totals = None
+        self.setMinimumHeight(200)
+        self.setAutoFillBackground(True)
+        self.setStyleSheet("background-color: white;")
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(refresh_ms)
+
+    def set_channels(self, channels):
+        """
+        设置显示的通道
+        :param channels: [(名称, RingBuffer)] 列表
+        """
+        self.channels = list(channels)
+        self._drawn_totals = None
+        self.update()
+
+    def set_window(self, seconds):
+        self.window_seconds = seconds
+        self._drawn_totals = None
+        self.update()
+
+    def refresh(self):
+        totals = [buffer.total for _, buffer in self.channels]
+        if totals != self._drawn_totals:
+            self.update()
+
+    def _channel_points(self, buffer, latest_ns, pixel_width):
+        timestamps, values = buffer.snapshot_arrays()
+        if not timestamps:
+            return None
+        t = (np.frombuffer(timestamps, dtype=np.int64) - latest_ns) / 1e9
+        v = np.frombuffer(values, dtype=np.float64)
+        if self.window_seconds is not None:
+            start = int(np.searchsorted(t, -self.window_seconds))
+            t, v = t[start:], v[start:]
+        if len(t) == 0:
+            return None
+        # 降采样到像素宽度，绘制成本与缓冲区内样本数无关
+        indices = lttb_indices(t, v, pixel_width)
+        return t[indices], v[indices]
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        plot = QRectF(self.margin_left, self.margin_top,
+                      max(1, self.width() - self.margin_left - self.margin_right),
+                      max(1, self.height() - self.margin_top - self.margin_bottom))
+        painter.setPen(QPen(QColor("#888888")))
+        painter.drawRect(plot)
+
+        self._drawn_totals = [buffer.total for _, buffer in self.channels]
+        latest_ns = None
+        for _, buffer in self.channels:
+            if len(buffer):
+                last = buffer.snapshot_arrays(1)[0][0]
+                latest_ns = last if latest_ns is None else max(latest_ns, last)
+        if latest_ns is None:
+            painter.drawText(plot, Qt.AlignCenter, "暂无数据")
+            return
+
+        series = []
+        for index, (name, buffer) in enumerate(self.channels):
+            points = self._channel_points(buffer, latest_ns, int(plot.width()))
+            if points is not None:
+                series.append((index, name, points[0], points[1]))
+        if not series:
+            painter.drawText(plot, Qt.AlignCenter, "暂无数据")
+            return
+
+        t_min = min(float(t[0]) for _, _, t, _ in series)
+        if self.window_seconds is not None:
+            t_min = -self.window_seconds
+        t_span = -t_min if t_min < 0 else 1.0
+        v_min = min(float(v.min()) for _, _, _, v in series)
+        v_max = max(float(v.max()) for _, _, _, v in series)
+        if v_max == v_min:
+            v_min -= 1.0
+            v_max += 1.0
+        v_span = v_max - v_min
+
+        # 坐标轴标注
+        painter.drawText(QRectF(0, plot.top() - 8, self.margin_left - 5, 16),
+                         Qt.AlignRight | Qt.AlignVCenter, f"{v_max:.4g}")
+        painter.drawText(QRectF(0, plot.bottom() - 8, self.margin_left - 5, 16),
+                         Qt.AlignRight | Qt.AlignVCenter, f"{v_min:.4g}")
+        painter.drawText(QRectF(plot.left(), plot.bottom() + 2, plot.width(), 20),
+                         Qt.AlignLeft | Qt.AlignTop, f"{t_min:.1f} s")
+        painter.drawText(QRectF(plot.left(), plot.bottom() + 2, plot.width(), 20),
+                         Qt.AlignRight | Qt.AlignTop, "0 s")
+
+        legend_x = plot.left()
+        for index, name, t, v in series:
+            color = QColor(CHANNEL_COLORS[index % len(CHANNEL_COLORS)])
+            xs = plot.left() + (t - t_min) / t_span * plot.width()
+            ys = plot.bottom() - (v - v_min) / v_span * plot.height()
+            polygon = QPolygonF([QPointF(x, y) for x, y in zip(xs.tolist(), ys.tolist())])
+            # 折线点数已降到像素宽度，不开抗锯齿可显著降低绘制耗时
+            painter.setPen(QPen(color, 1))
+            painter.drawPolyline(polygon)
+            painter.drawText(QRectF(legend_x, 2, 150, 20), Qt.AlignLeft | Qt.AlignVCenter,
+                             f"{name}: {v[-1]:.5g}")
+            legend_x += 150
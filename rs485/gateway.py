@@ -0,0 +1,325 @@
+import sys
+import time
+import socket
+import struct
+import argparse
+import threading
+import socketserver
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from rs485.bus_metrics import BusMetrics, MetricsServer
+from rs485.modbus_rtu import (RESULT_CRC, RESULT_EXCEPTION, RESULT_FUNCTION_ERROR, RESULT_OK, RESULT_SHORT,
+                              RESULT_SLAVE_MISMATCH, RESULT_TIMEOUT, append_crc, classify_response,
+                              request_response_length)
+from rs485.low_latency import rtu_timing
+from rs485.read_cache import CachedBus
+from rs485.scheduler import PRIORITY_CONTROL, PRIORITY_POLL, TransactionScheduler
+from rs485.transport import send_broadcast, transact
+
+# Modbus 异常码
+EXCEPTION_ILLEGAL_FUNCTION = 0x01
+EXCEPTION_GATEWAY_PATH_UNAVAILABLE = 0x0A
+EXCEPTION_GATEWAY_TARGET_FAILED = 0x0B
+
+MBAP_HEADER = struct.Struct('>HHHB')
+WRITE_FUNCTIONS = (0x05, 0x06, 0x0F, 0x10)
+# 失败的事务结果对应的错误说明
+RESULT_MESSAGES = {
+    RESULT_TIMEOUT: "从站无响应",
+    RESULT_SHORT: "响应长度不足",
+    RESULT_CRC: "CRC校验失败",
+    RESULT_SLAVE_MISMATCH: "从站地址不匹配",
+    RESULT_FUNCTION_ERROR: "功能码不匹配",
+}
+
+
+class GatewayError(Exception):
+    def __init__(self, code, message=""):
+        super().__init__(message or f"Modbus异常码 {code:#04x}")
+        self.code = code
+
+
+class RtuBus:
+    def __init__(self, port, metrics=None):
+        """
+        一条RS-485总线，所有请求排队后由工作线程依次发送，保证同一时刻总线上只有一个事务
+        写请求默认以控制优先级插到读请求前面
+        :param port: 已打开的 serial.Serial
+        :param metrics: BusMetrics (可选)
+        """
+        self.port = port
+        self.name = port.port
+        self.metrics = metrics
+        char_time, _, self.frame_gap = rtu_timing(port.baudrate, port.bytesize, port.parity, int(port.stopbits))
+        # 仪表处理广播请求的时间，广播帧发送完成后再等待这么久
+        self.broadcast_delay = 0.1
+        if metrics is not None:
+            metrics.register_port(self.name, port.baudrate, round(char_time * port.baudrate))
+        self.scheduler = TransactionScheduler()
+        self._thread = threading.Thread(target=self._run, name=f"RtuBus-{self.name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, slave, pdu, priority=None):
+        """
+        提交一个请求 (不含地址和CRC的PDU)
+        :param priority: PRIORITY_*，为 None 时写请求为控制优先级，其余为轮询优先级
+        :return: concurrent.futures.Future，结果为响应PDU，广播请求结果为 None
+        """
+        if priority is None:
+            priority = PRIORITY_CONTROL if pdu[0] in WRITE_FUNCTIONS else PRIORITY_POLL
+        future = Future()
+        self.scheduler.put((slave, bytes(pdu), future), priority)
+        return future
+
+    def execute(self, slave, pdu, timeout=5.0, priority=None):
+        """提交请求并等待结果，失败时抛出 GatewayError"""
+        return self.submit(slave, pdu, priority).result(timeout)
+
+    def _run(self):
+        while True:
+            item = self.scheduler.get()
+            if item is None:
+                return
+            slave, pdu, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._transact(slave, pdu))
+            except GatewayError as e:
+                future.set_exception(e)
+            except Exception as e:
+                future.set_exception(GatewayError(EXCEPTION_GATEWAY_TARGET_FAILED, str(e)))
+
+    def _transact(self, slave, pdu):
+        port = self.port
+        request = append_crc(bytes([slave]) + pdu)
+        if slave == 0:
+            send_broadcast(port, request, self.broadcast_delay)
+            self._record(slave, len(request), 0, RESULT_OK)
+            return None
+        expected = request_response_length(request)
+        if expected is None:
+            # 响应长度无法推算时不能按帧长接收和重新同步
+            raise GatewayError(EXCEPTION_ILLEGAL_FUNCTION, f"网关不支持功能码 {pdu[0]:#04x}")
+
+        # 帧头判断、按帧长接收和重新同步与直接读取仪表时相同
+        response, timing = transact(port, request, expected)
+        time.sleep(self.frame_gap)
+        if timing.resynced and self.metrics is not None:
+            self.metrics.record_resync(self.name, slave)
+        result, exception_code = classify_response(response, slave, pdu[0], expected)
+        if result == RESULT_EXCEPTION:
+            self._record(slave, len(request), len(response), result, exception_code=exception_code)
+            return response[1:3]
+        if result != RESULT_OK:
+            self._record(slave, len(request), len(response), result)
+            raise GatewayError(EXCEPTION_GATEWAY_TARGET_FAILED, RESULT_MESSAGES[result])
+        self._record(slave, len(request), len(response), result, timing.complete_ns - timing.send_ns)
+        return response[1:expected - 2]
+
+    def _record(self, slave, sent, received, result, latency_ns=None, exception_code=None):
+        if self.metrics is not None:
+            self.metrics.record_transaction(self.name, slave, sent, received, result, latency_ns, exception_code)
+
+    def close(self):
+        self.scheduler.close()
+        self._thread.join(2.0)
+        self.port.close()
+
+
+def broadcast_reply(pdu):
+    """广播写请求没有从站响应，按正常写响应的格式回复TCP客户端"""
+    # 05/06 响应为请求原样回显，0F/10 响应为 功能码+起始地址+数量
+    if pdu[0] in (0x05, 0x06, 0x0F, 0x10):
+        return pdu[:5]
+    return bytes([pdu[0] | 0x80, EXCEPTION_GATEWAY_TARGET_FAILED])
+
+
+class ModbusTcpGateway:
+    def __init__(self, buses, routes=None, host="0.0.0.0", port=502, timeout=5.0):
+        """
+        Modbus TCP 服务器，把TCP请求转发到一条或多条RTU总线
+        :param buses: RtuBus (或 CachedBus) 列表
+        :param routes: {单元标识: (总线序号, 从站地址)}，为 None 时单元标识直接作为第一条总线上的从站地址
+        :param host: 监听地址
+        :param port: 监听端口
+        :param timeout: 每个请求等待总线结果的最长时间 (秒)
+        """
+        self.buses = list(buses)
+        self.routes = routes
+        self.timeout = timeout
+        gateway = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                gateway._serve_client(self.request)
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        self.server = Server((host, port), Handler)
+        self._thread = None
+
+    @property
+    def address(self):
+        return self.server.server_address[:2]
+
+    def route(self, unit, function=None):
+        """
+        :param function: 请求功能码，发往从站地址0 (广播) 的只允许写请求
+        :return: (总线, 从站地址)，没有可用路径时为 (None, None)
+        """
+        if self.routes is None:
+            bus, slave = self.buses[0], unit
+        else:
+            target = self.routes.get(unit)
+            if target is None:
+                return None, None
+            bus_index, slave = target
+            bus = self.buses[bus_index]
+        # 广播读没有响应，超出 1-247 的地址线路上不存在
+        if slave == 0 and function not in WRITE_FUNCTIONS or slave > 247:
+            return None, None
+        return bus, slave
+
+    def process(self, unit, pdu):
+        """
+        处理一个请求PDU
+        :return: 响应PDU
+        """
+        bus, slave = self.route(unit, pdu[0])
+        if bus is None:
+            return bytes([pdu[0] | 0x80, EXCEPTION_GATEWAY_PATH_UNAVAILABLE])
+        future = bus.submit(slave, pdu)
+        try:
+            response = future.result(self.timeout)
+        except FutureTimeoutError:
+            # 只取消本客户端的 Future；经过 CachedBus 合并的读请求在所有读者都取消后才不再发送
+            future.cancel()
+            return bytes([pdu[0] | 0x80, EXCEPTION_GATEWAY_TARGET_FAILED])
+        except GatewayError as e:
+            return bytes([pdu[0] | 0x80, e.code])
+        except Exception:
+            return bytes([pdu[0] | 0x80, EXCEPTION_GATEWAY_TARGET_FAILED])
+        if response is None:
+            return broadcast_reply(pdu)
+        return response
+
+    def _serve_client(self, sock):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            header = _recv_exact(sock, MBAP_HEADER.size)
+            if header is None:
+                return
+            transaction_id, protocol_id, length, unit = MBAP_HEADER.unpack(header)
+            if protocol_id != 0 or not 2 <= length <= 254:
+                return
+            pdu = _recv_exact(sock, length - 1)
+            if pdu is None:
+                return
+            response = self.process(unit, pdu)
+            sock.sendall(MBAP_HEADER.pack(transaction_id, 0, len(response) + 1, unit) + response)
+
+    def start(self):
+        """在后台线程中运行"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="ModbusTcpGateway", daemon=True)
+        self._thread.start()
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _recv_exact(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def tcp_request(host, port, unit, pdu, transaction_id=1, timeout=3.0):
+    """
+    最简单的Modbus TCP客户端，用于测试网关
+    :return: 响应PDU
+    """
+    with socket.create_connection((host, port), timeout) as sock:
+        sock.sendall(MBAP_HEADER.pack(transaction_id, 0, len(pdu) + 1, unit) + bytes(pdu))
+        header = _recv_exact(sock, MBAP_HEADER.size)
+        if header is None:
+            raise ConnectionError("网关关闭了连接")
+        _, _, length, _ = MBAP_HEADER.unpack(header)
+        return _recv_exact(sock, length - 1)
+
+
+def _parse_bus(text):
+    # 串口[:波特率[:校验位]]，Windows 下如 COM3:115200:N
+    parts = text.split(":")
+    port = parts[0]
+    baudrate = int(parts[1]) if len(parts) > 1 else 115200
+    parity = parts[2].upper() if len(parts) > 2 else 'N'
+    return port, baudrate, parity
+
+
+def _parse_ttl(text):
+    # 从站:地址[:数量]=有效期(秒)
+    target, ttl = text.split("=")
+    parts = target.split(":")
+    count = int(parts[2]) if len(parts) > 2 else 1
+    return int(parts[0]), int(parts[1]), float(ttl), count
+
+
+def _parse_route(text):
+    # 单元标识=总线序号:从站地址
+    unit, target = text.split("=")
+    bus_index, slave = target.split(":")
+    return int(unit), (int(bus_index), int(slave))
+
+
+# 运行网关: python -m rs485.gateway --bus /dev/ttyUSB0:115200 --port 5020
+if __name__ == "__main__":
+    import serial
+
+    parser = argparse.ArgumentParser(description="Modbus TCP -> RTU 网关")
+    parser.add_argument("--bus", action="append", required=True, help="串口[:波特率[:校验位]]，可重复指定多条总线")
+    parser.add_argument("--route", action="append", help="单元标识=总线序号:从站地址，不指定时单元标识即第一条总线的从站地址")
+    parser.add_argument("--listen", default="0.0.0.0", help="监听地址")
+    parser.add_argument("--port", type=int, default=502, help="监听端口")
+    parser.add_argument("--timeout", type=float, default=0.5, help="串口响应超时 (秒)")
+    parser.add_argument("--metrics-port", type=int, help="启用Prometheus指标接口的端口")
+    parser.add_argument("--cache-ttl", type=float, help="读缓存有效期 (秒)，启用后相同的并发读请求合并为一次总线事务")
+    parser.add_argument("--ttl", action="append", type=_parse_ttl, default=[],
+                        help="从站:地址[:数量]=有效期，单独设置寄存器的缓存有效期，可重复指定 (同时启用读缓存)")
+    args = parser.parse_args()
+
+    metrics = BusMetrics()
+    buses = []
+    for spec in args.bus:
+        name, baudrate, parity = _parse_bus(spec)
+        bus = RtuBus(serial.Serial(port=name, baudrate=baudrate, parity=parity, timeout=args.timeout), metrics)
+        if args.cache_ttl is not None or args.ttl:
+            bus = CachedBus(bus, args.cache_ttl or 0.0)
+            for slave, address, ttl, count in args.ttl:
+                bus.set_ttl(slave, address, ttl, count)
+        buses.append(bus)
+    routes = dict(_parse_route(r) for r in args.route) if args.route else None
+    gateway = ModbusTcpGateway(buses, routes, args.listen, args.port)
+    metrics_server = MetricsServer(metrics, args.metrics_port) if args.metrics_port else None
+    print(f"Modbus TCP 网关已启动: {args.listen}:{args.port} -> {', '.join(bus.name for bus in buses)}")
+    if metrics_server is not None:
+        print(f"指标接口: {metrics_server.address}")
+    try:
+        gateway.serve_forever()
+    except KeyboardInterrupt:
+        print("\n检测到 Ctrl+C，正在退出...")
+    finally:
+        gateway.server.server_close()
+        for bus in buses:
+            bus.close()
+        sys.exit(0)
@@ -0,0 +1,27 @@
+import os
+import json
+
+# 标定、自动检测结果等本地配置的保存目录
+CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".rs485")
+
+
+def config_path(name):
+    return os.path.join(CONFIG_DIR, name)
+
+
+def read_json(path):
+    """:return: 文件内容，文件不存在时返回空字典"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def write_json(path, data):
+    """先写临时文件再替换，写入中途断电不会损坏已有内容"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
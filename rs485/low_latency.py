@@ -0,0 +1,163 @@
+import os
+import sys
+import time
+
+SYSFS_USB_SERIAL = "/sys/bus/usb-serial/devices"
+
+
+def rtu_timing(baudrate, bytesize=8, parity='N', stopbits=1):
+    """
+    计算Modbus-RTU字符时间及 t1.5 / t3.5 间隔
+    波特率高于19200时按规范使用固定的 750us / 1750us
+    :return: (字符时间, t1.5, t3.5)，单位秒
+    """
+    bits = 1 + bytesize + (0 if parity == 'N' else 1) + stopbits
+    char_time = bits / baudrate
+    if baudrate > 19200:
+        return char_time, 0.00075, 0.00175
+    return char_time, 1.5 * char_time, 3.5 * char_time
+
+
+def latency_timer_path(port_name):
+    """FTDI 等 usb-serial 驱动的 latency_timer 路径 (不存在时返回 None)"""
+    device = os.path.basename(os.path.realpath(port_name))
+    path = os.path.join(SYSFS_USB_SERIAL, device, "latency_timer")
+    return path if os.path.exists(path) else None
+
+
+class LowLatencyProfile:
+    def __init__(self, latency_timer_ms=1):
+        """
+        Linux 低延迟串口配置
+        1. 通过 TIOCSSERIAL 设置 ASYNC_LOW_LATENCY
+        2. sysfs 可写时把 FTDI latency_timer 从默认16ms调小
+        3. inter_byte_timeout 设为RTU帧间隔 t3.5，收到帧尾立即返回 (仅 Linux；Windows 下 pyserial
+           会把它换成毫秒精度的 ReadIntervalTimeout，改变读取行为)
+        :param latency_timer_ms: latency_timer 目标值 (毫秒)
+        """
+        self.latency_timer_ms = latency_timer_ms
+        self._saved = {}
+
+    def apply(self, port):
+        """
+        对已打开的 serial.Serial 应用低延迟配置，无法设置的项会跳过
+        :return: 各项设置结果 {名称: 说明}
+        """
+        result = {}
+        self._saved = {}
+
+        if hasattr(port, 'set_low_latency_mode'):
+            try:
+                port.set_low_latency_mode(True)
+                self._saved['low_latency'] = True
+                result['ASYNC_LOW_LATENCY'] = "已设置"
+            except (ValueError, OSError) as e:
+                result['ASYNC_LOW_LATENCY'] = f"设置失败: {e}"
+        else:
+            result['ASYNC_LOW_LATENCY'] = "当前平台不支持"
+
+        path = latency_timer_path(port.port) if sys.platform.startswith('linux') else None
+        if path is None:
+            result['latency_timer'] = "非FTDI设备，跳过"
+        elif not os.access(path, os.W_OK):
+            result['latency_timer'] = f"{path} 不可写 (需要root或udev规则)"
+        else:
+            try:
+                with open(path) as f:
+                    old_value = f.read().strip()
+                with open(path, "w") as f:
+                    f.write(str(self.latency_timer_ms))
+                self._saved['latency_timer'] = (path, old_value)
+                result['latency_timer'] = f"{old_value}ms -> {self.latency_timer_ms}ms"
+            except OSError as e:
+                result['latency_timer'] = f"设置失败: {e}"
+
+        if sys.platform.startswith('linux'):
+            parity = port.parity if port.parity in ('N', 'E', 'O') else 'E'
+            # 1.5个停止位按1.5计算
+            _, _, t3_5 = rtu_timing(port.baudrate, port.bytesize, parity, float(port.stopbits))
+            self._saved['inter_byte_timeout'] = port.inter_byte_timeout
+            port.inter_byte_timeout = t3_5
+            result['inter_byte_timeout'] = f"{t3_5 * 1000:.3f}ms"
+        else:
+            result['inter_byte_timeout'] = "当前平台不设置"
+        return result
+
+    def restore(self, port):
+        """恢复 apply 之前的设置 (latency_timer 在设备拔出前一直有效，需要显式恢复)"""
+        saved = self._saved
+        self._saved = {}
+        if 'inter_byte_timeout' in saved and port.is_open:
+            port.inter_byte_timeout = saved['inter_byte_timeout']
+        if saved.get('low_latency') and port.is_open:
+            try:
+                port.set_low_latency_mode(False)
+            except (ValueError, OSError):
+                pass
+        if 'latency_timer' in saved:
+            path, old_value = saved['latency_timer']
+            try:
+                with open(path, "w") as f:
+                    f.write(old_value)
+            except OSError:
+                pass
+
+
+def measure_turnaround(port, slave, address, count, repeat):
+    """
+    连续发送读请求，统计请求到完整响应的往返时间
+    :return: 成功的往返时间列表 (毫秒) 和失败次数
+    """
+    from rs485.modbus_rtu import build_read_request, read_response_length
+    from rs485.transport import transact
+
+    request = build_read_request(slave, address, count)
+    expected = read_response_length(count)
+    samples = []
+    failures = 0
+    for _ in range(repeat):
+        port.reset_input_buffer()
+        response, timing = transact(port, request, expected)
+        if timing.latency_ns is None:
+            failures += 1
+        else:
+            samples.append(timing.latency_ns / 1e6)
+    return samples, failures
+
+
+def _format_result(title, samples, failures):
+    if not samples:
+        return f"{title}: 全部失败 ({failures}次)"
+    samples = sorted(samples)
+    p50 = samples[len(samples) // 2]
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return (f"{title}: 平均 {sum(samples) / len(samples):.2f}ms  中位 {p50:.2f}ms  "
+            f"P99 {p99:.2f}ms  最大 {samples[-1]:.2f}ms  失败 {failures}次")
+
+
+# 对比测试: python -m rs485.low_latency /dev/ttyUSB0 [波特率] [从站地址] [寄存器地址] [次数]
+if __name__ == "__main__":
+    import serial
+
+    if len(sys.argv) < 2:
+        print("用法: python -m rs485.low_latency 串口 [波特率] [从站地址] [寄存器地址] [次数]")
+        sys.exit(1)
+    port_name = sys.argv[1]
+    baudrate = int(sys.argv[2]) if len(sys.argv) > 2 else 115200
+    slave = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    address = int(sys.argv[4], 0) if len(sys.argv) > 4 else 0x0010
+    repeat = int(sys.argv[5]) if len(sys.argv) > 5 else 200
+
+    port = serial.Serial(port=port_name, baudrate=baudrate, timeout=1.0)
+    profile = LowLatencyProfile()
+    try:
+        before = measure_turnaround(port, slave, address, 2, repeat)
+        for name, text in profile.apply(port).items():
+            print(f"{name}: {text}")
+        time.sleep(0.1)
+        after = measure_turnaround(port, slave, address, 2, repeat)
+        print(_format_result("默认配置", *before))
+        print(_format_result("低延迟配置", *after))
+    finally:
+        profile.restore(port)
+        port.close()
@@ -0,0 +1,53 @@
+# 检查是否安装了 numpy
+try:
+    import numpy as np
+except ImportError:
+    raise RuntimeError("请先安装 numpy 库，运行命令：pip install numpy")
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets 降采样
+    :param x: 横坐标序列 (单调递增)
+    :param y: 纵坐标序列
+    :param threshold: 降采样后的点数 (一般取绘图区像素宽度)
+    :return: 被保留的样本下标 (numpy int64 数组)
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n, dtype=np.int64)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # 首尾点固定保留，中间点均分为 threshold-2 个桶
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    bucket_count = threshold - 2
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(bucket_count):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        # 下一个桶的平均点作为三角形第三个顶点
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        xa, ya = x[a], y[a]
+        areas = np.abs((xa - avg_x) * (y[start:end] - ya) - (xa - x[start:end]) * (avg_y - ya))
+        a = start + int(areas.argmax())
+        selected[i + 1] = a
+
+    return selected
+
+
+def lttb(x, y, threshold):
+    """
+    LTTB 降采样，返回降采样后的 (x, y)
+    """
+    indices = lttb_indices(x, y, threshold)
+    return np.asarray(x)[indices], np.asarray(y)[indices]
@@ -0,0 +1,106 @@
+# 事务结果分类
+RESULT_OK = "ok"
+RESULT_TIMEOUT = "timeout"
+RESULT_SHORT = "short"
+RESULT_CRC = "crc_error"
+RESULT_SLAVE_MISMATCH = "slave_mismatch"
+RESULT_FUNCTION_ERROR = "function_error"
+RESULT_EXCEPTION = "exception"
+RESULTS = (RESULT_OK, RESULT_TIMEOUT, RESULT_SHORT, RESULT_CRC,
+           RESULT_SLAVE_MISMATCH, RESULT_FUNCTION_ERROR, RESULT_EXCEPTION)
+
+
+def calculate_crc(data):
+    """
+    计算Modbus CRC16校验码
+    :param data: 待校验的字节
+    :return: CRC值 (整数，发送时低字节在前)
+    """
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            if crc & 0x0001:
+                crc >>= 1
+                crc ^= 0xA001
+            else:
+                crc >>= 1
+    return crc
+
+
+def append_crc(frame):
+    """在帧末尾追加CRC (低字节在前)"""
+    crc = calculate_crc(frame)
+    return bytes(frame) + bytes([crc & 0xFF, (crc >> 8) & 0xFF])
+
+
+def check_crc(frame):
+    """校验整帧 (含末尾2字节CRC)"""
+    if len(frame) < 4:
+        return False
+    crc = calculate_crc(frame[:-2])
+    return frame[-2] == (crc & 0xFF) and frame[-1] == ((crc >> 8) & 0xFF)
+
+
+def build_read_request(slave, address, count, function=0x03):
+    """
+    构建读寄存器请求帧
+    :param slave: 从站地址
+    :param address: 寄存器起始地址
+    :param count: 寄存器数量
+    :param function: 功能码 (默认03读保持寄存器)
+    """
+    return append_crc(bytes([slave, function, (address >> 8) & 0xFF, address & 0xFF,
+                             (count >> 8) & 0xFF, count & 0xFF]))
+
+
+def read_response_length(count):
+    """读寄存器响应帧长度: 地址 功能码 字节数 数据 CRC"""
+    return 5 + count * 2
+
+
+def request_response_length(request):
+    """
+    根据请求帧推算正常响应帧长度
+    :param request: 请求帧 (从站地址开头)
+    :return: 帧长度，响应长度无法由请求推算的功能码返回 None
+    """
+    if len(request) < 6:
+        return None
+    function = request[1]
+    count = (request[4] << 8) | request[5]
+    if function in (0x01, 0x02):  # 线圈/离散输入按位打包
+        return 5 + (count + 7) // 8
+    if function in (0x03, 0x04):
+        return read_response_length(count)
+    if function in (0x05, 0x06, 0x0F, 0x10):
+        return 8
+    if function == 0x17:  # 读写多个寄存器，响应为读取部分
+        return read_response_length(count)
+    return None
+
+
+def classify_response(response, slave, function, expected_length):
+    """
+    判断响应帧的结果类型
+    :param response: 收到的字节
+    :param slave: 期望的从站地址
+    :param function: 请求的功能码
+    :param expected_length: 正常响应的帧长度
+    :return: (结果类型 RESULT_*, 异常码或 None)
+    """
+    if not response:
+        return RESULT_TIMEOUT, None
+    if len(response) >= 5 and response[1] == (function | 0x80) and check_crc(response[:5]):
+        if response[0] != slave:
+            return RESULT_SLAVE_MISMATCH, None
+        return RESULT_EXCEPTION, response[2]
+    if len(response) < expected_length:
+        return RESULT_SHORT, None
+    if not check_crc(response[:expected_length]):
+        return RESULT_CRC, None
+    if response[0] != slave:
+        return RESULT_SLAVE_MISMATCH, None
+    if response[1] != function:
+        return RESULT_FUNCTION_ERROR, None
+    return RESULT_OK, None
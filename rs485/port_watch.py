@@ -0,0 +1,118 @@
+import os
+import sys
+import time
+
+# udev 按适配器型号和序列号生成的链接，拔插或 ttyUSB 编号变化后名称不变
+BY_ID_DIR = "/dev/serial/by-id"
+
+# PortWatcher.check 返回的事件
+PORT_REMOVED = 'removed'
+PORT_RESTORED = 'restored'
+
+
+def _by_id_links():
+    """:return: {by-id 链接: 实际设备}，最后一个 USB 串口拔出后目录本身会消失"""
+    try:
+        names = os.listdir(BY_ID_DIR)
+    except OSError:
+        return {}
+    links = {}
+    for name in names:
+        path = os.path.join(BY_ID_DIR, name)
+        links[path] = os.path.realpath(path)
+    return links
+
+
+def stable_port_id(device):
+    """
+    串口的稳定标识：Linux 下为 /dev/serial/by-id 链接，其他平台为带序列号的硬件ID，
+    都拿不到时 (板载串口等) 使用设备名本身
+    """
+    if sys.platform.startswith('linux'):
+        real = os.path.realpath(device)
+        for link, target in _by_id_links().items():
+            if target == real:
+                return link
+        return device
+    try:
+        from serial.tools import list_ports
+        for info in list_ports.comports():
+            if info.device == device and info.serial_number:
+                return info.hwid
+    except Exception:
+        pass
+    return device
+
+
+def resolve_port(port_id):
+    """
+    :param port_id: stable_port_id 返回的标识
+    :return: 当前对应的设备名，设备不存在时返回 None
+    """
+    if port_id.startswith(BY_ID_DIR):
+        return os.path.realpath(port_id) if os.path.exists(port_id) else None
+    if port_id.startswith('/dev/'):
+        return port_id if os.path.exists(port_id) else None
+    try:
+        from serial.tools import list_ports
+        for info in list_ports.comports():
+            if port_id in (info.hwid, info.device):
+                return info.device
+    except Exception:
+        pass
+    return None
+
+
+class PortWatcher:
+    def __init__(self, device, max_gaps=1000):
+        """
+        监视一个已打开串口的拔出和重新插入，记录每次断开的时长
+        Linux 下每次检查只是一次 /dev/serial/by-id 的 listdir (或 stat)，可以每0.5秒调用；
+        适配器重新插入后编号变化 (ttyUSB0 -> ttyUSB1) 也能按稳定标识找回
+        :param device: 已打开的设备名
+        :param max_gaps: 最多保留的间断记录条数
+        """
+        self.port_id = stable_port_id(device)
+        self.device = device
+        self.max_gaps = max_gaps
+        self.removed_ns = None
+        self.gap_count = 0
+        self.gaps = []  # [(断开时间 monotonic_ns, 间断时长ns)]
+
+    @property
+    def removed(self):
+        return self.removed_ns is not None
+
+    def mark_removed(self, removed_ns=None):
+        """读写出错时调用，不必等到下一次检查"""
+        if self.removed_ns is None:
+            self.removed_ns = time.monotonic_ns() if removed_ns is None else removed_ns
+
+    def check(self):
+        """
+        :return: PORT_REMOVED (设备消失)、PORT_RESTORED (设备已重新出现，新设备名见 device) 或 None
+                 重新打开失败时 (如 udev 还没设置好权限) 下一次检查会再次返回 PORT_RESTORED
+        """
+        device = resolve_port(self.port_id)
+        if self.removed_ns is None:
+            if device is None:
+                self.mark_removed()
+                return PORT_REMOVED
+            return None
+        if device is None:
+            return None
+        self.device = device
+        return PORT_RESTORED
+
+    def mark_restored(self):
+        """
+        重新打开成功后调用
+        :return: 本次间断时长 (ns)
+        """
+        now_ns = time.monotonic_ns()
+        gap_ns = now_ns - self.removed_ns
+        self.gap_count += 1
+        if len(self.gaps) < self.max_gaps:
+            self.gaps.append((self.removed_ns, gap_ns))
+        self.removed_ns = None
+        return gap_ns
@@ -0,0 +1,163 @@
+import time
+import struct
+import threading
+from concurrent.futures import Future
+
+# 读功能码 -> 写入后需要失效的缓存对应的读功能码
+READ_FUNCTIONS = (0x01, 0x02, 0x03, 0x04)
+WRITE_TARGETS = {0x05: 0x01, 0x0F: 0x01, 0x06: 0x03, 0x10: 0x03, 0x17: 0x03}
+
+
+class _Inflight:
+    __slots__ = ('future', 'readers')
+
+    def __init__(self, future):
+        self.future = future  # 总线事务的 Future，只由 CachedBus 持有
+        self.readers = 0  # 尚未取消的读者数
+
+
+class CachedBus:
+    def __init__(self, bus, default_ttl=0.0):
+        """
+        RtuBus 前面的读缓存
+        - 缓存有效期内的相同读请求直接返回缓存的响应
+        - 正在进行中的相同读请求合并为同一个总线事务，读者再多总线负载也不变
+        - 写请求使重叠地址的缓存失效
+        :param bus: RtuBus (或提供 submit/name/close 的对象)
+        :param default_ttl: 默认缓存有效期 (秒)，0 表示只合并进行中的请求不缓存
+        """
+        self.bus = bus
+        self.name = bus.name
+        self.default_ttl = default_ttl
+        self.ttls = {}  # {(从站, 地址): 有效期}
+        self._cache = {}  # {(从站, 功能码, 地址, 数量): (过期时间ns, 响应PDU)}
+        self._inflight = {}  # {(从站, 功能码, 地址, 数量): Future}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    def set_ttl(self, slave, address, ttl, count=1):
+        """设置寄存器的缓存有效期 (秒)"""
+        with self._lock:
+            for register in range(address, address + count):
+                self.ttls[(slave, register)] = ttl
+
+    def _ttl(self, slave, address, count):
+        # 一次读取覆盖多个寄存器时取其中最短的有效期
+        ttls = self.ttls
+        if not ttls:
+            return self.default_ttl
+        return min(ttls.get((slave, register), self.default_ttl) for register in range(address, address + count))
+
+    def submit(self, slave, pdu, priority=None):
+        """
+        与 RtuBus.submit 相同，读请求可能直接返回已完成的 Future
+        合并的读请求每个读者各有一个 Future，读者取消自己的 Future 不影响其他读者，
+        全部读者都取消后才取消还在排队的总线事务
+        """
+        pdu = bytes(pdu)
+        function = pdu[0]
+        if function in READ_FUNCTIONS and len(pdu) == 5 and slave != 0:
+            return self._submit_read(slave, pdu, priority)
+        if function in WRITE_TARGETS and len(pdu) >= 5:
+            address, count = struct.unpack('>HH', pdu[1:5])
+            if function in (0x05, 0x06):
+                count = 1
+            elif function == 0x17:
+                # 读写多个寄存器：写入地址和数量在读取部分之后
+                address, count = struct.unpack('>HH', pdu[5:9]) if len(pdu) >= 9 else (0, 0x10000)
+            # 广播写入对线路上所有从站生效
+            self.invalidate(slave or None, WRITE_TARGETS[function], address, count)
+        return self.bus.submit(slave, pdu, priority)
+
+    def execute(self, slave, pdu, timeout=5.0, priority=None):
+        return self.submit(slave, pdu, priority).result(timeout)
+
+    def _submit_read(self, slave, pdu, priority):
+        address, count = struct.unpack('>HH', pdu[1:5])
+        key = (slave, pdu[0], address, count)
+        now = time.monotonic_ns()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] > now:
+                self.hits += 1
+                future = Future()
+                future.set_result(cached[1])
+                return future
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                self.coalesced += 1
+                return self._join(key, inflight)
+            self.misses += 1
+            ttl = self._ttl(slave, address, count)
+            inflight = self._inflight[key] = _Inflight(self.bus.submit(slave, pdu, priority))
+            reader = self._join(key, inflight)
+        inflight.future.add_done_callback(lambda f: self._store(key, f, ttl))
+        return reader
+
+    def _join(self, key, inflight):
+        """为一个读者创建跟随总线事务结果的 Future (调用时持有 self._lock)"""
+        reader = Future()
+        inflight.readers += 1
+
+        def forward(future):
+            if future.cancelled():
+                reader.cancel()
+            elif reader.set_running_or_notify_cancel():
+                if future.exception() is not None:
+                    reader.set_exception(future.exception())
+                else:
+                    reader.set_result(future.result())
+
+        def release(future):
+            if not future.cancelled():
+                return
+            with self._lock:
+                inflight.readers -= 1
+                if inflight.readers:
+                    return
+                # 最后一个读者也放弃了，后来的读者重新提交
+                if self._inflight.get(key) is inflight:
+                    del self._inflight[key]
+            inflight.future.cancel()
+
+        reader.add_done_callback(release)
+        inflight.future.add_done_callback(forward)
+        return reader
+
+    def _store(self, key, future, ttl):
+        with self._lock:
+            # 已被写请求失效或全部读者已取消的事务不再写入缓存
+            inflight = self._inflight.get(key)
+            if inflight is None or inflight.future is not future:
+                return
+            del self._inflight[key]
+            if ttl <= 0 or future.cancelled() or future.exception() is not None:
+                return
+            response = future.result()
+            if response and not response[0] & 0x80:
+                self._cache[key] = (time.monotonic_ns() + int(ttl * 1e9), response)
+
+    def invalidate(self, slave=None, function=None, address=0, count=0x10000):
+        """
+        使与指定地址范围重叠的缓存失效，不带参数时清空全部缓存
+        进行中的重叠读请求不再被后来的读者共享，因为它可能读到写入之前的值
+        """
+        end = address + count
+        with self._lock:
+            for table in (self._cache, self._inflight):
+                for key in list(table):
+                    key_slave, key_function, key_address, key_count = key
+                    if slave is not None and key_slave != slave:
+                        continue
+                    if function is not None and key_function != function:
+                        continue
+                    if key_address < end and address < key_address + key_count:
+                        del table[key]
+
+    def stats(self):
+        return {'hits': self.hits, 'coalesced': self.coalesced, 'misses': self.misses}
+
+    def close(self):
+        self.bus.close()
@@ -0,0 +1,129 @@
+import threading
+from array import array
+
+
+class RingBuffer:
+    def __init__(self, capacity):
+        """
+        预分配环形缓冲区，保存纳秒时间戳和数值
+        :param capacity: 缓冲区容量 (样本个数)
+        """
+        if capacity <= 0:
+            raise ValueError("缓冲区容量必须大于0")
+        self.capacity = capacity
+        # 一次性分配内存，采集过程中不再扩容
+        self.timestamps = array('q', bytes(8 * capacity))
+        self.values = array('d', bytes(8 * capacity))
+        self.total = 0  # 累计写入的样本数 (包含已被覆盖的)
+        self._lock = threading.Lock()
+
+    def append(self, timestamp_ns, value):
+        """
+        写入一个样本，缓冲区满时覆盖最旧的样本
+        :param timestamp_ns: 纳秒时间戳
+        :param value: 数值
+        """
+        with self._lock:
+            index = self.total % self.capacity
+            self.timestamps[index] = timestamp_ns
+            self.values[index] = value
+            self.total += 1
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def snapshot_arrays(self, count=None):
+        """
+        按时间顺序复制最近的样本 (array 切片在C层完成，适合大量数据)
+        :param count: 取出的样本个数 (默认全部)
+        :return: (时间戳 array('q'), 数值 array('d'))
+        """
+        with self._lock:
+            size = min(self.total, self.capacity)
+            if count is None or count > size:
+                count = size
+            end = self.total % self.capacity
+            if end == 0 and count > 0:
+                end = self.capacity
+            start = end - count
+            if start >= 0:
+                return self.timestamps[start:end], self.values[start:end]
+            # 跨越缓冲区末尾，分两段拼接
+            return (self.timestamps[start:] + self.timestamps[:end],
+                    self.values[start:] + self.values[:end])
+
+    def snapshot(self, count=None):
+        """
+        按时间顺序取出最近的样本
+        :param count: 取出的样本个数 (默认全部)
+        :return: (时间戳列表, 数值列表)
+        """
+        timestamps, values = self.snapshot_arrays(count)
+        return timestamps.tolist(), values.tolist()
+
+    def clear(self):
+        with self._lock:
+            self.total = 0
+
+
+class RateMonitor:
+    def __init__(self, gap_factor=3.0, warmup=10, max_gaps=1000):
+        """
+        在线统计实际采样率并检测采样间断
+        :param gap_factor: 间隔超过平均间隔的倍数即判定为间断
+        :param warmup: 开始判定间断前需要的样本数
+        :param max_gaps: 最多保留的间断记录条数
+        """
+        self.gap_factor = gap_factor
+        self.warmup = warmup
+        self.max_gaps = max_gaps
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.errors = 0
+        self.first_ns = None
+        self.last_ns = None
+        self.gap_count = 0
+        self.gaps = []  # [(间断开始时间戳, 间断时长ns)]
+
+    def update(self, timestamp_ns):
+        """记录一个成功样本的时间戳"""
+        if self.last_ns is None:
+            self.first_ns = timestamp_ns
+        else:
+            interval = timestamp_ns - self.last_ns
+            # 平均间隔使用间断之前的数据计算，避免被本次间隔拉高
+            if self.count >= self.warmup:
+                mean_interval = (self.last_ns - self.first_ns) / (self.count - 1)
+                if interval > self.gap_factor * mean_interval:
+                    self.gap_count += 1
+                    if len(self.gaps) < self.max_gaps:
+                        self.gaps.append((self.last_ns, interval))
+        self.last_ns = timestamp_ns
+        self.count += 1
+
+    def error(self):
+        """记录一次失败的读取"""
+        self.errors += 1
+
+    @property
+    def rate_hz(self):
+        if self.count < 2 or self.last_ns == self.first_ns:
+            return 0.0
+        return (self.count - 1) * 1e9 / (self.last_ns - self.first_ns)
+
+    def report(self):
+        """
+        生成采集报告
+        :return: 包含样本数、时长、采样率、错误数和间断信息的字典
+        """
+        duration_s = 0.0 if self.count < 2 else (self.last_ns - self.first_ns) / 1e9
+        return {
+            'samples': self.count,
+            'errors': self.errors,
+            'duration_s': duration_s,
+            'rate_hz': self.rate_hz,
+            'gap_count': self.gap_count,
+            'gaps': list(self.gaps),
+        }
@@ -0,0 +1,133 @@
+import math
+from collections import deque
+
+
+class RollingStats:
+    def __init__(self, window_seconds):
+        """
+        时间窗口内的滚动统计，每个样本均摊 O(1)
+        最小/最大值用单调队列，均值/方差用可删除的 Welford 更新
+        :param window_seconds: 窗口长度 (秒)
+        """
+        self.window_ns = int(window_seconds * 1e9)
+        self.window_seconds = window_seconds
+        self._samples = deque()   # (时间戳, 数值, 序号)
+        self._min_queue = deque()  # (序号, 数值)，数值单调递增
+        self._max_queue = deque()  # (序号, 数值)，数值单调递减
+        self._seq = 0
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, timestamp_ns, value):
+        seq = self._seq
+        self._seq += 1
+        self._samples.append((timestamp_ns, value, seq))
+
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+        min_queue = self._min_queue
+        while min_queue and min_queue[-1][1] >= value:
+            min_queue.pop()
+        min_queue.append((seq, value))
+        max_queue = self._max_queue
+        while max_queue and max_queue[-1][1] <= value:
+            max_queue.pop()
+        max_queue.append((seq, value))
+
+        self._evict(timestamp_ns - self.window_ns)
+
+    def _evict(self, oldest_ns):
+        samples = self._samples
+        while samples and samples[0][0] < oldest_ns:
+            _, value, seq = samples.popleft()
+            if self.count == 1:
+                self.count = 0
+                self.mean = 0.0
+                self._m2 = 0.0
+            else:
+                # Welford 反向更新
+                self.count -= 1
+                delta = value - self.mean
+                self.mean -= delta / self.count
+                self._m2 -= delta * (value - self.mean)
+            if self._min_queue and self._min_queue[0][0] == seq:
+                self._min_queue.popleft()
+            if self._max_queue and self._max_queue[0][0] == seq:
+                self._max_queue.popleft()
+
+    @property
+    def min(self):
+        return self._min_queue[0][1] if self._min_queue else None
+
+    @property
+    def max(self):
+        return self._max_queue[0][1] if self._max_queue else None
+
+    @property
+    def std(self):
+        if self.count < 2:
+            return 0.0
+        # 反复增删后可能出现极小的负数舍入误差
+        return math.sqrt(max(self._m2, 0.0) / (self.count - 1))
+
+    @property
+    def peak_to_peak(self):
+        if not self._min_queue:
+            return None
+        return self._max_queue[0][1] - self._min_queue[0][1]
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean if self.count else None,
+            'std': self.std,
+            'peak_to_peak': self.peak_to_peak,
+        }
+
+
+class ChannelStats:
+    def __init__(self, windows=(10, 60, 600)):
+        """
+        按 (从站, 寄存器) 分别维护多个时间窗口的滚动统计
+        :param windows: 窗口长度列表 (秒)
+        """
+        self.windows = tuple(windows)
+        self.channels = {}
+
+    def add(self, slave, register, timestamp_ns, value):
+        stats = self.channels.get((slave, register))
+        if stats is None:
+            stats = self.channels[(slave, register)] = [RollingStats(w) for w in self.windows]
+        for rolling in stats:
+            rolling.add(timestamp_ns, value)
+
+    def add_batch(self, batch):
+        """加入一个 SampleBatch 中的全部样本"""
+        channels = self.channels
+        for slave, register, timestamp_ns, value in zip(batch.slaves, batch.registers, batch.timestamps, batch.values):
+            stats = channels.get((slave, register))
+            if stats is None:
+                stats = channels[(slave, register)] = [RollingStats(w) for w in self.windows]
+            for rolling in stats:
+                rolling.add(timestamp_ns, value)
+
+    def rows(self):
+        """
+        :return: [(从站, 寄存器, 窗口秒数, 统计字典)]，按从站和寄存器排序
+        """
+        rows = []
+        for (slave, register), stats in sorted(self.channels.items()):
+            for rolling in stats:
+                rows.append((slave, register, rolling.window_seconds, rolling.summary()))
+        return rows
+
+    def reset(self, windows=None):
+        if windows is not None:
+            self.windows = tuple(windows)
+        self.channels.clear()
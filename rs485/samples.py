@@ -0,0 +1,99 @@
+from array import array
+
+# 样本状态标志 (可组合)
+STATUS_OK = 0x00
+STATUS_SUPPRESSED = 0x01  # 未超出死区，不输出到界面和记录
+STATUS_ALARM = 0x02  # 该样本触发了报警
+STATUS_ACTIVE_SEND = 0x04  # 来自仪表主动发送，没有请求时间
+
+# 导出列，与 Sample 字段的对应关系见 SampleBatch.rows()
+SAMPLE_FIELDS = ['slave', 'register', 'value', 'send_ns', 'first_byte_ns', 'complete_ns']
+
+
+class Sample:
+    __slots__ = ('slave', 'register', 'timestamp_ns', 'value', 'status', 'first_byte_ns', 'complete_ns')
+
+    def __init__(self, slave, register, timestamp_ns, value, status=STATUS_OK, first_byte_ns=None, complete_ns=None):
+        """
+        单个样本
+        :param timestamp_ns: 采样时间 (请求发送时间或数据到达时间，time.monotonic_ns)
+        :param status: STATUS_* 标志
+        """
+        self.slave = slave
+        self.register = register
+        self.timestamp_ns = timestamp_ns
+        self.value = value
+        self.status = status
+        self.first_byte_ns = first_byte_ns
+        self.complete_ns = complete_ns
+
+
+class SampleBatch:
+    __slots__ = ('timestamps', 'values', 'registers', 'slaves', 'status', 'first_byte', 'complete')
+
+    def __init__(self):
+        """
+        列式存储的一批样本，每个样本约 36 字节 (Python 字典约 1KB)
+        时间戳为 int64，数值为 float64，寄存器为 uint16，从站和状态为 uint8；没有的时间记为 0
+        """
+        self.timestamps = array('q')
+        self.values = array('d')
+        self.registers = array('H')
+        self.slaves = array('B')
+        self.status = array('B')
+        self.first_byte = array('q')
+        self.complete = array('q')
+
+    def append(self, slave, register, timestamp_ns, value, status=STATUS_OK, first_byte_ns=None, complete_ns=None):
+        self.timestamps.append(timestamp_ns)
+        self.values.append(value)
+        self.registers.append(register)
+        self.slaves.append(slave)
+        self.status.append(status)
+        self.first_byte.append(first_byte_ns or 0)
+        self.complete.append(complete_ns or 0)
+
+    def add(self, sample):
+        self.append(sample.slave, sample.register, sample.timestamp_ns, sample.value, sample.status,
+                    sample.first_byte_ns, sample.complete_ns)
+
+    def extend(self, other):
+        for name in SampleBatch.__slots__:
+            getattr(self, name).extend(getattr(other, name))
+
+    def select(self, exclude_status):
+        """:return: 不含任一 exclude_status 标志的样本组成的新批次"""
+        result = SampleBatch()
+        status = self.status
+        for i in range(len(status)):
+            if not status[i] & exclude_status:
+                for name in SampleBatch.__slots__:
+                    getattr(result, name).append(getattr(self, name)[i])
+        return result
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        return Sample(self.slaves[index], self.registers[index], self.timestamps[index], self.values[index],
+                      self.status[index], self.first_byte[index] or None, self.complete[index] or None)
+
+    def __iter__(self):
+        for i in range(len(self.values)):
+            yield self[i]
+
+    def rows(self):
+        """按 SAMPLE_FIELDS 顺序逐行输出 (导出CSV用)，主动发送的样本没有 send_ns"""
+        for slave, register, value, timestamp_ns, status, first_byte_ns, complete_ns in zip(
+                self.slaves, self.registers, self.values, self.timestamps, self.status, self.first_byte,
+                self.complete):
+            send_ns = None if status & STATUS_ACTIVE_SEND else timestamp_ns
+            yield slave, register, value, send_ns, first_byte_ns or None, complete_ns or None
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).itemsize * len(self.values) for name in SampleBatch.__slots__)
+
+    def clear(self):
+        for name in SampleBatch.__slots__:
+            del getattr(self, name)[:]
@@ -0,0 +1,90 @@
+import time
+import threading
+from collections import deque
+
+# 优先级，数值越小越优先
+PRIORITY_CONTROL = 0  # 操作员写入、清零/去皮
+PRIORITY_ALARM = 1  # 报警检查
+PRIORITY_POLL = 2  # 后台轮询
+PRIORITY_LEVELS = 3
+
+
+class TransactionScheduler:
+    def __init__(self, max_wait=1.0, max_burst=8):
+        """
+        总线事务的优先级队列：同一优先级先进先出，高优先级的事务插到后台轮询前面
+        为避免低优先级事务被饿死:
+        - 任一事务等待超过 max_wait 秒后优先执行 (有界等待)
+        - 低优先级有事务在等时，高优先级最多连续执行 max_burst 个 (公平性)
+        :param max_wait: 最长等待时间 (秒)
+        :param max_burst: 高优先级连续执行的最大个数
+        """
+        self.max_wait = max_wait
+        self.max_burst = max_burst
+        self._queues = [deque() for _ in range(PRIORITY_LEVELS)]
+        self._streak = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def put(self, item, priority=PRIORITY_POLL):
+        with self._condition:
+            self._queues[priority].append((time.monotonic(), item))
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """
+        取出下一个要执行的事务，队列为空时阻塞
+        :return: 事务，超时或已关闭时返回 None
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._closed or len(self), timeout):
+                return None
+            if self._closed:
+                return None
+            return self._pop()
+
+    def get_nowait(self):
+        """取出下一个事务，队列为空时返回 None"""
+        with self._condition:
+            return self._pop() if len(self) else None
+
+    def _pop(self):
+        queues = self._queues
+        now = time.monotonic()
+        waiting = [q for q in queues if q]
+        overdue = [q for q in waiting if now - q[0][0] >= self.max_wait]
+        if overdue:
+            queue = min(overdue, key=lambda q: q[0][0])
+        elif len(waiting) > 1 and self._streak >= self.max_burst:
+            # 让等待最久的低优先级事务先执行一个
+            queue = min(waiting[1:], key=lambda q: q[0][0])
+        else:
+            queue = waiting[0]
+        if queue is waiting[0] and len(waiting) > 1:
+            self._streak += 1
+        else:
+            self._streak = 0
+        return queue.popleft()[1]
+
+    def discard(self, priority):
+        """丢弃某一优先级的全部待执行事务"""
+        with self._condition:
+            self._queues[priority].clear()
+
+    def pending(self, priority):
+        return len(self._queues[priority])
+
+    def clear(self):
+        with self._condition:
+            for queue in self._queues:
+                queue.clear()
+            self._streak = 0
+
+    def close(self):
+        """唤醒所有等待的 get()，之后 get() 返回 None"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def __len__(self):
+        return sum(len(queue) for queue in self._queues)
@@ -0,0 +1,89 @@
+import time
+import threading
+
+from PyQt5.QtCore import QObject, QSocketNotifier, pyqtSignal
+
+
+class SerialReceiver(QObject):
+    # (收到的数据, 到达时间 time.monotonic_ns)
+    data_received = pyqtSignal(bytes, object)
+    error = pyqtSignal(str)
+
+    def __init__(self, port, parent=None):
+        """
+        事件驱动的串口接收：数据一到就处理，空闲时不占用CPU
+        有文件描述符的平台 (Linux/macOS) 用 QSocketNotifier 监听可读事件，
+        否则 (Windows) 用后台线程阻塞读取，通过信号送回界面线程
+        :param port: 已打开的 serial.Serial
+        """
+        super().__init__(parent)
+        self.port = port
+        self._notifier = None
+        self._thread = None
+        self._running = False
+        self._saved_timeout = None
+
+    def start(self):
+        self._running = True
+        try:
+            fd = self.port.fileno()
+        except Exception:
+            fd = None
+        if fd is not None:
+            self._notifier = QSocketNotifier(fd, QSocketNotifier.Read, self)
+            self._notifier.activated.connect(self._on_ready)
+        else:
+            # 无超时阻塞读，停止时通过 cancel_read 唤醒，并恢复原来的超时供同步读写使用
+            self._saved_timeout = self.port.timeout
+            self.port.timeout = None
+            self._thread = threading.Thread(target=self._read_loop, name="SerialReceiver", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._notifier is not None:
+            self._notifier.setEnabled(False)
+            self._notifier.deleteLater()
+            self._notifier = None
+        if self._thread is not None:
+            try:
+                self.port.cancel_read()
+            except Exception:
+                pass
+            self._thread.join(1.0)
+            self._thread = None
+            try:
+                self.port.timeout = self._saved_timeout
+            except Exception:
+                pass  # 设备已断开，重新打开时会设置新的超时
+
+    def _on_ready(self):
+        receive_ns = time.monotonic_ns()
+        try:
+            waiting = self.port.in_waiting
+            if not waiting:
+                # 可读但没有数据，说明设备已断开
+                raise OSError("串口设备已断开")
+            data = self.port.read(waiting)
+        except Exception as e:
+            self.stop()
+            self.error.emit(str(e))
+            return
+        if data:
+            self.data_received.emit(data, receive_ns)
+
+    def _read_loop(self):
+        port = self.port
+        while self._running:
+            try:
+                data = port.read(1)
+                receive_ns = time.monotonic_ns()
+                if data and port.in_waiting:
+                    data += port.read(port.in_waiting)
+            except Exception as e:
+                if self._running:
+                    self._running = False
+                    self.error.emit(str(e))
+                return
+            if data:
+                self.data_received.emit(data, receive_ns)
@@ -0,0 +1,45 @@
+from rs485.json_store import config_path, read_json, write_json
+
+DEFAULT_SESSION_PATH = config_path("sessions.json")
+DEFAULT_PROFILE = "默认"
+
+
+class SessionStore:
+    def __init__(self, path=DEFAULT_SESSION_PATH):
+        """
+        按名称保存的会话配置 (串口稳定标识、通讯参数、从站、寄存器、缩放、轮询周期等)，
+        并记录最近使用的配置，程序启动时直接套用
+        :param path: 文件路径，不同程序使用不同文件
+        """
+        self.path = path
+
+    def names(self):
+        return sorted(read_json(self.path).get('profiles', {}))
+
+    def last_name(self):
+        """:return: 最近保存或加载的配置名，没有时返回 None"""
+        return read_json(self.path).get('last')
+
+    def load(self, name):
+        """
+        :return: 配置字典，不存在时返回 None
+        """
+        data = read_json(self.path)
+        profile = data.get('profiles', {}).get(name)
+        if profile is not None and data.get('last') != name:
+            data['last'] = name
+            write_json(self.path, data)
+        return profile
+
+    def save(self, name, profile):
+        data = read_json(self.path)
+        data.setdefault('profiles', {})[name] = profile
+        data['last'] = name
+        write_json(self.path, data)
+
+    def remove(self, name):
+        data = read_json(self.path)
+        data.get('profiles', {}).pop(name, None)
+        if data.get('last') == name:
+            data.pop('last')
+        write_json(self.path, data)
@@ -0,0 +1,325 @@
+import sys
+import math
+import time
+import random
+import struct
+from collections import deque
+
+from rs485.modbus_rtu import RESULT_OK, RESULTS, append_crc, build_read_request, check_crc, classify_response
+from rs485.transport import read_response, transact
+
+
+class _RxQueue:
+    def __init__(self):
+        """按到达时间排列的接收数据，模拟串口驱动的输入缓冲区"""
+        self._chunks = deque()  # [到达时间, 数据]
+
+    def put(self, data, ready):
+        if not data:
+            return
+        chunks = self._chunks
+        if chunks and chunks[-1][0] > ready:
+            # 较早到达的数据 (如延迟帧之后的正常帧) 按时间插入
+            index = len(chunks)
+            while index > 0 and chunks[index - 1][0] > ready:
+                index -= 1
+            chunks.insert(index, [ready, bytes(data)])
+        else:
+            chunks.append([ready, bytes(data)])
+
+    def available(self, now):
+        return sum(len(data) for ready, data in self._chunks if ready <= now)
+
+    def read(self, size, timeout):
+        """与 pyserial 相同：凑够 size 字节或超时后返回"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        chunks = self._chunks
+        out = bytearray()
+        while len(out) < size:
+            now = time.monotonic()
+            while chunks and chunks[0][0] <= now and len(out) < size:
+                ready, data = chunks[0]
+                take = size - len(out)
+                out += data[:take]
+                if take >= len(data):
+                    chunks.popleft()
+                else:
+                    chunks[0][1] = data[take:]
+            if len(out) >= size:
+                break
+            if not chunks:
+                # 没有即将到达的数据，阻塞读取直接等到超时
+                if deadline is not None:
+                    time.sleep(max(0.0, deadline - now))
+                break
+            wake = chunks[0][0] if deadline is None else min(chunks[0][0], deadline)
+            if deadline is not None and now >= deadline:
+                break
+            time.sleep(max(0.0, wake - now))
+        return bytes(out)
+
+    def clear(self, now):
+        """丢弃已到达的数据，尚在线路上的数据之后仍会到达"""
+        chunks = self._chunks
+        while chunks and chunks[0][0] <= now:
+            chunks.popleft()
+
+
+class SimulatedMeter:
+    def __init__(self, slave=1, baudrate=115200, turnaround=0.001, size=0x1000, timeout=1.0, port="SIM"):
+        """
+        内存中的 Modbus-RTU 仪表，接口与 serial.Serial 相同，可直接传给 transact / RtuBus
+        支持 03/04 读寄存器、06/10 写寄存器和广播写入，按波特率模拟帧传输时间
+        :param slave: 从站地址
+        :param turnaround: 仪表处理时间 (秒)
+        :param size: 寄存器数量，超出范围返回异常码 02
+        """
+        self.port = port
+        self.slave = slave
+        self.baudrate = baudrate
+        self.bytesize = 8
+        self.parity = 'N'
+        self.stopbits = 1
+        self.timeout = timeout
+        self.turnaround = turnaround
+        self.char_time = 10 / baudrate
+        self.registers = [0] * size
+        self.is_open = True
+        self.requests = 0
+        self._request = bytearray()
+        self._rx = _RxQueue()
+
+    def set_float(self, address, value):
+        self.registers[address], self.registers[address + 1] = struct.unpack('>HH', struct.pack('>f', value))
+
+    def set_long(self, address, value):
+        self.registers[address], self.registers[address + 1] = struct.unpack('>HH', struct.pack('>i', value))
+
+    # serial.Serial 接口
+    def write(self, data):
+        self._request += data
+        now = time.monotonic()
+        while len(self._request) >= 8:
+            length = 9 + self._request[6] if self._request[1] == 0x10 else 8
+            if len(self._request) < length:
+                break
+            frame = bytes(self._request[:length])
+            del self._request[:length]
+            response = self._handle(frame)
+            if response:
+                sent = now + len(frame) * self.char_time
+                self._rx.put(response, sent + self.turnaround + len(response) * self.char_time)
+        return len(data)
+
+    def read(self, size=1):
+        return self._rx.read(size, self.timeout)
+
+    @property
+    def in_waiting(self):
+        return self._rx.available(time.monotonic())
+
+    def reset_input_buffer(self):
+        self._rx.clear(time.monotonic())
+
+    def reset_output_buffer(self):
+        self._request.clear()
+
+    def flush(self):
+        pass
+
+    def fileno(self):
+        raise OSError("模拟串口没有文件描述符")
+
+    def close(self):
+        self.is_open = False
+
+    def _handle(self, frame):
+        if not check_crc(frame):
+            return None
+        slave, function = frame[0], frame[1]
+        if slave not in (0, self.slave):
+            return None
+        self.requests += 1
+        registers = self.registers
+        address, count = struct.unpack('>HH', frame[2:6])
+        if function in (0x03, 0x04):
+            if not 1 <= count <= 125 or address + count > len(registers):
+                return None if slave == 0 else self._exception(function, 0x02)
+            data = struct.pack(f'>{count}H', *registers[address:address + count])
+            response = bytes([slave, function, len(data)]) + data
+        elif function == 0x06:
+            if address >= len(registers):
+                return None if slave == 0 else self._exception(function, 0x02)
+            registers[address] = count
+            response = frame[:6]
+        elif function == 0x10:
+            if address + count > len(registers) or frame[6] != 2 * count:
+                return None if slave == 0 else self._exception(function, 0x02)
+            registers[address:address + count] = struct.unpack(f'>{count}H', frame[7:7 + 2 * count])
+            response = frame[:6]
+        else:
+            return None if slave == 0 else self._exception(function, 0x01)
+        # 广播写入不响应
+        return None if slave == 0 else append_crc(response)
+
+    def _exception(self, function, code):
+        return append_crc(bytes([self.slave, function | 0x80, code]))
+
+
+# 故障类型
+FAULT_NOISE = 'noise'  # 响应前后混入随机字节
+FAULT_BIT_FLIP = 'bit_flip'  # 响应中一位翻转
+FAULT_DROP_BYTE = 'drop_byte'  # 响应丢失一个字节
+FAULT_DELAY = 'delay'  # 响应晚于超时到达，成为下一次请求前的残留数据
+FAULT_DUPLICATE = 'duplicate'  # 响应重复发送一次
+FAULT_EXCEPTION = 'exception'  # 仪表返回异常响应 (从站设备忙)
+FAULT_TYPES = (FAULT_NOISE, FAULT_BIT_FLIP, FAULT_DROP_BYTE, FAULT_DELAY, FAULT_DUPLICATE, FAULT_EXCEPTION)
+
+
+class FaultInjector:
+    def __init__(self, port, rates=None, delay=None, seed=None):
+        """
+        包在串口外面的故障注入器，接口与 serial.Serial 相同
+        每次写入请求后读回完整响应，按设定概率加入故障后再交给调用方读取
+        :param port: serial.Serial 或 SimulatedMeter
+        :param rates: {故障类型: 每个响应发生的概率}
+        :param delay: 延迟帧的延迟时间 (秒)，默认为读超时的1.5倍
+        :param seed: 随机种子，相同种子可复现同样的故障序列
+        """
+        self.port = port
+        self.rates = dict(rates or {})
+        self.delay = delay
+        self.random = random.Random(seed)
+        self.injected = dict.fromkeys(FAULT_TYPES, 0)
+        self._rx = _RxQueue()
+
+    def __getattr__(self, name):
+        # 未覆盖的属性 (波特率、端口名等) 直接使用原串口的
+        return getattr(self.port, name)
+
+    @property
+    def timeout(self):
+        return self.port.timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self.port.timeout = value
+
+    def _hit(self, fault):
+        rate = self.rates.get(fault, 0.0)
+        if rate and self.random.random() < rate:
+            self.injected[fault] += 1
+            return True
+        return False
+
+    def write(self, data):
+        written = self.port.write(data)
+        request = bytes(data)
+        response, _, _ = read_response(self.port)
+        now = time.monotonic()
+        rnd = self.random
+        if response and request[0] != 0 and self._hit(FAULT_EXCEPTION):
+            response = append_crc(bytes([request[0], request[1] | 0x80, 0x06]))
+        response = bytearray(response)
+        if response and self._hit(FAULT_DROP_BYTE):
+            del response[rnd.randrange(len(response))]
+        if response and self._hit(FAULT_BIT_FLIP):
+            response[rnd.randrange(len(response))] ^= 1 << rnd.randrange(8)
+        if self._hit(FAULT_NOISE):
+            noise = bytes(rnd.randrange(256) for _ in range(rnd.randint(1, 4)))
+            if rnd.random() < 0.5:
+                response = noise + response
+            else:
+                response += noise
+        if response and self._hit(FAULT_DUPLICATE):
+            response = response * 2
+        ready = now
+        if response and self._hit(FAULT_DELAY):
+            ready = now + (self.delay if self.delay is not None else 1.5 * (self.port.timeout or 0.1))
+        self._rx.put(response, ready)
+        return written
+
+    def read(self, size=1):
+        return self._rx.read(size, self.port.timeout)
+
+    @property
+    def in_waiting(self):
+        return self._rx.available(time.monotonic())
+
+    def reset_input_buffer(self):
+        self._rx.clear(time.monotonic())
+        self.port.reset_input_buffer()
+
+
+# 基准测试的故障组合
+FAULT_MIXES = [
+    ("无故障", {}),
+    ("线路噪声 5%", {FAULT_NOISE: 0.05}),
+    ("位翻转 5%", {FAULT_BIT_FLIP: 0.05}),
+    ("丢字节 5%", {FAULT_DROP_BYTE: 0.05}),
+    ("延迟帧 5%", {FAULT_DELAY: 0.05}),
+    ("重复帧 5%", {FAULT_DUPLICATE: 0.05}),
+    ("异常响应 5%", {FAULT_EXCEPTION: 0.05}),
+    ("混合 各2%", dict.fromkeys(FAULT_TYPES, 0.02)),
+]
+
+
+def run_benchmark(rates, duration=2.0, timeout=0.05, baudrate=115200, seed=1, address=0x0010):
+    """
+    在模拟仪表上按 D505 的读取方式 (transact 读9字节) 连续读取，统计故障下的有效采样率和恢复时间
+    :param rates: {故障类型: 概率}
+    :param duration: 测试时长 (秒)
+    :param timeout: 读超时 (秒)
+    :return: 结果字典
+    """
+    meter = SimulatedMeter(baudrate=baudrate, timeout=timeout)
+    port = FaultInjector(meter, rates, seed=seed)
+    command = build_read_request(meter.slave, address, 2)
+    results = dict.fromkeys(RESULTS, 0)
+    recoveries = []
+    failed_since = None
+    streak = max_streak = 0
+    good = 0
+    start = time.monotonic()
+    while time.monotonic() - start < duration:
+        meter.set_float(address, 100.0 * math.sin(time.monotonic()))
+        response, timing = transact(port, command, 9)
+        result, _ = classify_response(response, meter.slave, 0x03, 9)
+        results[result] += 1
+        if result == RESULT_OK:
+            good += 1
+            if failed_since is not None:
+                recoveries.append((timing.complete_ns - failed_since) / 1e6)
+                failed_since = None
+            streak = 0
+        else:
+            if failed_since is None:
+                failed_since = timing.send_ns
+            streak += 1
+            max_streak = max(max_streak, streak)
+    elapsed = time.monotonic() - start
+    return {
+        'transactions': sum(results.values()),
+        'good': good,
+        'good_rate_hz': good / elapsed,
+        'results': results,
+        'injected': port.injected,
+        'recovery_mean_ms': sum(recoveries) / len(recoveries) if recoveries else 0.0,
+        'recovery_max_ms': max(recoveries) if recoveries else 0.0,
+        'max_bad_streak': max_streak,
+    }
+
+
+def _format_result(name, result):
+    injected = sum(result['injected'].values())
+    return (f"{name:<12} 事务 {result['transactions']:>6}  有效 {result['good']:>6}  "
+            f"有效采样率 {result['good_rate_hz']:8.1f} Hz  注入 {injected:>4}  "
+            f"恢复 平均 {result['recovery_mean_ms']:7.2f} ms / 最长 {result['recovery_max_ms']:7.2f} ms  "
+            f"最长连续失败 {result['max_bad_streak']}")
+
+
+# 故障注入基准测试: python -m rs485.simulator [每种组合的秒数]
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    for mix_name, mix_rates in FAULT_MIXES:
+        print(_format_result(mix_name, run_benchmark(mix_rates, seconds)))
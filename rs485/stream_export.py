@@ -0,0 +1,192 @@
+import os
+import csv
+import time
+import queue
+import threading
+
+from rs485.samples import SAMPLE_FIELDS, STATUS_ACTIVE_SEND, SampleBatch
+
+
+class CsvSink:
+    def __init__(self, path):
+        """CSV 输出，每批样本一次 writerows"""
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(SAMPLE_FIELDS)
+
+    def write_batch(self, batch):
+        self.writer.writerows(batch.rows())
+
+    def flush(self, sync=False):
+        self.file.flush()
+        if sync:
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        self.flush(sync=True)
+        self.file.close()
+
+
+class ParquetSink:
+    def __init__(self, path, row_group_size=50000):
+        """
+        Parquet 列式输出，样本累积到 row_group_size 后写一个行组
+        :param row_group_size: 行组大小
+        """
+        # 检查是否安装了 pyarrow
+        try:
+            import numpy
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("请先安装 pyarrow 库，运行命令：pip install pyarrow")
+        self.np = numpy
+        self.pa = pyarrow
+        self.row_group_size = row_group_size
+        self.schema = pyarrow.schema([
+            ('slave', pyarrow.uint8()),
+            ('register', pyarrow.uint16()),
+            ('value', pyarrow.float64()),
+            ('send_ns', pyarrow.int64()),
+            ('first_byte_ns', pyarrow.int64()),
+            ('complete_ns', pyarrow.int64()),
+        ])
+        self.file = open(path, 'wb')
+        self.writer = pyarrow.parquet.ParquetWriter(self.file, self.schema)
+        self.pending = SampleBatch()
+
+    def write_batch(self, batch):
+        self.pending.extend(batch)
+        if len(self.pending) >= self.row_group_size:
+            self._write_row_group()
+
+    def _write_row_group(self):
+        pending = self.pending
+        if not len(pending):
+            return
+        np = self.np
+        pa = self.pa
+
+        def column(values, dtype, type):
+            # 直接引用 array 的内存，不逐个转换成 Python 对象
+            return pa.array(np.frombuffer(values, dtype=dtype), type=type)
+
+        timestamps = np.frombuffer(pending.timestamps, dtype=np.int64)
+        first_byte = np.frombuffer(pending.first_byte, dtype=np.int64)
+        complete = np.frombuffer(pending.complete, dtype=np.int64)
+        active_send = (np.frombuffer(pending.status, dtype=np.uint8) & STATUS_ACTIVE_SEND) != 0
+
+        table = pa.Table.from_arrays([
+            column(pending.slaves, np.uint8, pa.uint8()),
+            column(pending.registers, np.uint16, pa.uint16()),
+            column(pending.values, np.float64, pa.float64()),
+            pa.array(timestamps, type=pa.int64(), mask=active_send | (timestamps == 0)),
+            pa.array(first_byte, type=pa.int64(), mask=first_byte == 0),
+            pa.array(complete, type=pa.int64(), mask=complete == 0),
+        ], schema=self.schema)
+        self.writer.write_table(table)
+        self.pending = SampleBatch()
+
+    def flush(self, sync=False):
+        # 未满的行组留到下次，fsync 只针对已写出的行组
+        self.file.flush()
+        if sync:
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        self._write_row_group()
+        self.writer.close()
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+
+def create_sink(path):
+    """根据扩展名选择输出格式 (.parquet 为列式，其余为 CSV)"""
+    if path.lower().endswith('.parquet'):
+        return ParquetSink(path)
+    return CsvSink(path)
+
+
+class StreamExporter:
+    def __init__(self, path, batch_size=1000, max_pending=100000, fsync_interval=5.0):
+        """
+        后台线程流式导出样本，采集线程只把 SampleBatch 非阻塞入队
+        :param path: 输出文件路径 (.csv 或 .parquet)
+        :param batch_size: 每次写入合并的样本数
+        :param max_pending: 排队样本数上限，写盘跟不上时丢弃新批次并计数
+        :param fsync_interval: fsync 周期 (秒)
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.fsync_interval = fsync_interval
+        self.max_pending = max_pending
+        self.queue = queue.Queue()
+        self.sink = create_sink(path)
+        self.pending = 0
+        self.written = 0
+        self.dropped = 0
+        self._pending_lock = threading.Lock()
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="StreamExporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, batch):
+        """
+        提交一批样本 (SampleBatch，提交后不要再修改)，不阻塞
+        :return: 队列已满被丢弃时返回 False
+        """
+        count = len(batch)
+        if not count:
+            return True
+        with self._pending_lock:
+            if self.pending + count > self.max_pending:
+                self.dropped += count
+                return False
+            self.pending += count
+        self.queue.put_nowait(batch)
+        return True
+
+    def _drain(self, timeout):
+        merged = SampleBatch()
+        try:
+            merged.extend(self.queue.get(timeout=timeout))
+            while len(merged) < self.batch_size:
+                merged.extend(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        with self._pending_lock:
+            self.pending -= len(merged)
+        return merged
+
+    def _run(self):
+        last_sync = time.monotonic()
+        try:
+            while not (self._stop.is_set() and self.queue.empty()):
+                batch = self._drain(timeout=0.2)
+                if len(batch):
+                    self.sink.write_batch(batch)
+                    self.written += len(batch)
+                now = time.monotonic()
+                if now - last_sync >= self.fsync_interval:
+                    self.sink.flush(sync=True)
+                    last_sync = now
+                elif len(batch):
+                    self.sink.flush()
+        except Exception as e:
+            self.error = e
+        finally:
+            try:
+                self.sink.close()
+            except Exception as e:
+                self.error = self.error or e
+
+    def close(self, timeout=10.0):
+        """停止导出，写出队列中剩余的样本并关闭文件"""
+        self._stop.set()
+        self._thread.join(timeout)
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
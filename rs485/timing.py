@@ -0,0 +1,131 @@
+import math
+
+
+class TransactionTiming:
+    """
+    一次请求/响应的时间戳 (time.monotonic_ns)，未发生的阶段为 None
+    resynced 表示响应不是一个完整的有效帧，接收时重新定位过帧边界
+    """
+    __slots__ = ('send_ns', 'first_byte_ns', 'complete_ns', 'resynced')
+
+    def __init__(self, send_ns=None, first_byte_ns=None, complete_ns=None):
+        self.send_ns = send_ns
+        self.first_byte_ns = first_byte_ns
+        self.complete_ns = complete_ns
+        self.resynced = False
+
+    @property
+    def latency_ns(self):
+        """发送到整帧接收完成的时间"""
+        if self.send_ns is None or self.complete_ns is None:
+            return None
+        return self.complete_ns - self.send_ns
+
+    @property
+    def first_byte_latency_ns(self):
+        """发送到收到首字节的时间"""
+        if self.send_ns is None or self.first_byte_ns is None:
+            return None
+        return self.first_byte_ns - self.send_ns
+
+    def as_dict(self):
+        return {'send_ns': self.send_ns, 'first_byte_ns': self.first_byte_ns, 'complete_ns': self.complete_ns}
+
+
+class RunningStats:
+    """Welford 算法累计均值/方差/极值，每个样本 O(1)"""
+    __slots__ = ('count', 'mean', '_m2', 'min', 'max')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def std(self):
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self._m2 / (self.count - 1))
+
+
+class SlaveTimingStats:
+    def __init__(self):
+        """单个从站的采样间隔抖动与响应延迟统计"""
+        self.interval = RunningStats()     # 相邻两次发送的间隔
+        self.latency = RunningStats()      # 发送到整帧完成
+        self.first_byte = RunningStats()   # 发送到首字节
+        self.timeouts = 0
+        self.last_send_ns = None
+
+    def record(self, timing):
+        if timing.send_ns is not None:
+            if self.last_send_ns is not None:
+                self.interval.add(timing.send_ns - self.last_send_ns)
+            self.last_send_ns = timing.send_ns
+        latency = timing.latency_ns
+        if latency is None:
+            self.timeouts += 1
+        else:
+            self.latency.add(latency)
+        first_byte = timing.first_byte_latency_ns
+        if first_byte is not None:
+            self.first_byte.add(first_byte)
+
+    def summary(self):
+        """
+        生成统计摘要 (单位 ms)
+        :return: 字典，jitter_ms 为采样间隔标准差，jitter_pp_ms 为间隔峰峰值
+        """
+        interval, latency, first_byte = self.interval, self.latency, self.first_byte
+        return {
+            'transactions': latency.count + self.timeouts,
+            'timeouts': self.timeouts,
+            'interval_mean_ms': interval.mean / 1e6,
+            'jitter_ms': interval.std / 1e6,
+            'jitter_pp_ms': 0.0 if interval.count == 0 else (interval.max - interval.min) / 1e6,
+            'latency_mean_ms': latency.mean / 1e6,
+            'latency_std_ms': latency.std / 1e6,
+            'latency_max_ms': 0.0 if latency.max is None else latency.max / 1e6,
+            'first_byte_mean_ms': first_byte.mean / 1e6,
+        }
+
+
+class TimingStats:
+    def __init__(self):
+        """按从站地址分别统计的时间统计集合"""
+        self.slaves = {}
+
+    def record(self, slave, timing):
+        stats = self.slaves.get(slave)
+        if stats is None:
+            stats = self.slaves[slave] = SlaveTimingStats()
+        stats.record(timing)
+        return stats
+
+    def summary_text(self, slave):
+        """生成用于界面显示的单行统计文本"""
+        stats = self.slaves.get(slave)
+        if stats is None:
+            return f"从站{slave}：无统计数据"
+        s = stats.summary()
+        return (f"从站{slave}：延迟 {s['latency_mean_ms']:.2f}±{s['latency_std_ms']:.2f} ms "
+                f"(最大 {s['latency_max_ms']:.2f})，首字节 {s['first_byte_mean_ms']:.2f} ms，"
+                f"间隔抖动 {s['jitter_ms']:.2f} ms，超时 {s['timeouts']}/{s['transactions']}")
+
+    def reset(self):
+        self.slaves.clear()
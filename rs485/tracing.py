@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import threading
+from array import array
+
+
+class _ThreadTrace:
+    def __init__(self, capacity):
+        """单个线程的预分配环形缓冲区，写入不加锁"""
+        self.capacity = capacity
+        self.names = [None] * capacity
+        self.starts = array('q', bytes(8 * capacity))
+        self.ends = array('q', bytes(8 * capacity))
+        self.total = 0
+        self.thread_id = threading.get_ident()
+        self.thread_name = threading.current_thread().name
+
+    def record(self, name, start_ns, end_ns):
+        index = self.total % self.capacity
+        self.names[index] = name
+        self.starts[index] = start_ns
+        self.ends[index] = end_ns
+        self.total += 1
+
+    def events(self):
+        count = min(self.total, self.capacity)
+        first = self.total - count
+        for i in range(first, self.total):
+            index = i % self.capacity
+            yield self.names[index], self.starts[index], self.ends[index]
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'start_ns')
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start_ns = time.monotonic_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.record(self.name, self.start_ns, time.monotonic_ns())
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    def __init__(self, capacity=65536):
+        """
+        热路径追踪：每个线程把 (名称, 开始ns, 结束ns) 写入自己的环形缓冲区
+        关闭时 span() 返回共享的空对象，几乎没有开销
+        :param capacity: 每个线程保留的事件数
+        """
+        self.capacity = capacity
+        self.enabled = False
+        self._local = threading.local()
+        self._buffers = []
+        self._lock = threading.Lock()
+
+    def _buffer(self):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = self._local.buffer = _ThreadTrace(self.capacity)
+            with self._lock:
+                self._buffers.append(buffer)
+        return buffer
+
+    def span(self, name):
+        """
+        用法: with tracer.span("decode"): ...
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name, start_ns, end_ns):
+        """直接记录一段已知起止时间的事件 (如串口收发的时间戳)"""
+        if self.enabled:
+            self._buffer().record(name, start_ns, end_ns)
+
+    def clear(self):
+        with self._lock:
+            for buffer in self._buffers:
+                buffer.total = 0
+
+    def chrome_trace(self):
+        """
+        生成 Chrome trace-event 格式 (chrome://tracing 或 Perfetto 可直接打开)
+        :return: 可序列化为JSON的字典
+        """
+        pid = os.getpid()
+        events = []
+        with self._lock:
+            buffers = list(self._buffers)
+        for buffer in buffers:
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': buffer.thread_id,
+                           'args': {'name': buffer.thread_name}})
+            for name, start_ns, end_ns in buffer.events():
+                events.append({'name': name, 'ph': 'X', 'pid': pid, 'tid': buffer.thread_id,
+                               'ts': start_ns / 1000.0, 'dur': (end_ns - start_ns) / 1000.0})
+        return {'traceEvents': events, 'displayTimeUnit': 'ns'}
+
+    def dump_chrome(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+
+
+# 全局追踪器，各模块共用
+tracer = Tracer()
@@ -0,0 +1,222 @@
+import time
+
+from rs485.low_latency import rtu_timing
+from rs485.modbus_rtu import check_crc
+from rs485.timing import TransactionTiming
+from rs485.tracing import tracer
+
+# 帧头之后剩余字节的等待余量：USB转串口的 latency_timer (FTDI 默认16ms) 加调度延迟
+FRAME_MARGIN = 0.02
+
+
+def transact(port, command, expected_length):
+    """
+    发送请求并接收响应，同时记录发送、首字节和整帧完成时间
+    先读帧头 (地址、功能码) 判断是正常响应还是5字节的异常响应，剩余字节按帧长读取，
+    且最多等待剩余字节的传输时间，丢字节时不必等满整个读超时
+    :param port: 已打开的 serial.Serial
+    :param command: 请求帧 (含CRC)
+    :param expected_length: 期望的正常响应字节数
+    :return: (响应数据, TransactionTiming)，超时时响应为空或不完整；
+             收到完整且CRC正确的帧 (含异常响应) 时记录 complete_ns，结果类型由 classify_response 判断
+    """
+    clock = time.monotonic_ns
+    timing = TransactionTiming()
+    # 丢弃上一次事务残留的字节 (迟到的响应、重复帧、噪声)，否则本次响应会错位
+    port.reset_input_buffer()
+    timing.send_ns = clock()
+    port.write(command)
+    written_ns = clock()
+    tracer.record("serial_write", timing.send_ns, written_ns)
+
+    # 先单独等首字节，用于区分仪表响应时间与帧传输时间
+    first = port.read(1)
+    if not first:
+        tracer.record("wait_first_byte (timeout)", written_ns, clock())
+        return b'', timing
+    timing.first_byte_ns = clock()
+    tracer.record("wait_first_byte", written_ns, timing.first_byte_ns)
+
+    response = first + port.read(1)
+    length = _frame_length(response, command, expected_length)
+    if length > len(response):
+        response += _read_rest(port, length - len(response))
+    if not _is_response(response, command):
+        timing.resynced = True
+        resync_ns = clock()
+        response = resync_response(port, command, response, wait=len(response) >= length)
+        tracer.record("resync", resync_ns, clock())
+    end_ns = clock()
+    if _is_response(response, command):
+        timing.complete_ns = end_ns
+    tracer.record("frame_complete", timing.first_byte_ns, end_ns)
+    return response, timing
+
+
+def broadcast_wait(port, frame_length, turnaround=0.1):
+    """
+    广播请求 (从站地址0) 没有响应，发送后要等 帧传输时间 + t3.5 + 仪表处理时间 才能发下一帧
+    :param frame_length: 广播帧字节数
+    :param turnaround: 仪表处理广播命令的时间 (秒)
+    :return: 从开始发送算起的等待时间 (秒)
+    """
+    char_time, _, t35 = rtu_timing(port.baudrate, port.bytesize, port.parity, int(port.stopbits))
+    return frame_length * char_time + t35 + turnaround
+
+
+def send_broadcast(port, frame, turnaround=0.1):
+    """
+    发送广播帧，等线路上所有仪表都处理完成后返回
+    :param frame: 请求帧 (含CRC)
+    :return: 发送时间 (time.monotonic_ns)
+    """
+    port.reset_input_buffer()
+    send_ns = time.monotonic_ns()
+    port.write(frame)
+    remaining = send_ns / 1e9 + broadcast_wait(port, len(frame), turnaround) - time.monotonic_ns() / 1e9
+    if remaining > 0:
+        time.sleep(remaining)
+    return send_ns
+
+
+def _frame_length(header, command, expected_length):
+    """
+    :param header: 已收到的地址和功能码
+    :return: 应读取的帧长度；帧头与请求不符 (噪声、丢字节) 时不再读取，交给 resync_response
+    """
+    if len(header) < 2 or header[0] != command[0]:
+        return len(header)
+    if header[1] == command[1] | 0x80:
+        return 5
+    if header[1] == command[1]:
+        return expected_length
+    return len(header)
+
+
+def _read_rest(port, needed):
+    """读取帧的剩余部分，最多等待其传输时间 + t3.5 + FRAME_MARGIN"""
+    timeout = port.timeout
+    char_time, _, t35 = rtu_timing(port.baudrate, port.bytesize, port.parity, int(port.stopbits))
+    limit = needed * char_time + t35 + FRAME_MARGIN
+    if timeout is not None and timeout <= limit:
+        return port.read(needed)
+    port.timeout = limit
+    try:
+        return port.read(needed)
+    finally:
+        port.timeout = timeout
+
+
+def _is_response(response, command):
+    return (len(response) >= 5 and response[0] == command[0] and response[1] & 0x7F == command[1]
+            and expected_response_length(response) == len(response) and check_crc(response))
+
+
+def find_frame(buffer, slave=None, function=None):
+    """
+    在缓冲的字节中查找第一个有效响应帧 (地址、功能码、长度、CRC 均正确)
+    :param buffer: 已收到的字节
+    :param slave: 期望的从站地址，None 表示不限
+    :param function: 期望的功能码 (同时接受其异常响应)，None 表示不限
+    :return: (起始位置, 帧长度)；没有完整的有效帧时帧长度为 None，
+             起始位置为第一个可能的帧头 (还差字节)，之前的字节可以丢弃
+    """
+    end = len(buffer)
+    pending = None
+    for start in range(end):
+        if slave is not None and buffer[start] != slave:
+            continue
+        if function is not None and start + 1 < end and buffer[start + 1] & 0x7F != function:
+            continue
+        length = expected_response_length(buffer[start:start + 3])
+        if length == 0:
+            continue
+        if length is None or start + length > end:
+            if pending is None:
+                pending = start
+            continue
+        if check_crc(buffer[start:start + length]):
+            return start, length
+    return (end if pending is None else pending), None
+
+
+def resync_response(port, command, received, max_length=256, wait=True):
+    """
+    响应不是有效帧时 (混入噪声、丢字节、残留的旧帧等)，在已收到和缓冲区中的字节里
+    按 (地址, 功能码, 长度, CRC) 重新定位本次请求的响应，一次干扰只损失一个样本
+    :param command: 请求帧，响应的地址和功能码与其相同
+    :param received: 已读到的字节
+    :param wait: False 表示线路已经静默 (上一次读取没有收齐)，只查找已收到的字节，不再等待
+    :return: 找到的有效帧；找不到时返回原数据，由调用方按错误处理
+    """
+    slave, function = command[0], command[1]
+    buffer = bytearray(received)
+    while len(buffer) < max_length:
+        waiting = port.in_waiting
+        if waiting:
+            buffer += port.read(waiting)
+        start, length = find_frame(buffer, slave, function)
+        if length is not None:
+            return bytes(buffer[start:start + length])
+        if start >= len(buffer) or not wait:
+            # 没有可能的帧头 (如整帧位翻转) 或线路已静默，不再等待
+            break
+        # 可能的帧头后面还差字节，按推算的帧长等待剩余部分
+        length = expected_response_length(buffer[start:start + 3])
+        needed = max((start + length if length else start + 3) - len(buffer), 1)
+        chunk = _read_rest(port, needed)
+        buffer += chunk
+        # 没有收齐说明帧已结束 (丢字节)，再查找一次已收到的字节即可
+        wait = len(chunk) == needed
+    return bytes(received)
+
+
+def expected_response_length(frame):
+    """
+    根据已收到的帧头推算完整响应帧长度
+    :param frame: 已收到的字节 (从帧头开始)
+    :return: 完整帧长度；字节数不足以判断时返回 None；未知功能码返回 0
+    """
+    if len(frame) < 2:
+        return None
+    function = frame[1]
+    if function & 0x80:  # 异常响应: 地址 功能码 异常码 CRC
+        return 5
+    if function in (0x01, 0x02, 0x03, 0x04, 0x17):
+        if len(frame) < 3:
+            return None
+        return 5 + frame[2]
+    if function in (0x05, 0x06, 0x0F, 0x10):
+        return 8
+    return 0
+
+
+def read_response(port):
+    """
+    按帧头逐步推算长度读取一帧完整响应 (适用于任意功能码)
+    :param port: 已打开的 serial.Serial
+    :return: (响应数据, 首字节时间, 完成时间)，超时时响应为空或不完整
+    """
+    clock = time.monotonic_ns
+    first = port.read(1)
+    if not first:
+        return b'', None, None
+    first_byte_ns = clock()
+    frame = bytearray(first)
+    while True:
+        length = expected_response_length(frame)
+        if length is None:
+            needed = (2 if len(frame) < 2 else 3) - len(frame)
+        elif length == 0:  # 未知功能码，读到帧间隔为止，由调用方校验CRC
+            frame += port.read(256)
+            return bytes(frame), first_byte_ns, clock()
+        else:
+            needed = length - len(frame)
+        if needed <= 0:
+            break
+        chunk = port.read(needed)
+        if not chunk:
+            break
+        frame += chunk
+    complete_ns = clock() if expected_response_length(frame) == len(frame) else None
+    return bytes(frame), first_byte_ns, complete_ns
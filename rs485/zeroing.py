@@ -0,0 +1,174 @@
+import sys
+import time
+import struct
+
+from rs485.codec import ORDER_ABCD, TYPE_FLOAT, TYPE_LONG, get_codec
+from rs485.json_store import config_path, read_json, write_json
+from rs485.modbus_rtu import RESULT_OK, append_crc, build_read_request, classify_response, read_response_length
+from rs485.transport import send_broadcast, transact
+
+WRITE_RESPONSE_LENGTH = 8  # 10功能码响应: 地址 功能码 起始地址 数量 CRC
+DEFAULT_ZERO_PATH = config_path("zero_commands.json")
+
+
+class ZeroCommand:
+    def __init__(self, name, register, value=1, verify_register=0x0000, tolerance=0.0, data_type=TYPE_FLOAT,
+                 byte_order=ORDER_ABCD, verified=False):
+        """
+        清零/去皮命令：向命令寄存器写入一个32位长整型 (10功能码，2个寄存器)
+        :param register: 命令寄存器 (协议地址，从0开始)
+        :param value: 写入的命令值
+        :param verify_register: 执行后应归零的测量值寄存器
+        :param tolerance: 核对时测量值允许的绝对误差
+        :param data_type: 测量值的数据类型，见 rs485.codec
+        :param byte_order: 命令值和测量值的字节序
+        :param verified: 寄存器地址是否已按仪表说明书核对，未核对的命令不允许广播
+        """
+        self.name = name
+        self.register = register
+        self.value = value
+        self.verify_register = verify_register
+        self.tolerance = abs(tolerance)
+        self.data_type = data_type
+        self.byte_order = byte_order
+        self.verified = verified
+        self.codec = get_codec(data_type, byte_order)
+
+    def write_pdu(self):
+        return struct.pack('>BHHB', 0x10, self.register, 2, 4) + get_codec(TYPE_LONG, self.byte_order).pack(self.value)
+
+    def verify_pdu(self):
+        return struct.pack('>BHH', 0x03, self.verify_register, self.codec.registers)
+
+    def decode(self, data):
+        """:return: 测量值，数据不足时返回 None"""
+        return self.codec.unpack_from(data) if data and len(data) >= self.codec.size else None
+
+    def check(self, value):
+        """:return: 读回的测量值是否已归零"""
+        return value is not None and abs(value) <= self.tolerance
+
+    def replace(self, **changes):
+        """:return: 修改部分参数后的新命令 (如按界面当前的数据类型和字节序)"""
+        fields = self.as_dict()
+        fields.update(changes)
+        return ZeroCommand(self.name, **fields)
+
+    def as_dict(self):
+        return {'register': self.register, 'value': self.value, 'verify_register': self.verify_register,
+                'tolerance': self.tolerance, 'data_type': self.data_type, 'byte_order': self.byte_order,
+                'verified': self.verified}
+
+
+# DY500 清零/去皮命令寄存器表的默认值，测量值在 40000
+# 命令寄存器地址尚未与仪表说明书核对 (verified=False)，使用前需由用户确认或修改，见 ZeroCommandStore
+DY500_ZERO_COMMANDS = {
+    'zero': ZeroCommand("清零", 0x0030, 1, 0x0000, tolerance=0.5),
+    'tare': ZeroCommand("去皮", 0x0032, 1, 0x0000, tolerance=0.5),
+}
+
+
+class ZeroCommandStore:
+    def __init__(self, path=DEFAULT_ZERO_PATH, defaults=DY500_ZERO_COMMANDS):
+        """保存用户设置的清零/去皮命令寄存器地址等参数，没有保存过的命令使用默认值"""
+        self.path = path
+        self.defaults = defaults
+
+    def get(self, key):
+        default = self.defaults[key]
+        try:
+            saved = read_json(self.path).get(key)
+        except (OSError, ValueError):
+            saved = None
+        if not saved:
+            return default
+        try:
+            return default.replace(**saved)
+        except (TypeError, ValueError):
+            return default
+
+    def put(self, key, command):
+        data = read_json(self.path)
+        data[key] = command.as_dict()
+        write_json(self.path, data)
+
+
+def parse_slaves(text):
+    """
+    解析从站列表，如 "1-30,32"
+    :return: 去重排序后的从站地址列表
+    """
+    slaves = set()
+    for part in text.replace('，', ',').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        first = int(first, 0)
+        last = int(last, 0) if last else first
+        if not 1 <= first <= last <= 247:
+            raise ValueError(f"从站地址超出范围 1-247: {part}")
+        slaves.update(range(first, last + 1))
+    return sorted(slaves)
+
+
+def _check_broadcast(command, broadcast):
+    if broadcast and not command.verified:
+        raise ValueError(f"{command.name}命令寄存器地址未按说明书核对，不能广播")
+
+
+def zero_meters(port, command, slaves, broadcast=False, turnaround=0.1):
+    """
+    在一条线路上执行清零/去皮，然后逐个读回测量值核对
+    广播时所有仪表只用一帧，总耗时约为 一帧时间 + 一轮核对读取
+    :param port: 已打开的 serial.Serial (调用期间不能有其他线程读写)
+    :param command: ZeroCommand
+    :param slaves: 需要核对的从站地址列表
+    :param broadcast: True 用从站地址0广播 (仅限 command.verified)，False 逐个写入
+    :param turnaround: 仪表处理广播命令的时间 (秒)
+    :return: ({从站: 读回的测量值，读取失败为 None}, 耗时秒)
+    """
+    _check_broadcast(command, broadcast)
+    start = time.monotonic()
+    write = command.write_pdu()
+    if broadcast:
+        send_broadcast(port, append_crc(b'\x00' + write), turnaround)
+    else:
+        for slave in slaves:
+            transact(port, append_crc(bytes([slave]) + write), WRITE_RESPONSE_LENGTH)
+
+    count = command.codec.registers
+    expected = read_response_length(count)
+    values = {}
+    for slave in slaves:
+        response, _ = transact(port, build_read_request(slave, command.verify_register, count), expected)
+        result, _ = classify_response(response, slave, 0x03, expected)
+        values[slave] = command.decode(response[3:-2]) if result == RESULT_OK else None
+    return values, time.monotonic() - start
+
+
+def _format_result(command, values, elapsed):
+    lines = []
+    failed = 0
+    for slave, value in values.items():
+        ok = command.check(value)
+        failed += not ok
+        state = "成功" if ok else "失败"
+        lines.append(f"从站{slave}: {state}  测量值 {'读取失败' if value is None else f'{value:g}'}")
+    lines.append(f"{command.name} {len(values)} 台，失败 {failed} 台，耗时 {elapsed * 1000:.1f} ms")
+    return "\n".join(lines)
+
+
+# 清零并核对: python -m rs485.zeroing 端口 波特率 从站列表 [zero|tare]
+# 命令参数取自 ZeroCommandStore (界面中保存)，地址已核对的命令用广播，否则逐个写入
+if __name__ == "__main__":
+    import serial
+
+    if len(sys.argv) < 4:
+        print("用法: python -m rs485.zeroing 端口 波特率 从站列表(如1-30) [zero|tare]")
+        sys.exit(1)
+    zero_command = ZeroCommandStore().get(sys.argv[4] if len(sys.argv) > 4 else 'zero')
+    with serial.Serial(sys.argv[1], int(sys.argv[2]), timeout=0.1) as serial_port:
+        result_values, result_elapsed = zero_meters(serial_port, zero_command, parse_slaves(sys.argv[3]),
+                                                    broadcast=zero_command.verified)
+    print(_format_result(zero_command, result_values, result_elapsed))
@@ -0,0 +1,39 @@
+import unittest
+
+from rs485.bus_metrics import BusMetrics
+from rs485.modbus_rtu import RESULT_OK
+
+
+class PrometheusLabelTest(unittest.TestCase):
+    def test_windows_hardware_id_is_escaped(self):
+        port = 'USB\\VID_0403&PID_6001\\A1"B\n'
+        metrics = BusMetrics()
+        metrics.register_port(port, 9600)
+        metrics.record_transaction(port, 1, 8, 9, RESULT_OK, 1000000)
+        text = metrics.render_prometheus()
+        self.assertIn('rs485_bytes_sent_total{port="USB\\\\VID_0403&PID_6001\\\\A1\\"B\\n"} 8', text)
+        # 每个样本一行，标签值中的换行不会拆开
+        for line in text.splitlines():
+            self.assertTrue(line.startswith(("# ", "rs485_")), line)
+
+
+class RegisterPortTest(unittest.TestCase):
+    def test_reopen_keeps_counters(self):
+        metrics = BusMetrics()
+        metrics.register_port("COM3", 9600)
+        metrics.record_transaction("COM3", 1, 8, 9, RESULT_OK)
+        metrics.record_disconnect("COM3", 2.0)
+        busy = metrics.ports["COM3"].busy_seconds
+
+        # 手动关闭后以新的波特率重新打开同一个适配器
+        metrics.register_port("COM3", 115200)
+        port_metrics = metrics.ports["COM3"]
+        self.assertEqual(port_metrics.bytes_sent, 8)
+        self.assertEqual(port_metrics.disconnects, 1)
+        self.assertEqual(port_metrics.slaves[1].results[RESULT_OK], 1)
+        self.assertEqual(port_metrics.busy_seconds, busy)
+        self.assertAlmostEqual(port_metrics.char_time, 10 / 115200)
+
+
+if __name__ == "__main__":
+    unittest.main()
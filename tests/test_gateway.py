@@ -0,0 +1,64 @@
+import threading
+import unittest
+
+from rs485.gateway import EXCEPTION_GATEWAY_TARGET_FAILED, ModbusTcpGateway, RtuBus
+from rs485.read_cache import CachedBus
+from rs485.simulator import SimulatedMeter
+
+READ_PDU = b'\x03\x00\x00\x00\x02'
+
+
+class CoalescedTimeoutTest(unittest.TestCase):
+    def setUp(self):
+        # 从站2不存在，每次读取都要等满0.3秒读超时，用来让后面的请求在队列中排队
+        self.meter = SimulatedMeter(slave=1, timeout=0.3)
+        self.meter.set_float(0, 1.5)
+        self.rtu_bus = RtuBus(self.meter)
+        self.bus = CachedBus(self.rtu_bus)
+        self.gateways = []
+
+    def tearDown(self):
+        for gateway in self.gateways:
+            gateway.server.server_close()
+        self.bus.close()
+
+    def gateway(self, timeout):
+        gateway = ModbusTcpGateway([self.bus], host="127.0.0.1", port=0, timeout=timeout)
+        self.gateways.append(gateway)
+        return gateway
+
+    def block_bus(self):
+        return self.rtu_bus.submit(2, READ_PDU)
+
+    def test_slow_client_does_not_cancel_other_readers(self):
+        blocker = self.block_bus()
+        patient = self.gateway(timeout=3.0)
+        impatient = self.gateway(timeout=0.05)
+        responses = {}
+        thread = threading.Thread(target=lambda: responses.update(patient=patient.process(1, READ_PDU)))
+        thread.start()
+        responses['impatient'] = impatient.process(1, READ_PDU)
+        thread.join(5.0)
+
+        self.assertEqual(responses['impatient'], bytes([0x83, EXCEPTION_GATEWAY_TARGET_FAILED]))
+        self.assertEqual(responses['patient'], b'\x03\x04\x3f\xc0\x00\x00')
+        self.assertEqual(self.bus.stats()['coalesced'], 1)
+        blocker.exception(5.0)
+
+    def test_last_reader_cancels_queued_transaction(self):
+        blocker = self.block_bus()
+        submitted = []
+        submit = self.rtu_bus.submit
+        self.rtu_bus.submit = lambda *args: submitted.append(submit(*args)) or submitted[-1]
+
+        response = self.gateway(timeout=0.05).process(1, READ_PDU)
+
+        self.assertEqual(response, bytes([0x83, EXCEPTION_GATEWAY_TARGET_FAILED]))
+        self.assertTrue(submitted[0].cancelled())
+        blocker.exception(5.0)
+        # 取消的事务不再被后来的读者共享
+        self.assertEqual(self.gateway(timeout=3.0).process(1, READ_PDU), b'\x03\x04\x3f\xc0\x00\x00')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from concurrent.futures import Future
+
+from rs485.gateway import _parse_ttl
+from rs485.read_cache import CachedBus
+
+
+class FakeBus:
+    name = "FAKE"
+
+    def __init__(self):
+        self.requests = []
+
+    def submit(self, slave, pdu, priority=None):
+        self.requests.append((slave, bytes(pdu)))
+        future = Future()
+        future.set_result(b'\x03\x02\x00\x01' if pdu[0] == 0x03 else bytes(pdu[:5]))
+        return future
+
+    def close(self):
+        pass
+
+
+class WriteInvalidationTest(unittest.TestCase):
+    def test_read_write_multiple_invalidates_written_registers(self):
+        bus = FakeBus()
+        cached = CachedBus(bus, default_ttl=60.0)
+        read = b'\x03\x00\x10\x00\x01'
+        cached.execute(1, read)
+        cached.execute(1, read)
+        self.assertEqual(cached.stats()['hits'], 1)
+
+        # 读 0x0000 开始1个，写 0x0010 开始1个
+        cached.execute(1, b'\x17\x00\x00\x00\x01\x00\x10\x00\x01\x02\x00\x07')
+        cached.execute(1, read)
+        self.assertEqual(cached.stats()['misses'], 2)
+
+
+class TtlOptionTest(unittest.TestCase):
+    def test_parse_ttl(self):
+        self.assertEqual(_parse_ttl("1:16=0.5"), (1, 16, 0.5, 1))
+        self.assertEqual(_parse_ttl("2:100:4=10"), (2, 100, 10.0, 4))
+
+    def test_per_register_ttl(self):
+        cached = CachedBus(FakeBus())
+        slave, address, ttl, count = _parse_ttl("1:16:2=60")
+        cached.set_ttl(slave, address, ttl, count)
+        cached.execute(1, b'\x03\x00\x10\x00\x02')
+        cached.execute(1, b'\x03\x00\x10\x00\x02')
+        cached.execute(1, b'\x03\x00\x20\x00\x01')
+        cached.execute(1, b'\x03\x00\x20\x00\x01')
+        self.assertEqual(cached.stats(), {'hits': 1, 'coalesced': 0, 'misses': 3})
+
+
+if __name__ == "__main__":
+    unittest.main()